@@ -0,0 +1,204 @@
+"""Pop/unread latency of the watcher-mode comms queries on a large inbox DB.
+
+Usage:
+    python benchmarks/bench_comms_pop.py
+    python benchmarks/bench_comms_pop.py --messages 1000000 --unread 2000 --pops 1000
+
+Seeds a comms DB with `--messages` rows spread over `--agents` recipients
+(plus broadcasts, most already read) and no secondary indexes, as an older
+comms DB may look. "before" replays the pre-change access pattern — a new
+connection per call, rollback journal, UNION query with a global ORDER BY.
+"after" is `CommsWatcher` (persistent WAL connection, inbox indexes,
+broadcast watermarks). Use a large `--broadcasts` to see read-broadcast aging.
+Each side pops from its own copy of the seeded file.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List
+
+from minion_swarm.watcher import CommsWatcher
+
+AGENT = "bench-agent"
+
+_SCHEMA = """
+CREATE TABLE messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    from_agent TEXT NOT NULL,
+    to_agent TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    read_flag INTEGER NOT NULL DEFAULT 0,
+    is_cc INTEGER NOT NULL DEFAULT 0,
+    cc_original_to TEXT
+);
+CREATE TABLE broadcast_reads (
+    agent_name TEXT NOT NULL,
+    message_id INTEGER NOT NULL
+);
+CREATE TABLE agents (
+    name TEXT PRIMARY KEY,
+    registered_at TEXT,
+    last_seen TEXT,
+    last_inbox_check TEXT,
+    role TEXT,
+    description TEXT,
+    status TEXT
+);
+"""
+
+
+def seed(path: Path, messages: int, agents: int, unread: int, broadcasts: int) -> None:
+    rng = random.Random(7)
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    conn.execute("INSERT INTO agents (name, role, status) VALUES (?, 'coder', 'online')", (AGENT,))
+
+    others = [f"agent-{i}" for i in range(agents)]
+    body = "status update " * 8
+    rows = []
+    for i in range(messages - unread - broadcasts):
+        rows.append(("lead", rng.choice(others), body, f"2026-01-01T00:00:{i % 60:02d}", 1 if rng.random() < 0.9 else 0))
+    for i in range(broadcasts):
+        rows.append(("lead", "all", body, "2026-01-01T00:00:00", 0))
+    for i in range(unread):
+        rows.append(("lead", AGENT, f"task {i}", "2026-01-01T00:00:00", 0))
+    rng.shuffle(rows)
+    conn.executemany(
+        "INSERT INTO messages (from_agent, to_agent, content, timestamp, read_flag) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
+    # All but the last 1% of broadcasts already read by the bench agent
+    conn.execute(
+        """
+        INSERT INTO broadcast_reads (agent_name, message_id)
+        SELECT ?, id FROM messages WHERE to_agent = 'all' ORDER BY id LIMIT ?
+        """,
+        (AGENT, broadcasts - max(1, broadcasts // 100)),
+    )
+    conn.commit()
+    conn.close()
+
+
+# ── before: copy of the pre-change per-call access pattern ────────────────────
+
+def _legacy_connect(db: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db, timeout=5.0)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def legacy_pop(db: Path) -> bool:
+    with _legacy_connect(db) as conn:
+        row = conn.execute(
+            """
+            SELECT id, from_agent, to_agent, content, timestamp, is_broadcast, is_cc, cc_original_to
+            FROM (
+                SELECT id, from_agent, to_agent, content, timestamp,
+                       0 AS is_broadcast, is_cc, cc_original_to
+                FROM messages
+                WHERE to_agent = ? AND read_flag = 0
+
+                UNION ALL
+
+                SELECT m.id, m.from_agent, m.to_agent, m.content, m.timestamp,
+                       1 AS is_broadcast, m.is_cc, m.cc_original_to
+                FROM messages m
+                LEFT JOIN broadcast_reads br
+                    ON br.agent_name = ? AND br.message_id = m.id
+                WHERE m.to_agent = 'all' AND br.message_id IS NULL
+            )
+            ORDER BY id ASC
+            LIMIT 1
+            """,
+            (AGENT, AGENT),
+        ).fetchone()
+        if row is None:
+            return False
+        if row["is_broadcast"]:
+            conn.execute("INSERT OR IGNORE INTO broadcast_reads (agent_name, message_id) VALUES (?, ?)", (AGENT, row["id"]))
+        else:
+            conn.execute("UPDATE messages SET read_flag = 1 WHERE id = ?", (row["id"],))
+        conn.execute("UPDATE agents SET last_seen = ?, last_inbox_check = ? WHERE name = ?", ("t", "t", AGENT))
+        return True
+
+
+def legacy_unread(db: Path) -> int:
+    with _legacy_connect(db) as conn:
+        direct = conn.execute(
+            "SELECT COUNT(*) AS c FROM messages WHERE to_agent = ? AND read_flag = 0", (AGENT,),
+        ).fetchone()["c"]
+        broadcast = conn.execute(
+            """
+            SELECT COUNT(*) AS c FROM messages m
+            LEFT JOIN broadcast_reads br ON br.agent_name = ? AND br.message_id = m.id
+            WHERE m.to_agent = 'all' AND br.message_id IS NULL
+            """,
+            (AGENT,),
+        ).fetchone()["c"]
+    return int(direct) + int(broadcast)
+
+
+# ── measurement ───────────────────────────────────────────────────────────────
+
+def _measure(fn: Callable[[], object], n: int) -> List[float]:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def _report(label: str, samples: List[float]) -> None:
+    ordered = sorted(samples)
+    pct = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))]  # noqa: E731
+    print(
+        f"{label:<16} n={len(samples):<5} mean {statistics.fmean(samples):9.1f} us"
+        f"  p50 {pct(0.50):9.1f}  p95 {pct(0.95):9.1f}  p99 {pct(0.99):9.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--agents", type=int, default=50, help="other recipients")
+    parser.add_argument("--unread", type=int, default=2_000, help="unread direct messages for the bench agent")
+    parser.add_argument("--broadcasts", type=int, default=1_000)
+    parser.add_argument("--pops", type=int, default=1_000)
+    parser.add_argument("--unread-calls", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        seeded = Path(tmp) / "seed.db"
+        start = time.perf_counter()
+        seed(seeded, args.messages, args.agents, args.unread, args.broadcasts)
+        print(f"seeded {args.messages} messages in {time.perf_counter() - start:.1f}s "
+              f"({seeded.stat().st_size / 1e6:.0f} MB)")
+
+        before_db = Path(tmp) / "before.db"
+        after_db = Path(tmp) / "after.db"
+        shutil.copy(seeded, before_db)
+        shutil.copy(seeded, after_db)
+
+        _report("before unread", _measure(lambda: legacy_unread(before_db), args.unread_calls))
+        _report("before pop", _measure(lambda: legacy_pop(before_db), args.pops))
+
+        watcher = CommsWatcher(AGENT, after_db)
+        start = time.perf_counter()
+        watcher.unread_count()  # first call opens the connection, builds indexes, migrates reads
+        print(f"after: first call (WAL, indexes, watermark migration) {time.perf_counter() - start:.2f}s")
+        _report("after unread", _measure(watcher.unread_count, args.unread_calls))
+        _report("after pop", _measure(watcher.pop_next_message, args.pops))
+        watcher.close()
+
+
+if __name__ == "__main__":
+    main()
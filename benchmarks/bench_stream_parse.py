@@ -0,0 +1,209 @@
+"""Per-line cost of the stream-json hot path, before and after parse-once.
+
+Usage:
+    python benchmarks/bench_stream_parse.py .minion-swarm/logs/<agent>.stream.jsonl
+    python benchmarks/bench_stream_parse.py <file> --provider codex --repeat 5
+
+"before" replays the pre-parse-once pipeline (render, usage and provider
+filter each decoding the line, plus json.dumps(payload).lower() for the
+compaction check). "after" is `parse_stream_line` feeding the same consumers.
+Both run in-process with no subprocess and no console output.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+from minion_swarm.stream import parse_stream_line
+
+_MARKERS = (
+    "compaction",
+    "compacted",
+    "context window",
+    "summarized prior",
+    "summarised prior",
+    "auto-compact",
+)
+
+
+# ── before: copy of the old per-consumer decoding ─────────────────────────────
+
+def _legacy_marker(text: str) -> bool:
+    low = text.lower()
+    return any(marker in low for marker in _MARKERS)
+
+
+def _legacy_fragments(payload: Any) -> List[str]:
+    out: List[str] = []
+    keys = {"text", "content", "delta", "output_text"}
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in keys and isinstance(value, str):
+                    out.append(value)
+                else:
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(payload)
+    return out
+
+
+def _legacy_render(line: str) -> Tuple[str, bool]:
+    raw = line.rstrip("\n")
+    if not raw:
+        return "", False
+    compaction = _legacy_marker(raw)
+    try:
+        payload = json.loads(raw)
+    except json.JSONDecodeError:
+        return raw + "\n", compaction
+    rendered = "".join(_legacy_fragments(payload))
+    if not rendered:
+        event_type = payload.get("type") if isinstance(payload, dict) else None
+        if event_type in {"error", "warning"}:
+            rendered = f"[{event_type}] {payload.get('message', '')}\n"
+    if _legacy_marker(rendered):
+        compaction = True
+    if isinstance(payload, dict) and _legacy_marker(json.dumps(payload).lower()):
+        compaction = True
+    return rendered, compaction
+
+
+def _legacy_find_usage(obj: Any) -> Optional[dict]:
+    if not isinstance(obj, dict):
+        return None
+    if "input_tokens" in obj:
+        return obj
+    for v in obj.values():
+        if isinstance(v, dict):
+            found = _legacy_find_usage(v)
+            if found:
+                return found
+    return None
+
+
+def _legacy_usage(line: str) -> Tuple[int, int]:
+    raw = line.strip()
+    if not raw or "tokens" not in raw:
+        return 0, 0
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, ValueError):
+        return 0, 0
+    if not isinstance(data, dict):
+        return 0, 0
+    if data.get("type") == "result":
+        model_usage = data.get("modelUsage")
+        if isinstance(model_usage, dict):
+            for info in model_usage.values():
+                if isinstance(info, dict):
+                    inp = (info.get("inputTokens", 0) or 0) + \
+                          (info.get("cacheCreationInputTokens", 0) or 0) + \
+                          (info.get("cacheReadInputTokens", 0) or 0)
+                    return inp, info.get("outputTokens", 0) or 0
+    usage = _legacy_find_usage(data)
+    if not usage:
+        return 0, 0
+    inp = (usage.get("input_tokens", 0) or 0) + \
+          (usage.get("cache_creation_input_tokens", 0) or 0) + \
+          (usage.get("cache_read_input_tokens", 0) or 0)
+    return inp, usage.get("output_tokens", 0) or 0
+
+
+def _legacy_filter(line: str) -> str:
+    """Old codex/gemini filter_log_line: decode again for long lines."""
+    stripped = line.rstrip("\n")
+    if not stripped or len(stripped) <= 500:
+        return line
+    try:
+        data = json.loads(stripped)
+        if isinstance(data, dict):
+            err = data.get("error") or data.get("message") or ""
+            if err:
+                return f"ERROR — {str(err)[:120]}\n"
+    except (json.JSONDecodeError, TypeError, AttributeError):
+        pass
+    m = re.search(r'(capacity\s+exhausted|rate\s*limit|overloaded)', stripped, re.IGNORECASE)
+    if m:
+        return f"ERROR — {m.group(1)}\n"
+    try:
+        json.loads(stripped)
+    except (json.JSONDecodeError, TypeError):
+        pass
+    return f"Large output ({len(stripped)} chars)\n"
+
+
+def make_before(filter_lines: bool) -> Callable[[str], None]:
+    def before(line: str) -> None:
+        filtered = _legacy_filter(line) if filter_lines else line
+        _legacy_render(filtered)
+        _legacy_usage(line)
+    return before
+
+
+# ── after: parse once ─────────────────────────────────────────────────────────
+
+def make_after(provider: Any, error_log: Path) -> Callable[[str], None]:
+    def after(line: str) -> None:
+        event = parse_stream_line(line)
+        if provider is not None:
+            provider.filter_event(event, error_log)
+        event.render()
+    return after
+
+
+def _time(fn: Callable[[str], None], lines: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            fn(line)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("stream_log", type=Path, help="recorded <agent>.stream.jsonl")
+    parser.add_argument("--provider", default="claude", choices=["claude", "codex", "gemini"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = args.stream_log.read_text(encoding="utf-8", errors="replace").splitlines(keepends=True)
+    if not lines:
+        raise SystemExit(f"no lines in {args.stream_log}")
+
+    provider = None
+    if args.provider != "claude":
+        from types import SimpleNamespace
+
+        from minion_swarm.providers import get_provider
+        cfg = SimpleNamespace(permission_mode=None, model=None, allowed_tools=None)
+        provider = get_provider(args.provider, "bench", cfg, use_poll=True)
+        # Measure decoding, not error-log appends (the legacy copy skips them)
+        provider._append_error_log = lambda *_args: None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        error_log = Path(tmp) / "bench.error.log"
+        t_before = _time(make_before(provider is not None), lines, args.repeat)
+        t_after = _time(make_after(provider, error_log), lines, args.repeat)
+
+    total_bytes = sum(len(line) for line in lines)
+
+    print(f"lines:  {len(lines)} ({total_bytes / 1e6:.1f} MB), provider={args.provider}, best of {args.repeat}")
+    print(f"before: {t_before * 1e6 / len(lines):8.2f} us/line  {len(lines) / t_before:10.0f} lines/s")
+    print(f"after:  {t_after * 1e6 / len(lines):8.2f} us/line  {len(lines) / t_after:10.0f} lines/s")
+    print(f"speedup: {t_before / t_after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""Load-test harness behind `minion-swarm bench`.
+
+Builds a throwaway project with a legacy-schema comms DB (so the agents run
+in watcher mode and need no `minion` CLI), configures N agents on the `fake`
+provider, and launches them under one supervisor process. Messages carrying
+a `t=<send time>` stamp are sent round-robin; the fake CLI logs the pickup
+latency of each stamp and the line count of each run. CPU and peak RSS are
+read for the supervisor process alone from /proc, so the provider children
+do not count against the daemon; without /proc the wait4 rusage (children
+included) is reported instead.
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import yaml
+
+from .fakecli import ENV_PREFIX, STAMP_PREFIX
+from .watcher import CommsWatcher
+
+LEAD = "bench-lead"
+READY_TIMEOUT_SEC = 30.0
+STOP_TIMEOUT_SEC = 10.0
+PROGRESS_POLL_SEC = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    from_agent TEXT NOT NULL,
+    to_agent TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    read_flag INTEGER NOT NULL DEFAULT 0,
+    is_cc INTEGER NOT NULL DEFAULT 0,
+    cc_original_to TEXT
+);
+CREATE TABLE IF NOT EXISTS broadcast_reads (
+    agent_name TEXT NOT NULL,
+    message_id INTEGER NOT NULL,
+    PRIMARY KEY (agent_name, message_id)
+);
+CREATE TABLE IF NOT EXISTS agents (
+    name TEXT PRIMARY KEY,
+    registered_at TEXT,
+    last_seen TEXT,
+    last_inbox_check TEXT,
+    role TEXT,
+    description TEXT,
+    status TEXT
+);
+"""
+
+
+@dataclass
+class BenchOptions:
+    agents: int = 4
+    messages: int = 20              # per agent
+    interval_ms: float = 0.0        # gap between sends; 0 sends one burst
+    batch: int = 1                  # batch_max_messages per agent
+    lines: int = 200                # fake stdout lines per provider run
+    rate: float = 0.0               # fake lines per second, 0 = unthrottled
+    tool_result_bytes: int = 2048
+    compact_rate: float = 0.0
+    error_rate: float = 0.0
+    first_byte_ms: float = 0.0
+    timeout_sec: float = 300.0
+    keep: bool = False
+
+
+@dataclass
+class BenchReport:
+    options: BenchOptions
+    run_dir: Path
+    turns: int = 0
+    lines: int = 0
+    elapsed_sec: float = 0.0
+    cpu_sec: float = 0.0
+    peak_rss_kb: int = 0
+    cpu_includes_children: bool = False
+    pickups: List[float] = field(default_factory=list)
+    timed_out: bool = False
+
+    def format(self) -> List[str]:
+        opts = self.options
+        out = [
+            f"bench: {opts.agents} agent(s) x {opts.messages} message(s), batch {opts.batch}, "
+            f"fake provider {opts.lines} lines/run ({opts.tool_result_bytes} B tool results)",
+            f"turns          {self.turns} in {self.elapsed_sec:.2f}s "
+            f"({self.turns / self.elapsed_sec if self.elapsed_sec else 0.0:.1f} turns/s)",
+        ]
+        if self.pickups:
+            ordered = sorted(self.pickups)
+            pct = lambda p: ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000  # noqa: E731
+            total = opts.agents * opts.messages
+            seen = f"n={len(ordered)}" if len(ordered) >= total else f"n={len(ordered)} of {total} (stamps lost to prompt truncation)"
+            out.append(
+                f"pickup         {seen} p50 {pct(0.50):.1f} ms  p95 {pct(0.95):.1f} ms  "
+                f"p99 {pct(0.99):.1f} ms  max {ordered[-1] * 1000:.1f} ms  (send -> provider reads prompt)"
+            )
+        per_kline = self.cpu_sec * 1000 / (self.lines / 1000) if self.lines else 0.0
+        scope = "supervisor + provider children" if self.cpu_includes_children else "supervisor only"
+        out.append(f"daemon CPU     {self.cpu_sec:.2f}s for {self.lines} lines = {per_kline:.2f} ms per 1k lines ({scope})")
+        out.append(f"daemon memory  peak RSS {self.peak_rss_kb / 1024:.1f} MB")
+        if self.timed_out:
+            out.append(f"WARNING: timed out after {opts.timeout_sec:.0f}s before every message was processed")
+        if opts.keep:
+            out.append(f"run dir        {self.run_dir}")
+        return out
+
+
+def run_bench(options: BenchOptions, log: Callable[[str], None] = print) -> BenchReport:
+    run_dir = Path(tempfile.mkdtemp(prefix="minion-swarm-bench-"))
+    report = BenchReport(options, run_dir)
+    names = [f"bench-{i}" for i in range(options.agents)]
+    config_path, db_path, fake_log = _prepare(run_dir, names, options)
+
+    env = os.environ.copy()
+    env.update({
+        f"{ENV_PREFIX}LINES": str(options.lines),
+        f"{ENV_PREFIX}RATE": str(options.rate),
+        f"{ENV_PREFIX}FIRST_BYTE_MS": str(options.first_byte_ms),
+        f"{ENV_PREFIX}TOOL_RESULT_BYTES": str(options.tool_result_bytes),
+        f"{ENV_PREFIX}COMPACT_RATE": str(options.compact_rate),
+        f"{ENV_PREFIX}ERROR_RATE": str(options.error_rate),
+        f"{ENV_PREFIX}LOG": str(fake_log),
+    })
+    cmd = [sys.executable, "-m", "minion_swarm.cli", "_run-supervisor", "--config", str(config_path)]
+    for name in names:
+        cmd.extend(["--agent", name])
+
+    with (run_dir / "supervisor.log").open("a", encoding="utf-8") as out:
+        proc = subprocess.Popen(
+            cmd, cwd=str(run_dir / "project"), stdin=subprocess.DEVNULL,
+            stdout=out, stderr=subprocess.STDOUT, env=env, start_new_session=True,
+        )
+    try:
+        log(f"supervisor pid {proc.pid}, waiting for {len(names)} agent(s) to register")
+        _wait_registered(db_path, names, proc)
+        cpu_before = _proc_cpu(proc.pid)
+
+        total = options.agents * options.messages
+        log(f"sending {total} message(s)")
+        sender = CommsWatcher(LEAD, db_path)
+        started = time.monotonic()
+        for seq in range(options.messages):
+            for name in names:
+                sender.send_message(LEAD, name, f"bench task {seq} {STAMP_PREFIX}{time.time():.6f}")
+                if options.interval_ms > 0:
+                    time.sleep(options.interval_ms / 1000)
+        sender.close()
+
+        # Done once every message is read and every agent is back to idle
+        deadline = started + options.timeout_sec
+        while not _drained(db_path, names):
+            if time.monotonic() >= deadline or proc.poll() is not None:
+                report.timed_out = True
+                break
+            time.sleep(PROGRESS_POLL_SEC)
+        report.elapsed_sec = time.monotonic() - started
+        pickups, runs = _read_fake_log(fake_log)
+        report.pickups = pickups
+        report.turns = len(runs)
+        report.lines = sum(runs)
+
+        cpu_after = _proc_cpu(proc.pid)
+        if cpu_before is not None and cpu_after is not None:
+            report.cpu_sec = cpu_after - cpu_before
+            report.peak_rss_kb = _proc_peak_rss_kb(proc.pid)
+    finally:
+        rusage = _stop(proc)
+    if report.cpu_sec == 0.0 and rusage is not None:
+        report.cpu_sec = rusage.ru_utime + rusage.ru_stime
+        report.peak_rss_kb = rusage.ru_maxrss if sys.platform != "darwin" else rusage.ru_maxrss // 1024
+        report.cpu_includes_children = True
+    if not options.keep:
+        shutil.rmtree(run_dir, ignore_errors=True)
+    return report
+
+
+def _prepare(run_dir: Path, names: List[str], options: BenchOptions) -> Tuple[Path, Path, Path]:
+    project = run_dir / "project"
+    docs = run_dir / "docs"
+    db_path = run_dir / "comms" / "messages.db"  # path without "minion-comms": watcher mode
+    for path in (project, docs, db_path.parent):
+        path.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(_SCHEMA)
+    conn.close()
+
+    agents: Dict[str, Dict[str, object]] = {
+        name: {
+            "role": "coder",
+            "provider": "fake",
+            "system": f"You are {name}, a load-test agent.",
+            "batch_max_messages": options.batch,
+            "no_output_timeout_sec": max(60, int(options.timeout_sec)),
+            "retry_backoff_sec": 1,
+            "retry_backoff_max_sec": 5,
+        }
+        for name in names
+    }
+    config_path = run_dir / "bench.yaml"
+    config_path.write_text(yaml.safe_dump({
+        "project_dir": str(project),
+        "comms_db": str(db_path),
+        "docs_dir": str(docs),
+        "agents": agents,
+    }, sort_keys=False))
+    return config_path, db_path, run_dir / "fake.log"
+
+
+def _wait_registered(db_path: Path, names: List[str], proc: subprocess.Popen) -> None:
+    deadline = time.monotonic() + READY_TIMEOUT_SEC
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"supervisor exited with {proc.returncode} during start-up")
+        if _statuses(db_path, names).keys() >= set(names):
+            return
+        time.sleep(PROGRESS_POLL_SEC)
+    raise RuntimeError(f"agents did not register within {READY_TIMEOUT_SEC:.0f}s")
+
+
+def _drained(db_path: Path, names: List[str]) -> bool:
+    conn = sqlite3.connect(db_path, timeout=5.0)
+    try:
+        unread = conn.execute("SELECT COUNT(*) FROM messages WHERE from_agent = ? AND read_flag = 0", (LEAD,)).fetchone()[0]
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+    return unread == 0 and all(status == "idle" for status in _statuses(db_path, names).values())
+
+
+def _statuses(db_path: Path, names: List[str]) -> Dict[str, str]:
+    conn = sqlite3.connect(db_path, timeout=5.0)
+    try:
+        placeholders = ",".join("?" * len(names))
+        rows = conn.execute(f"SELECT name, status FROM agents WHERE name IN ({placeholders})", names).fetchall()
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+    return {name: status for name, status in rows}
+
+
+def _read_fake_log(path: Path) -> Tuple[List[float], List[int]]:
+    pickups: List[float] = []
+    runs: List[int] = []
+    try:
+        text = path.read_text(encoding="utf-8")
+    except OSError:
+        return pickups, runs
+    for line in text.splitlines():
+        kind, _, value = line.partition(" ")
+        try:
+            if kind == "pickup":
+                pickups.append(float(value))
+            elif kind == "run":
+                runs.append(int(value))
+        except ValueError:
+            continue  # partially written line
+    return pickups, runs
+
+
+def _proc_cpu(pid: int) -> Optional[float]:
+    """utime + stime of `pid` itself (not its children), in seconds."""
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    fields = stat.rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def _proc_peak_rss_kb(pid: int) -> int:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def _stop(proc: subprocess.Popen) -> Optional[object]:
+    """Stop the supervisor's process group; its rusage if we reap it here."""
+    if proc.returncode is not None:
+        return None  # already reaped by poll()
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    deadline = time.monotonic() + STOP_TIMEOUT_SEC
+    while time.monotonic() < deadline:
+        pid, status, rusage = os.wait4(proc.pid, os.WNOHANG)
+        if pid:
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            return rusage
+        time.sleep(PROGRESS_POLL_SEC)
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return rusage
+
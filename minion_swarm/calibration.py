@@ -0,0 +1,167 @@
+"""Measured boot overhead, persisted per provider/model/tools/CLI version.
+
+A boot invocation tells us how many context tokens the provider CLI injects
+before the agent's prompt (system prompt, tool schemas, project files) and
+the model's context window. `CalibrationStore` keeps those measurements in
+`.minion-swarm/state/calibration.json`, keyed by (provider, model,
+allowed_tools, CLI version), so later daemons with the same setup start HP
+accounting from real numbers instead of zero.
+
+Only fresh (non-resumed) invocations are measured: a resumed session's
+input tokens include its earlier context. Samples that are still implausible
+— above `OUTLIER_RATIO` times the stored overhead, or half the context
+window — are rejected instead of overwriting the entry.
+
+Each entry also records what the static per-tool table estimated for it.
+The median measured/estimated ratio across a provider's entries scales the
+static table for setups that have not been measured yet.
+"""
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import os
+import statistics
+import subprocess
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+CALIBRATION_FILE = "calibration.json"
+VERSION_PROBE_TIMEOUT_SEC = 10.0
+OUTLIER_RATIO = 2.0  # reject samples above this multiple of the stored overhead
+
+
+class CalibrationRejected(ValueError):
+    """A measured overhead too far off to be stored."""
+
+
+@dataclass(frozen=True)
+class CalibrationKey:
+    provider: str
+    model: Optional[str]
+    allowed_tools: Optional[str]
+    cli_version: str
+
+    def as_str(self) -> str:
+        return json.dumps([self.provider, self.model, self.allowed_tools, self.cli_version])
+
+
+@dataclass
+class Calibration:
+    provider: str
+    model: Optional[str]
+    allowed_tools: Optional[str]
+    cli_version: str
+    overhead_tokens: int
+    context_window: int
+    estimated_tokens: int
+    samples: int = 1
+    updated_at: str = ""
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> Optional["Calibration"]:
+        try:
+            return cls(
+                provider=str(data["provider"]),
+                model=data.get("model"),
+                allowed_tools=data.get("allowed_tools"),
+                cli_version=str(data.get("cli_version", "")),
+                overhead_tokens=int(data["overhead_tokens"]),
+                context_window=int(data.get("context_window", 0)),
+                estimated_tokens=int(data.get("estimated_tokens", 0)),
+                samples=int(data.get("samples", 1)),
+                updated_at=str(data.get("updated_at", "")),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+class CalibrationStore:
+    """JSON file of calibrations; writers serialize on a sidecar lock file."""
+
+    def __init__(self, state_dir: Path) -> None:
+        self.path = state_dir / CALIBRATION_FILE
+        self._lock_path = state_dir / f"{CALIBRATION_FILE}.lock"
+
+    def get(self, key: CalibrationKey) -> Optional[Calibration]:
+        data = self._read().get(key.as_str())
+        return Calibration.from_dict(data) if isinstance(data, dict) else None
+
+    def record(self, key: CalibrationKey, overhead_tokens: int, context_window: int, estimated_tokens: int) -> Calibration:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = self._read()
+            previous = entries.get(key.as_str())
+            stored = Calibration.from_dict(previous) if isinstance(previous, dict) else None
+            _check_sample(stored, overhead_tokens, context_window)
+            samples = int(previous.get("samples", 0)) + 1 if isinstance(previous, dict) else 1
+            calibration = Calibration(
+                provider=key.provider,
+                model=key.model,
+                allowed_tools=key.allowed_tools,
+                cli_version=key.cli_version,
+                overhead_tokens=overhead_tokens,
+                context_window=context_window,
+                estimated_tokens=estimated_tokens,
+                samples=samples,
+                updated_at=datetime.now(timezone.utc).isoformat(),
+            )
+            entries[key.as_str()] = asdict(calibration)
+            tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(entries, indent=2, sort_keys=True) + "\n")
+            os.replace(tmp, self.path)
+        return calibration
+
+    def static_scale(self, provider: str) -> Optional[float]:
+        """Median measured/estimated overhead ratio over a provider's entries."""
+        ratios = []
+        for data in self._read().values():
+            entry = Calibration.from_dict(data) if isinstance(data, dict) else None
+            if entry and entry.provider == provider and entry.estimated_tokens > 0 and entry.overhead_tokens > 0:
+                ratios.append(entry.overhead_tokens / entry.estimated_tokens)
+        return statistics.median(ratios) if ratios else None
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+
+def _check_sample(stored: Optional[Calibration], overhead_tokens: int, context_window: int) -> None:
+    if context_window > 0 and overhead_tokens * 2 >= context_window:
+        raise CalibrationRejected(
+            f"overhead {overhead_tokens // 1000}k is over half the {context_window // 1000}k context window"
+        )
+    # Lower samples are accepted: carried-over context only ever inflates one
+    if stored is not None and stored.overhead_tokens > 0 and overhead_tokens > stored.overhead_tokens * OUTLIER_RATIO:
+        raise CalibrationRejected(
+            f"overhead {overhead_tokens // 1000}k is over {OUTLIER_RATIO:g}x the stored {stored.overhead_tokens // 1000}k"
+        )
+
+
+async def probe_cli_version(exe: str, env: Dict[str, str]) -> str:
+    """First line of `<exe> --version`, or "" if the CLI can't tell us."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            exe, "--version",
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env=env,
+        )
+    except OSError:
+        return ""
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=VERSION_PROBE_TIMEOUT_SEC)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        return ""
+    lines = stdout.decode("utf-8", errors="replace").strip().splitlines()
+    return lines[0].strip() if proc.returncode == 0 and lines else ""
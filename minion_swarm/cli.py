@@ -6,16 +6,23 @@ import shutil
 import signal
 import subprocess
 import sys
-import time
-from collections import deque
 from pathlib import Path
-from typing import Iterable, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple, get_args
 
 import click
 import yaml
 
-from .config import SwarmConfig, load_config
+from .bench import BenchOptions, run_bench
+from .config import ProviderName, SwarmConfig, load_config
 from .daemon import AgentDaemon
+from .logtail import LogFollower, LogLine
+from .metrics import merge_expositions, scrape_sockets
+from .procctl import is_pid_alive, stop_process_groups, wait_for_exits
+from .replay import ReplayOptions, run_replay
+from .runtime import AgentRuntime, RuntimeStore
+from .streamlog import read_invocation
+from .supervisor import Supervisor
+from .tracing import TRACES_DIR, format_trace, read_traces
 from .watcher import CommsWatcher
 
 DATA_DIR = Path(__file__).resolve().parent / "data"
@@ -23,6 +30,7 @@ DATA_DIR = Path(__file__).resolve().parent / "data"
 DEFAULT_CONFIG_PATH = str(
     Path(os.environ.get("MINION_SWARM_CONFIG", "~/.minion-swarm/minion-swarm.yaml")).expanduser()
 )
+FAILED_RESULTS = {"failed", "stuck"}  # start/stop summary results that exit 1
 
 
 def _daemon_env() -> dict:
@@ -30,41 +38,146 @@ def _daemon_env() -> dict:
     return os.environ.copy()
 
 
-def _pid_path(cfg: SwarmConfig, agent_name: str) -> Path:
-    return cfg.pids_dir / f"{agent_name}.pid"
-
-
-def _state_path(cfg: SwarmConfig, agent_name: str) -> Path:
-    return cfg.state_dir / f"{agent_name}.json"
-
-
 def _log_path(cfg: SwarmConfig, agent_name: str) -> Path:
     return cfg.logs_dir / f"{agent_name}.log"
 
 
-def _read_pid(path: Path) -> Optional[int]:
-    if not path.exists():
-        return None
-    try:
-        return int(path.read_text().strip())
-    except ValueError:
-        return None
+def _normalize_targets(cfg: SwarmConfig, agents: Iterable[str]) -> List[str]:
+    names = list(dict.fromkeys(agents))
+    for name in names:
+        if name not in cfg.agents:
+            raise click.ClickException(f"Agent '{name}' not found in config")
+    return names or list(cfg.agents.keys())
 
 
-def _is_pid_alive(pid: int) -> bool:
+def _is_supervisor(pid: int) -> bool:
     try:
-        os.kill(pid, 0)
-        return True
+        return b"_run-supervisor" in Path(f"/proc/{pid}/cmdline").read_bytes()
     except OSError:
         return False
 
 
-def _normalize_targets(cfg: SwarmConfig, maybe_agent: Optional[str]) -> List[str]:
-    if maybe_agent:
-        if maybe_agent not in cfg.agents:
-            raise click.ClickException(f"Agent '{maybe_agent}' not found in config")
-        return [maybe_agent]
-    return list(cfg.agents.keys())
+def _spawn(cfg: SwarmConfig, args: List[str], log_file: Path) -> subprocess.Popen:
+    """Launch a detached `minion_swarm.cli` subcommand logging to `log_file`."""
+    log_file.parent.mkdir(parents=True, exist_ok=True)
+    log_fp = log_file.open("a", encoding="utf-8")
+    try:
+        return subprocess.Popen(
+            [sys.executable, "-m", "minion_swarm.cli", *args, "--config", str(cfg.config_path)],
+            cwd=str(cfg.project_dir),
+            stdin=subprocess.DEVNULL,
+            stdout=log_fp,
+            stderr=subprocess.STDOUT,
+            text=True,
+            start_new_session=True,
+            env=_daemon_env(),
+        )
+    finally:
+        log_fp.close()
+
+
+# (agent, pid, result, detail) — one row of the start/stop/restart summary
+ControlRow = Tuple[str, Optional[int], str, str]
+
+
+def _echo_summary(cfg: SwarmConfig, rows: List[ControlRow]) -> None:
+    order = {name: i for i, name in enumerate(cfg.agents)}
+    click.echo("agent\tpid\tresult\tdetail")
+    for name, pid, result, detail in sorted(rows, key=lambda row: order.get(row[0], len(order))):
+        click.echo(f"{name}\t{pid or '-'}\t{result}\t{detail or '-'}")
+    if any(row[2] in FAILED_RESULTS for row in rows):
+        raise SystemExit(1)
+
+
+def _start_targets(
+    cfg: SwarmConfig,
+    store: RuntimeStore,
+    names: List[str],
+    wait_sec: float,
+    hosted: Iterable[List[str]] = (),
+) -> List[ControlRow]:
+    """Spawn every target at once, then watch them together for an early exit.
+
+    Groups in `hosted` go back into one supervisor each; every other name
+    gets its own daemon.
+    """
+    rows: List[ControlRow] = []
+    launches: List[Tuple[List[str], subprocess.Popen]] = []
+    grouped = {name for group in hosted for name in group}
+    for group in hosted:
+        proc = _spawn(cfg, ["_run-supervisor", *(arg for name in group for arg in ("--agent", name))],
+                      cfg.logs_dir / "supervisor.log")
+        launches.append((group, proc))
+    for name in names:
+        if name in grouped:
+            continue
+        existing_pid = store.get_pid(name)
+        if existing_pid and is_pid_alive(existing_pid):
+            rows.append((name, existing_pid, "running", "already running"))
+            continue
+        launches.append(([name], _spawn(cfg, ["_run-agent", "--agent", name], _log_path(cfg, name))))
+
+    for group, proc in launches:
+        for name in group:
+            store.set_pid(name, proc.pid)
+
+    exits = wait_for_exits([proc.pid for _, proc in launches], wait_sec)
+    for group, proc in launches:
+        how = "in supervisor" if group[0] in grouped else ""
+        if proc.pid in exits:
+            code = proc.wait()
+            for name in group:
+                store.clear_pid(name, only_if=proc.pid)
+                rows.append((name, proc.pid, "failed", f"exited {code} within {wait_sec:g}s, see logs"))
+        else:
+            rows.extend((name, proc.pid, "started", how) for name in group)
+    return rows
+
+
+def _stop_targets(
+    cfg: SwarmConfig,
+    store: RuntimeStore,
+    names: List[str],
+    grace_sec: float,
+    kill_sec: float,
+) -> Tuple[List[ControlRow], List[List[str]]]:
+    """Stop every target's process group at once.
+
+    Agents hosted by the same supervisor go down together, so they are all
+    reported. Returns the rows and the agent groups that ran in a supervisor.
+    """
+    rows: List[ControlRow] = []
+    groups: Dict[int, List[str]] = {}
+    for name in names:
+        pid = store.get_pid(name)
+        if not pid:
+            rows.append((name, None, "not running", "no pid recorded"))
+        elif not is_pid_alive(pid):
+            store.clear_pid(name, only_if=pid)
+            rows.append((name, pid, "stale", "pid not alive, cleared"))
+        else:
+            groups.setdefault(pid, []).append(name)
+    for name, state in store.all().items():
+        if state.pid in groups and name in cfg.agents and name not in groups[state.pid]:
+            groups[state.pid].append(name)
+    hosted = [group for pid, group in groups.items() if len(group) > 1 or _is_supervisor(pid)]
+
+    if groups:
+        click.echo(
+            f"stopping {len(groups)} process group(s): SIGTERM, SIGKILL after {grace_sec:g}s"
+        )
+    results = stop_process_groups(groups, grace_sec, kill_sec)
+    for pid, group in groups.items():
+        result = results[pid]
+        if result.outcome == "stuck":
+            detail = f"alive {result.seconds:.1f}s after SIGKILL"
+        else:
+            detail = result.detail or f"{result.seconds:.1f}s"
+        for name in group:
+            if result.outcome not in FAILED_RESULTS:
+                store.clear_pid(name, only_if=pid)
+            rows.append((name, pid, result.outcome, detail))
+    return rows, hosted
 
 
 @click.group()
@@ -153,93 +266,108 @@ def init_cmd(config_path: str, project_dir: Optional[str], overwrite_config: boo
 
 
 @cli.command(name="start")
-@click.argument("agent", required=False)
+@click.argument("agents", nargs=-1)
 @click.option("--config", "config_path", default=DEFAULT_CONFIG_PATH, show_default=True)
-def start_cmd(agent: Optional[str], config_path: str) -> None:
-    """Start one agent (or all agents)."""
+@click.option("--wait", "wait_sec", default=1.0, show_default=True, type=float,
+              help="Seconds to watch new daemons for an early exit.")
+def start_cmd(agents: Iterable[str], config_path: str, wait_sec: float) -> None:
+    """Start agents (default: all), each in its own daemon process."""
     cfg = load_config(config_path)
     cfg.ensure_runtime_dirs()
+    store = RuntimeStore(cfg.runtime_db)
+    _echo_summary(cfg, _start_targets(cfg, store, _normalize_targets(cfg, agents), wait_sec))
+
 
-    for name in _normalize_targets(cfg, agent):
-        pid_file = _pid_path(cfg, name)
-        existing_pid = _read_pid(pid_file)
-        if existing_pid and _is_pid_alive(existing_pid):
+@cli.command(name="up")
+@click.argument("agents", nargs=-1)
+@click.option("--config", "config_path", default=DEFAULT_CONFIG_PATH, show_default=True)
+@click.option("--foreground", is_flag=True, default=False, help="Run the supervisor in this terminal.")
+def up_cmd(agents: Iterable[str], config_path: str, foreground: bool) -> None:
+    """Start agents (default: all) in one supervisor process."""
+    cfg = load_config(config_path)
+    cfg.ensure_runtime_dirs()
+    store = RuntimeStore(cfg.runtime_db)
+
+    names: List[str] = []
+    for name in _normalize_targets(cfg, agents):
+        existing_pid = store.get_pid(name)
+        if existing_pid and is_pid_alive(existing_pid):
             click.echo(f"{name}: already running (pid {existing_pid})")
             continue
+        names.append(name)
 
-        log_file = _log_path(cfg, name)
-        log_file.parent.mkdir(parents=True, exist_ok=True)
-        log_fp = log_file.open("a", encoding="utf-8")
-
-        cmd = [
-            sys.executable,
-            "-m",
-            "minion_swarm.cli",
-            "_run-agent",
-            "--config",
-            str(cfg.config_path),
-            "--agent",
-            name,
-        ]
-
-        proc = subprocess.Popen(
-            cmd,
-            cwd=str(cfg.project_dir),
-            stdin=subprocess.DEVNULL,
-            stdout=log_fp,
-            stderr=subprocess.STDOUT,
-            text=True,
-            start_new_session=True,
-            env=_daemon_env(),
-        )
-        log_fp.close()
+    if not names:
+        return
 
-        pid_file.write_text(str(proc.pid))
-        click.echo(f"{name}: started (pid {proc.pid})")
+    if foreground:
+        Supervisor(cfg, names).run()
+        return
+
+    args = ["_run-supervisor"]
+    for name in names:
+        args.extend(["--agent", name])
+    proc = _spawn(cfg, args, cfg.logs_dir / "supervisor.log")
+
+    # Record the pid up front so an immediate `status`/`stop` sees the agents;
+    # the supervisor rewrites it with the same pid once it is running.
+    for name in names:
+        store.set_pid(name, proc.pid)
+        click.echo(f"{name}: started in supervisor (pid {proc.pid})")
 
 
 @cli.command(name="stop")
-@click.argument("agent", required=False)
+@click.argument("agents", nargs=-1)
 @click.option("--config", "config_path", default=DEFAULT_CONFIG_PATH, show_default=True)
-def stop_cmd(agent: Optional[str], config_path: str) -> None:
-    """Stop one agent (or all agents)."""
+@click.option("--grace", "grace_sec", default=None, type=float, help="SIGTERM grace before SIGKILL [config: stop_grace_sec].")
+@click.option("--kill-timeout", "kill_sec", default=None, type=float, help="Wait after SIGKILL [config: stop_kill_sec].")
+def stop_cmd(agents: Iterable[str], config_path: str, grace_sec: Optional[float], kill_sec: Optional[float]) -> None:
+    """Stop agents (default: all), all process groups at once."""
     cfg = load_config(config_path)
     cfg.ensure_runtime_dirs()
+    store = RuntimeStore(cfg.runtime_db)
+    rows, _ = _stop_targets(
+        cfg, store, _normalize_targets(cfg, agents),
+        cfg.stop_grace_sec if grace_sec is None else grace_sec,
+        cfg.stop_kill_sec if kill_sec is None else kill_sec,
+    )
+    _echo_summary(cfg, rows)
 
-    targets = _normalize_targets(cfg, agent)
-    for name in targets:
-        pid_file = _pid_path(cfg, name)
-        pid = _read_pid(pid_file)
-        if not pid:
-            click.echo(f"{name}: not running (no pid file)")
-            continue
 
-        if not _is_pid_alive(pid):
-            click.echo(f"{name}: stale pid file (pid {pid} not alive), removing")
-            pid_file.unlink(missing_ok=True)
-            continue
-
-        # Kill entire process group (daemon + child claude -p processes).
-        # Daemon is started with start_new_session=True, so pgid == pid.
-        click.echo(f"{name}: sending SIGTERM to process group {pid}")
-        try:
-            os.killpg(pid, signal.SIGTERM)
-        except ProcessLookupError:
-            pass
-
-        deadline = time.time() + 5
-        while time.time() < deadline and _is_pid_alive(pid):
-            time.sleep(0.2)
-
-        if _is_pid_alive(pid):
-            click.echo(f"{name}: force killing process group {pid}")
-            try:
-                os.killpg(pid, signal.SIGKILL)
-            except ProcessLookupError:
-                pass
-
-        pid_file.unlink(missing_ok=True)
-        click.echo(f"{name}: stopped")
+@cli.command(name="restart")
+@click.argument("agents", nargs=-1)
+@click.option("--config", "config_path", default=DEFAULT_CONFIG_PATH, show_default=True)
+@click.option("--grace", "grace_sec", default=None, type=float, help="SIGTERM grace before SIGKILL [config: stop_grace_sec].")
+@click.option("--kill-timeout", "kill_sec", default=None, type=float, help="Wait after SIGKILL [config: stop_kill_sec].")
+@click.option("--wait", "wait_sec", default=1.0, show_default=True, type=float,
+              help="Seconds to watch new daemons for an early exit.")
+def restart_cmd(
+    agents: Iterable[str], config_path: str, grace_sec: Optional[float], kill_sec: Optional[float], wait_sec: float,
+) -> None:
+    """Stop then start agents (default: all).
+
+    Agents that shared a supervisor are started again in one supervisor.
+    """
+    cfg = load_config(config_path)
+    cfg.ensure_runtime_dirs()
+    store = RuntimeStore(cfg.runtime_db)
+    names = _normalize_targets(cfg, agents)
+    stopped, hosted = _stop_targets(
+        cfg, store, names,
+        cfg.stop_grace_sec if grace_sec is None else grace_sec,
+        cfg.stop_kill_sec if kill_sec is None else kill_sec,
+    )
+    stuck = {row[0] for row in stopped if row[2] in FAILED_RESULTS}
+    if stuck:
+        click.echo(f"not restarting {', '.join(sorted(stuck))}: process group could not be stopped")
+    hosted = [group for group in hosted if not stuck.intersection(group)]
+    restart = [name for name in dict.fromkeys([*names, *(n for g in hosted for n in g)]) if name not in stuck]
+    before = {name: f"{result} {detail}" for name, _, result, detail in stopped if result in ("stopped", "killed")}
+    rows = [
+        (name, pid, result, "; ".join(part for part in (before.get(name, ""), detail) if part))
+        for name, pid, result, detail in _start_targets(cfg, store, restart, wait_sec, hosted)
+    ]
+    rows.extend(row for row in stopped if row[0] in stuck)
+    _echo_summary(cfg, rows)
 
 
 @cli.command(name="status")
@@ -249,55 +377,178 @@ def status_cmd(config_path: str) -> None:
     cfg = load_config(config_path)
     cfg.ensure_runtime_dirs()
 
+    states = RuntimeStore(cfg.runtime_db).all()
+    # Supervisor-hosted agents share a pid — probe each process once
+    alive_by_pid: Dict[int, bool] = {}
+
     click.echo("agent\tpid\talive\tstatus\tupdated_at")
     for name in cfg.agents:
-        pid = _read_pid(_pid_path(cfg, name))
-        alive = bool(pid and _is_pid_alive(pid))
-
-        status = "unknown"
-        updated_at = "-"
-        state_file = _state_path(cfg, name)
-        if state_file.exists():
-            try:
-                state = json.loads(state_file.read_text())
-                status = state.get("status", status)
-                updated_at = state.get("updated_at", updated_at)
-            except json.JSONDecodeError:
-                status = "invalid-state"
-
-        click.echo(f"{name}\t{pid or '-'}\t{alive}\t{status}\t{updated_at}")
+        state = states.get(name) or AgentRuntime(name)
+        pid = state.pid
+        if pid and pid not in alive_by_pid:
+            alive_by_pid[pid] = is_pid_alive(pid)
+        alive = bool(pid and alive_by_pid[pid])
+        click.echo(f"{name}\t{pid or '-'}\t{alive}\t{state.status}\t{state.updated_at or '-'}")
 
 
 @cli.command(name="logs")
-@click.argument("agent")
+@click.argument("agents", nargs=-1)
+@click.option("--all", "all_agents", is_flag=True, default=False, help="Every agent in the config.")
 @click.option("--config", "config_path", default=DEFAULT_CONFIG_PATH, show_default=True)
 @click.option("--lines", default=80, show_default=True, type=int)
 @click.option("--follow/--no-follow", default=True, show_default=True)
-def logs_cmd(agent: str, config_path: str, lines: int, follow: bool) -> None:
-    """Show (and optionally follow) one agent log."""
+def logs_cmd(agents: Iterable[str], all_agents: bool, config_path: str, lines: int, follow: bool) -> None:
+    """Show (and optionally follow) agent logs, merged by timestamp."""
+    cfg = load_config(config_path)
+    names = list(cfg.agents) if all_agents else list(dict.fromkeys(agents))
+    if not names:
+        raise click.ClickException("Name one or more agents, or pass --all")
+    for name in names:
+        if name not in cfg.agents:
+            raise click.ClickException(f"Unknown agent '{name}'")
+
+    log_files = {name: _log_path(cfg, name) for name in names}
+    if not any(path.exists() for path in log_files.values()) and not (follow and all_agents):
+        missing = ", ".join(str(path) for path in log_files.values())
+        raise click.ClickException(f"Log file not found: {missing}")
+
+    # One agent prints its log verbatim; several get an aligned name prefix
+    width = max(len(name) for name in names)
+    prefix = (lambda name: "") if len(names) == 1 else (lambda name: f"{name:<{width}} | ")
+
+    def emit(batch: List[LogLine]) -> None:
+        click.echo("".join(f"{prefix(name)}{line}" for name, line in batch), nl=False)
+
+    follower = LogFollower(log_files)
+    try:
+        emit(follower.tail(lines))
+        if follow:
+            follower.follow(emit)
+    finally:
+        follower.close()
+
+
+@cli.command(name="stream")
+@click.argument("agent")
+@click.argument("invocation", type=int)
+@click.option("--config", "config_path", default=DEFAULT_CONFIG_PATH, show_default=True)
+@click.option("--run", "run_id", default=None, help="Daemon run id from the index (default: latest).")
+def stream_cmd(agent: str, invocation: int, config_path: str, run_id: Optional[str]) -> None:
+    """Print the raw stream-json of one invocation (the v= in model-stream banners)."""
     cfg = load_config(config_path)
     if agent not in cfg.agents:
         raise click.ClickException(f"Unknown agent '{agent}'")
 
-    log_file = _log_path(cfg, agent)
-    if not log_file.exists():
-        raise click.ClickException(f"Log file not found: {log_file}")
+    found = False
+    for line in read_invocation(cfg.logs_dir, agent, invocation, run=run_id):
+        found = True
+        click.echo(line, nl=False)
+    if not found:
+        raise click.ClickException(f"Invocation v={invocation} not found in stream logs for {agent}")
 
-    with log_file.open("r", encoding="utf-8") as fp:
-        if lines > 0:
-            tail = deque(fp, maxlen=lines)
-            for line in tail:
-                click.echo(line, nl=False)
 
-        if not follow:
-            return
+@cli.command(name="trace")
+@click.argument("agent")
+@click.option("--config", "config_path", default=DEFAULT_CONFIG_PATH, show_default=True)
+@click.option("--turns", default=5, show_default=True, type=int, help="How many recent traces to show.")
+def trace_cmd(agent: str, config_path: str, turns: int) -> None:
+    """Show where recent turns spent their time (spans from the trace log)."""
+    cfg = load_config(config_path)
+    if agent not in cfg.agents:
+        raise click.ClickException(f"Unknown agent '{agent}'")
 
-        while True:
-            line = fp.readline()
-            if line:
-                click.echo(line, nl=False)
-            else:
-                time.sleep(0.5)
+    path = cfg.runtime_dir / TRACES_DIR / f"{agent}.jsonl"
+    traces = read_traces(path, max(1, turns))
+    if not traces:
+        raise click.ClickException(f"No traces recorded in {path}")
+    for i, request in enumerate(traces):
+        if i:
+            click.echo()
+        for line in format_trace(request):
+            click.echo(line)
+
+
+@cli.command(name="metrics")
+@click.option("--config", "config_path", default=DEFAULT_CONFIG_PATH, show_default=True)
+def metrics_cmd(config_path: str) -> None:
+    """Print merged Prometheus metrics from every running daemon/supervisor."""
+    cfg = load_config(config_path)
+    texts = [text for _, text in scrape_sockets(cfg.runtime_dir)]
+    if not texts:
+        raise click.ClickException(f"No running daemon is serving metrics under {cfg.runtime_dir}")
+    click.echo(merge_expositions(texts), nl=False)
+
+
+@cli.command(name="bench")
+@click.option("--agents", default=4, show_default=True, type=int)
+@click.option("--messages", default=20, show_default=True, type=int, help="Messages per agent.")
+@click.option("--interval-ms", default=0.0, show_default=True, type=float, help="Gap between sends (0 = one burst).")
+@click.option("--batch", default=1, show_default=True, type=int, help="batch_max_messages per agent.")
+@click.option("--lines", default=200, show_default=True, type=int, help="Fake provider stdout lines per run.")
+@click.option("--rate", default=0.0, show_default=True, type=float, help="Fake lines per second (0 = unthrottled).")
+@click.option("--tool-result-bytes", default=2048, show_default=True, type=int)
+@click.option("--compact-rate", default=0.0, show_default=True, type=float, help="Per-line compaction marker probability.")
+@click.option("--error-rate", default=0.0, show_default=True, type=float, help="Per-line large error probability.")
+@click.option("--first-byte-ms", default=0.0, show_default=True, type=float)
+@click.option("--timeout", "timeout_sec", default=300.0, show_default=True, type=float)
+@click.option("--keep", is_flag=True, default=False, help="Keep the temporary project, logs and comms DB.")
+def bench_cmd(**kwargs: object) -> None:
+    """Load-test N daemons on the fake provider against a temporary comms DB."""
+    options = BenchOptions(**kwargs)  # type: ignore[arg-type]
+    if options.agents < 1 or options.messages < 1 or options.batch < 1:
+        raise click.ClickException("--agents, --messages and --batch must be >= 1")
+    try:
+        report = run_bench(options, log=lambda line: click.echo(line, err=True))
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    for line in report.format():
+        click.echo(line)
+
+
+@cli.command(name="replay")
+@click.argument("agent")
+@click.option("--config", "config_path", default=DEFAULT_CONFIG_PATH, show_default=True)
+@click.option("--file", "file_path", default=None, type=click.Path(exists=True, dir_okay=False, path_type=Path),
+              help="Replay one stream segment instead of every segment of the agent.")
+@click.option("--provider", default=None, type=click.Choice(get_args(ProviderName)), help="Override the agent's provider filter.")
+@click.option("--repeat", default=3, show_default=True, type=int, help="Timed passes; the best is reported.")
+@click.option("--profile", "profile_path", default=None, type=click.Path(dir_okay=False, path_type=Path),
+              help="cProfile dump path (default: .minion-swarm/state/replay-<agent>.prof).")
+@click.option("--no-profile", is_flag=True, default=False, help="Skip the cProfile pass.")
+@click.option("--no-tracemalloc", is_flag=True, default=False, help="Skip the tracemalloc pass.")
+@click.option("--top", default=15, show_default=True, type=int, help="Rows of allocation sites and profile stats.")
+def replay_cmd(
+    agent: str,
+    config_path: str,
+    file_path: Optional[Path],
+    provider: Optional[str],
+    repeat: int,
+    profile_path: Optional[Path],
+    no_profile: bool,
+    no_tracemalloc: bool,
+    top: int,
+) -> None:
+    """Replay recorded stream logs through the parse/render path, in-process."""
+    cfg = load_config(config_path)
+    if agent not in cfg.agents:
+        raise click.ClickException(f"Unknown agent '{agent}'")
+
+    if profile_path is None and not no_profile:
+        profile_path = cfg.state_dir / f"replay-{agent}.prof"
+    options = ReplayOptions(
+        repeat=max(1, repeat),
+        provider=provider,
+        file=file_path,
+        profile_path=None if no_profile else profile_path,
+        trace_memory=not no_tracemalloc,
+        top=max(1, top),
+    )
+    try:
+        report = run_replay(cfg, agent, options)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    for line in report.format():
+        click.echo(line)
 
 
 @cli.command(name="send")
@@ -329,6 +580,15 @@ def run_agent_cmd(config_path: str, agent_name: str) -> None:
     daemon.run()
 
 
+@cli.command(name="_run-supervisor", hidden=True)
+@click.option("--config", "config_path", required=True)
+@click.option("--agent", "agent_names", multiple=True, required=True)
+def run_supervisor_cmd(config_path: str, agent_names: Iterable[str]) -> None:
+    """Internal command used by `up` to host several agents in one process."""
+    cfg = load_config(config_path)
+    Supervisor(cfg, list(agent_names)).run()
+
+
 def main() -> None:
     cli()
 
@@ -369,11 +629,11 @@ def run_minion_main() -> None:
 
     # Start, show status, follow logs
     ctx = click.Context(start_cmd)
-    ctx.invoke(start_cmd, agent=agent_name, config_path=config_path)
+    ctx.invoke(start_cmd, agents=(agent_name,), config_path=config_path, wait_sec=1.0)
     ctx = click.Context(status_cmd)
     ctx.invoke(status_cmd, config_path=config_path)
     ctx = click.Context(logs_cmd)
-    ctx.invoke(logs_cmd, agent=agent_name, config_path=config_path, lines=0, follow=True)
+    ctx.invoke(logs_cmd, agents=(agent_name,), all_agents=False, config_path=config_path, lines=0, follow=True)
 
 
 if __name__ == "__main__":
@@ -13,7 +13,11 @@ from minion_comms.defaults import (
     resolve_db_path,
 )
 
-ProviderName = Literal["claude", "codex", "opencode", "gemini"]
+ProviderName = Literal["claude", "codex", "opencode", "gemini", "fake"]
+PromptLayout = Literal["stable_first", "legacy"]
+PromptTransportMode = Literal["auto", "argv"]
+SpawnMode = Literal["cold", "warm"]
+BootMode = Literal["eager", "lazy"]
 
 
 @dataclass(frozen=True)
@@ -31,6 +35,13 @@ class AgentConfig:
     no_output_timeout_sec: int
     retry_backoff_sec: int
     retry_backoff_max_sec: int
+    prompt_layout: PromptLayout = "stable_first"
+    prompt_transport: PromptTransportMode = "auto"
+    batch_max_messages: int = 1
+    batch_max_chars: int = 20_000
+    batch_linger_ms: int = 0
+    spawn_mode: SpawnMode = "cold"
+    boot: BootMode = "eager"
 
 
 @dataclass(frozen=True)
@@ -41,6 +52,14 @@ class SwarmConfig:
     comms_db: Path
     docs_dir: Path
     agents: Dict[str, AgentConfig]
+    stream_log_segment_bytes: int = 64 * 1024 * 1024
+    stream_log_compression: str = "gzip"
+    stream_log_keep_segments: int = 20
+    poll_engine: str = "inprocess"
+    poll_heartbeat_sec: float = 120.0
+    metrics_port: Optional[int] = None
+    stop_grace_sec: float = 5.0
+    stop_kill_sec: float = 2.0
 
     @property
     def runtime_dir(self) -> Path:
@@ -50,17 +69,16 @@ class SwarmConfig:
     def logs_dir(self) -> Path:
         return self.runtime_dir / "logs"
 
-    @property
-    def pids_dir(self) -> Path:
-        return self.runtime_dir / "pids"
-
     @property
     def state_dir(self) -> Path:
         return self.runtime_dir / "state"
 
+    @property
+    def runtime_db(self) -> Path:
+        return self.runtime_dir / "runtime.db"
+
     def ensure_runtime_dirs(self) -> None:
         self.logs_dir.mkdir(parents=True, exist_ok=True)
-        self.pids_dir.mkdir(parents=True, exist_ok=True)
         self.state_dir.mkdir(parents=True, exist_ok=True)
 
 
@@ -106,10 +124,10 @@ def load_config(config_path: str | Path) -> SwarmConfig:
             raise ValueError(f"Agent '{name}' config must be a mapping")
 
         provider = str(item.get("provider", "claude")).strip().lower()
-        if provider not in {"claude", "codex", "opencode", "gemini"}:
+        if provider not in {"claude", "codex", "opencode", "gemini", "fake"}:
             raise ValueError(
                 f"Agent '{name}' has invalid provider '{provider}'. "
-                "Expected one of: claude, codex, opencode, gemini."
+                "Expected one of: claude, codex, opencode, gemini, fake."
             )
 
         role = str(item.get("role", "coder"))
@@ -141,6 +159,43 @@ def load_config(config_path: str | Path) -> SwarmConfig:
         retry_backoff_sec = int(item.get("retry_backoff_sec", 30))
         retry_backoff_max_sec = int(item.get("retry_backoff_max_sec", 300))
 
+        prompt_layout = str(item.get("prompt_layout", "stable_first")).strip().lower()
+        if prompt_layout not in {"stable_first", "legacy"}:
+            raise ValueError(
+                f"Agent '{name}' has invalid prompt_layout '{prompt_layout}'. "
+                "Expected one of: stable_first, legacy."
+            )
+
+        batch_max_messages = int(item.get("batch_max_messages", 1))
+        batch_max_chars = int(item.get("batch_max_chars", 20_000))
+        batch_linger_ms = int(item.get("batch_linger_ms", 0))
+        if batch_max_messages < 1 or batch_max_chars < 1 or batch_linger_ms < 0:
+            raise ValueError(
+                f"Agent '{name}' batch settings must be positive "
+                "(batch_max_messages >= 1, batch_max_chars >= 1, batch_linger_ms >= 0)."
+            )
+
+        prompt_transport = str(item.get("prompt_transport", "auto")).strip().lower()
+        if prompt_transport not in {"auto", "argv"}:
+            raise ValueError(
+                f"Agent '{name}' has invalid prompt_transport '{prompt_transport}'. "
+                "Expected one of: auto, argv."
+            )
+
+        spawn_mode = str(item.get("spawn_mode", "cold")).strip().lower()
+        if spawn_mode not in {"cold", "warm"}:
+            raise ValueError(
+                f"Agent '{name}' has invalid spawn_mode '{spawn_mode}'. "
+                "Expected one of: cold, warm."
+            )
+
+        boot = str(item.get("boot", "eager")).strip().lower()
+        if boot not in {"eager", "lazy"}:
+            raise ValueError(
+                f"Agent '{name}' has invalid boot '{boot}'. "
+                "Expected one of: eager, lazy."
+            )
+
         agents[str(name)] = AgentConfig(
             name=str(name),
             role=role,
@@ -155,6 +210,40 @@ def load_config(config_path: str | Path) -> SwarmConfig:
             no_output_timeout_sec=no_output_timeout_sec,
             retry_backoff_sec=retry_backoff_sec,
             retry_backoff_max_sec=retry_backoff_max_sec,
+            prompt_layout=prompt_layout,  # type: ignore[arg-type]
+            prompt_transport=prompt_transport,  # type: ignore[arg-type]
+            batch_max_messages=batch_max_messages,
+            batch_max_chars=batch_max_chars,
+            batch_linger_ms=batch_linger_ms,
+            spawn_mode=spawn_mode,  # type: ignore[arg-type]
+            boot=boot,  # type: ignore[arg-type]
+        )
+
+    stream_log_compression = str(raw.get("stream_log_compression", "gzip")).strip().lower()
+    if stream_log_compression not in {"gzip", "zstd", "none"}:
+        raise ValueError(
+            f"Invalid stream_log_compression '{stream_log_compression}'. "
+            "Expected one of: gzip, zstd, none."
+        )
+
+    poll_engine = str(raw.get("poll_engine", "inprocess")).strip().lower()
+    if poll_engine not in {"inprocess", "subprocess"}:
+        raise ValueError(
+            f"Invalid poll_engine '{poll_engine}'. Expected one of: inprocess, subprocess."
+        )
+
+    metrics_port = raw.get("metrics_port")
+    if metrics_port is not None:
+        metrics_port = int(metrics_port)
+        if not 0 < metrics_port < 65536:
+            raise ValueError(f"Invalid metrics_port '{metrics_port}'. Expected 1-65535 or null.")
+
+    stop_grace_sec = float(raw.get("stop_grace_sec", 5.0))
+    stop_kill_sec = float(raw.get("stop_kill_sec", 2.0))
+    if stop_grace_sec < 0 or stop_kill_sec < 0:
+        raise ValueError(
+            f"Invalid stop deadlines (stop_grace_sec={stop_grace_sec}, stop_kill_sec={stop_kill_sec}). "
+            "Expected numbers >= 0."
         )
 
     return SwarmConfig(
@@ -164,4 +253,12 @@ def load_config(config_path: str | Path) -> SwarmConfig:
         comms_db=comms_db,
         docs_dir=docs_dir,
         agents=agents,
+        stream_log_segment_bytes=int(raw.get("stream_log_segment_mb", 64)) * 1024 * 1024,
+        stream_log_compression=stream_log_compression,
+        stream_log_keep_segments=int(raw.get("stream_log_keep_segments", 20)),
+        poll_engine=poll_engine,
+        poll_heartbeat_sec=float(raw.get("poll_heartbeat_sec", 120)),
+        metrics_port=metrics_port,
+        stop_grace_sec=stop_grace_sec,
+        stop_kill_sec=stop_kill_sec,
     )
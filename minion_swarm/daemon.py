@@ -1,23 +1,41 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-import queue
+import re
 import signal
+import sqlite3
 import subprocess
-import threading
+import sys
+import tempfile
 import time
-from collections import deque
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, TextIO, Tuple
 
 from minion_comms.defaults import ENV_CLASS, ENV_DB_PATH, ENV_DOCS_DIR
 
+from .calibration import CalibrationKey, CalibrationRejected, CalibrationStore, probe_cli_version
 from .config import SwarmConfig
+from .history import RollingBuffer
+from .hpwriter import HpHelper, HpUpdate, HpWriter
+from .metrics import MetricsRegistry, MetricsServer
+from .poller import InboxPoller
 from .providers import get_provider
+from .runtime import RuntimeStore
+from .prespawn import SpawnEnv, SpawnStats, WarmSpare
+from .stream import StreamEvent, parse_stream_line
+from .streamlog import StreamLogWriter
+from .tracing import TurnTracer
 
 MAX_CONSOLE_STREAM_CHARS = 12_000
+# Child stdout is read in large chunks and split into lines here, so a
+# multi-megabyte tool_result line costs a handful of reads, not one per line.
+STREAM_READ_CHUNK = 256 * 1024
+
+# ON STARTUP block through its numbered steps and optional "Then ..." line
+_ON_STARTUP_RE = re.compile(r"ON STARTUP[^\n]*\n(?:[ \t]+\d+\..*\n)*(?:[ \t]+Then .*\n?)?")
 
 # Claude Code system prompt + tool definitions token costs (approximate).
 # Each tool's JSON schema + description consumes context tokens.
@@ -65,38 +83,78 @@ class AgentRunResult:
     command_name: str
     input_tokens: int = 0
     output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    resumed: bool = False  # continued an earlier session; input_tokens include its context
+
 
+@dataclass
+class PromptCacheStats:
+    hits: int = 0
+    misses: int = 0
 
-class RollingBuffer:
-    def __init__(self, max_tokens: int) -> None:
-        self.max_chars = max_tokens * 4
-        self._chunks: deque[str] = deque()
-        self._total_chars = 0
 
-    def append(self, text: str) -> None:
-        if not text:
-            return
-        self._chunks.append(text)
-        self._total_chars += len(text)
-        while self._total_chars > self.max_chars and self._chunks:
-            removed = self._chunks.popleft()
-            self._total_chars -= len(removed)
+@dataclass
+class TokenCacheStats:
+    """Provider-side prompt cache usage, summed over an agent's turns."""
+    turns: int = 0
+    input_tokens: int = 0            # total prompt tokens, cached or not
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
 
-    def snapshot(self) -> str:
-        return "".join(self._chunks)
+    @property
+    def hit_ratio(self) -> float:
+        return self.cache_read_tokens / self.input_tokens if self.input_tokens else 0.0
 
-    def __len__(self) -> int:
-        return self._total_chars
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["hit_ratio"] = round(self.hit_ratio, 4)
+        return data
+
+
+@dataclass
+class _StreamTally:
+    """Per-invocation counters accumulated while consuming stream lines."""
+    displayed_chars: int = 0
+    hidden_chars: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    compaction_detected: bool = False
+    first_output_at: Optional[float] = None  # loop time of the first stdout byte
+    first_output_ns: int = 0                   # wall clock of the same byte, for trace spans
 
 
 class AgentDaemon:
-    def __init__(self, config: SwarmConfig, agent_name: str) -> None:
+    """One agent's poll/invoke loop.
+
+    The loop is a coroutine (`run_async`) so a supervisor can host many agents
+    on one event loop; `run` drives a single agent in its own process.
+    Console output goes to `out` (stdout by default, the agent log under a
+    supervisor); status goes to the shared runtime `store`. In watcher mode
+    a supervisor's `watch_hub` replaces the agent's own DB watch, its
+    `metrics` registry replaces the agent's own metrics endpoint, and its
+    `hp_helper` replaces the agent's own HP helper process.
+    """
+
+    def __init__(
+        self,
+        config: SwarmConfig,
+        agent_name: str,
+        out: Optional[TextIO] = None,
+        store: Optional[RuntimeStore] = None,
+        watch_hub: Any = None,
+        metrics: Optional[MetricsRegistry] = None,
+        hp_helper: Optional[HpHelper] = None,
+    ) -> None:
         if agent_name not in config.agents:
             raise KeyError(f"Unknown agent '{agent_name}' in config")
 
         self.config = config
         self.agent_cfg = config.agents[agent_name]
         self.agent_name = agent_name
+        self._out = out if out is not None else sys.stdout
 
         self.buffer = RollingBuffer(self.agent_cfg.max_history_tokens)
 
@@ -104,83 +162,154 @@ class AgentDaemon:
         self.consecutive_failures = 0
         self.last_error: Optional[str] = None
 
-        self._stop_event = threading.Event()
+        self._stop_event = asyncio.Event()
         self._invocation = 0
         self._session_input_tokens = 0
         self._session_output_tokens = 0
-        self._tool_overhead_tokens = 0  # Claude Code system prompt/tools overhead, measured at boot
+        self._tool_overhead_tokens = 0  # Claude Code system prompt/tools overhead, calibrated at boot
+        self._first_turn: Optional[str] = None  # boot: lazy — "startup" or "boot" work owed by turn one
+        self._last_run: Optional[AgentRunResult] = None
         self._context_window = 0        # Set from modelUsage.contextWindow in stream-json
 
-        self.state_path = self.config.state_dir / f"{self.agent_name}.json"
+        self._store = store if store is not None else RuntimeStore(self.config.runtime_db)
+        self._metrics_registry = metrics if metrics is not None else MetricsRegistry()
+        self._metrics = self._metrics_registry.for_agent(agent_name)
+        self._tracer = TurnTracer(self.config.runtime_dir, agent_name, {
+            "minion_swarm.provider": self.agent_cfg.provider,
+            "minion_swarm.model": self.agent_cfg.model or "",
+        })
+
+        # Static prompt prefixes per variant, valid while the protocol docs'
+        # (mtime, inode, size) stamp is unchanged
+        role = self.agent_cfg.role or "coder"
+        self._protocol_docs = (
+            self.config.docs_dir / "protocol-common.md",
+            self.config.docs_dir / f"protocol-{role}.md",
+        )
+        self._protocol_doc_names = tuple(str(doc) for doc in self._protocol_docs)
+        self._prompt_cache: Dict[str, str] = {}
+        self._prompt_doc_stamp: Optional[Tuple[Any, ...]] = None
+        self.prompt_cache_stats = PromptCacheStats()
+        self.token_cache_stats = TokenCacheStats()
         self.resume_ready = self._load_resume_ready()
 
         # watcher mode uses direct DB access for backward compat
         self._use_poll = self._comms_name() == "minion-comms"
         self._watcher: Any = None
+        self._watch_hub = watch_hub
+        self._poller: Optional[InboxPoller] = None
+        if self._use_poll and self.config.poll_engine == "inprocess":
+            self._poller = InboxPoller(self.agent_name, self.config.comms_db, self.config.poll_heartbeat_sec)
 
         self._provider = get_provider(
             self.agent_cfg.provider, self.agent_name, self.agent_cfg, self._use_poll,
         )
+        # Stdin-capable CLIs get the prompt on fd 0 instead of one huge argv element
+        self._prompt_on_stdin = (
+            self._provider.prompt_transport == "stdin" and self.agent_cfg.prompt_transport == "auto"
+        )
+        # Env, cwd and executable paths for provider runs, prepared once;
+        # with spawn_mode warm, the next run's process is started while idle
+        self._spawn_env = SpawnEnv(self.config.project_dir, {
+            ENV_CLASS: self.agent_cfg.role or "coder",
+            ENV_DB_PATH: str(self.config.comms_db),
+            ENV_DOCS_DIR: str(self.config.docs_dir),
+        })
+        self.spawn_stats = SpawnStats()
+        self._warm: Optional[WarmSpare] = None
+        if self.agent_cfg.spawn_mode == "warm" and self._prompt_on_stdin:
+            self._warm = WarmSpare(self._spawn_env, self.spawn_stats)
+        self._calibrations = CalibrationStore(self.config.state_dir)
+        self._calibration_key: Optional[CalibrationKey] = None
         self._error_log = self.config.logs_dir / f"{self.agent_name}.error.log"
+        self._hp = HpWriter(self.agent_name, self.config.comms_db, self.config.docs_dir, self._log, helper=hp_helper)
+        # Raw stream log — full stream-json for context inspection
+        self._stream_log = StreamLogWriter(
+            self.config.logs_dir,
+            self.agent_name,
+            segment_bytes=self.config.stream_log_segment_bytes,
+            compression=self.config.stream_log_compression,
+            keep_segments=self.config.stream_log_keep_segments,
+        )
 
     def _get_watcher(self) -> Any:
         """Lazy-init watcher for legacy watcher mode only."""
         if self._watcher is None:
             from .watcher import CommsWatcher
-            self._watcher = CommsWatcher(self.agent_name, self.config.comms_db)
+            self._watcher = CommsWatcher(self.agent_name, self.config.comms_db, hub=self._watch_hub)
         return self._watcher
 
     def run(self) -> None:
+        """Run this agent as the only daemon in the current process."""
+        asyncio.run(self._run_standalone())
+
+    async def _run_standalone(self) -> None:
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._handle_signal, signum)
+        server = MetricsServer(self._metrics_registry, self.config.runtime_dir)
+        await server.start(self._log)
+        try:
+            await self.run_async()
+        finally:
+            await server.close()
+
+    async def run_async(self) -> None:
         self.config.ensure_runtime_dirs()
+        self._store.set_pid(self.agent_name, os.getpid())
 
-        if self._use_poll:
-            self._run_poll_mode()
-        else:
-            self._run_watcher_mode()
+        if self.agent_cfg.spawn_mode == "warm" and self._warm is None:
+            self._log("spawn_mode warm needs a provider that takes the prompt on stdin; using cold starts")
+        try:
+            if self._use_poll:
+                await self._run_poll_mode()
+            else:
+                await self._run_watcher_mode()
+        finally:
+            if self._warm is not None:
+                await self._warm.close()
+            await self._hp.close()
+            await asyncio.to_thread(self._stream_log.close)
+            self._store.clear_pid(self.agent_name, only_if=os.getpid())
+
+    def request_stop(self) -> None:
+        """Ask the loop to exit after the current invocation finishes."""
+        self._stop_event.set()
 
-    def _run_poll_mode(self) -> None:
-        """minion-comms mode: poll.sh + claude invocations. No direct DB access."""
-        signal.signal(signal.SIGTERM, self._handle_signal)
-        signal.signal(signal.SIGINT, self._handle_signal)
+    async def _wait_stop(self, timeout: float) -> bool:
+        """Sleep up to `timeout` seconds, returning early (True) on stop."""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
 
+    async def _run_poll_mode(self) -> None:
+        """minion-comms mode: inbox waits/consumes (in-process or `minion poll`) + provider invocations."""
         self._log(f"starting daemon for {self.agent_name}")
         self._log(f"provider: {self.agent_cfg.provider} (resume_ready={self.resume_ready})")
-        self._log("mode: poll (minion poll)")
+        self._log(f"mode: poll ({self.config.poll_engine} engine)")
         self._write_state("idle")
 
-        # Reset stale HP from previous session
-        self._update_hp(0, 0, turn_input=0, turn_output=0)
+        # Reset stale HP from previous session; a fresh session starts at the
+        # (calibrated) provider overhead
+        await self._load_calibration()
+        self._update_hp(self._tool_overhead_tokens, 0, turn_input=0, turn_output=0)
 
-        # Boot: invoke claude directly to run ON STARTUP instructions
-        self._log("boot: invoking agent for ON STARTUP")
-        self._write_state("working")
-        boot_prompt = self._build_boot_prompt()
-        result = self._run_agent(boot_prompt)
-        if result.exit_code == 0:
-            self.resume_ready = True
-            if result.input_tokens > 0:
-                # input_tokens now includes cache tokens — real context consumed
-                prompt_tokens = len(boot_prompt) // 4  # rough chars-to-tokens
-                self._tool_overhead_tokens = max(0, result.input_tokens - prompt_tokens)
-                ctx = self._context_window if self._context_window > 0 else 200_000
-                self._log(f"boot HP: {result.input_tokens // 1000}k/{ctx // 1000}k context, overhead≈{self._tool_overhead_tokens // 1000}k, prompt≈{prompt_tokens} tokens")
-                self._session_input_tokens += result.input_tokens
-                self._session_output_tokens += result.output_tokens
-                self._update_hp(
-                    self._session_input_tokens, self._session_output_tokens,
-                    turn_input=result.input_tokens, turn_output=result.output_tokens,
-                )
-            self._log("boot: complete")
+        if self.agent_cfg.boot == "lazy":
+            await self._lazy_boot()
         else:
-            self._log(f"boot: failed (exit {result.exit_code})")
+            await self._eager_boot()
 
         self._write_state("idle")
 
         try:
             while not self._stop_event.is_set():
                 # Block until poll returns content (messages/tasks)
+                await self._prepare_next_spawn()
                 self._log("polling for messages...")
-                poll_data = self._poll_inbox()
+                self._tracer.begin()  # an empty poll keeps the open trace's wait going
+                poll_data = await self._poll_inbox()
 
                 if self._stop_event.is_set():
                     break
@@ -189,33 +318,85 @@ class AgentDaemon:
                     continue
 
                 # Content available — invoke agent with messages/tasks inline
-                self._write_state("working")
+                depth = len(poll_data.get("messages") or [])
+                self._metrics.set("queue_depth", depth)
+                self._tracer.add("poll_wait", self._tracer.started_ns, time.time_ns(), messages=depth)
+                with self._tracer.span("state_write", status="working"):
+                    self._write_state("working")
                 self._log("messages detected, invoking agent")
-                prompt = self._build_inbox_prompt(poll_data)
-                ok = self._process_prompt(prompt)
+                with self._tracer.span("prompt_build"):
+                    prompt = self._build_inbox_prompt(poll_data)
+                ok = await self._process_prompt(prompt)
 
                 if ok:
+                    if self._first_turn is not None:
+                        self._first_turn = None
+                        await self._calibrate_from_first_turn(prompt)
                     self.consecutive_failures = 0
                     self.last_error = None
-                    self._write_state("idle")
+                    self._metrics.set("queue_depth", 0)
+                    with self._tracer.span("state_write", status="idle"):
+                        self._write_state("idle")
+                    self._tracer.end()
                 else:
                     self.consecutive_failures += 1
-                    self._write_state(
-                        "error",
-                        failures=self.consecutive_failures,
-                        last_error=self.last_error,
-                    )
+                    with self._tracer.span("state_write", status="error"):
+                        self._write_state(
+                            "error",
+                            failures=self.consecutive_failures,
+                            last_error=self.last_error,
+                        )
+                    self._tracer.end(error=self.last_error)
                     backoff = min(
                         self.agent_cfg.retry_backoff_sec * (2 ** (self.consecutive_failures - 1)),
                         self.agent_cfg.retry_backoff_max_sec,
                     )
                     self._log(f"failure #{self.consecutive_failures}; backing off {backoff}s ({self.last_error or 'unknown'})")
-                    self._stop_event.wait(timeout=float(backoff))
+                    await self._wait_stop(float(backoff))
         finally:
+            self._tracer.discard()
+            if self._poller is not None:
+                await asyncio.to_thread(self._poller.stop)
             self._write_state("stopped")
             self._log("daemon stopped")
 
-    def _poll_inbox(self) -> Optional[Dict[str, Any]]:
+    async def _poll_inbox(self) -> Optional[Dict[str, Any]]:
+        """Wait for inbox content and consume it. Returns poll data dict or None.
+
+        With the in-process engine the wait happens on the comms DB itself,
+        unread messages are consumed in-process, and `minion poll` only runs
+        for tasks, the heartbeat or a schema the poller does not know.
+        """
+        started_at = asyncio.get_running_loop().time()
+        if self._poller is None:
+            poll_data = await self._run_minion_poll(interval=5, timeout=30)
+        else:
+            wake = await self._poller.wait_for_work(self._stop_event)
+            if wake == "stopped":
+                return None
+            if wake == "stand_down":
+                self._log("stand_down detected — leader dismissed the party")
+                self._stop_event.set()
+                return None
+            if wake == "inbox":
+                poll_data = await self._consume_inbox()
+            else:
+                poll_data = await self._run_minion_poll(interval=1, timeout=2)
+        waited = asyncio.get_running_loop().time() - started_at
+        self._metrics.observe("poll_wait_seconds", waited, "work" if poll_data else "empty")
+        return poll_data
+
+    async def _consume_inbox(self) -> Optional[Dict[str, Any]]:
+        """Consume unread messages through the poller, falling back to `minion poll`."""
+        assert self._poller is not None
+        try:
+            messages = await asyncio.to_thread(self._poller.consume)
+        except sqlite3.Error as exc:
+            self._log(f"in-process consume failed ({exc}); falling back to minion poll")
+            return await self._run_minion_poll(interval=1, timeout=2)
+        return {"messages": messages} if messages else None
+
+    async def _run_minion_poll(self, interval: int, timeout: int) -> Optional[Dict[str, Any]]:
         """Run minion poll as a subprocess. Returns poll data dict or None.
         Sets stop_event if stand_down detected (exit code 3).
         """
@@ -223,30 +404,142 @@ class AgentDaemon:
             env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
             env[ENV_DB_PATH] = str(self.config.comms_db)
             env[ENV_DOCS_DIR] = str(self.config.docs_dir)
-            proc = subprocess.run(
-                ["minion", "poll", "--agent", self.agent_name, "--interval", "5", "--timeout", "30"],
-                capture_output=True,
-                text=True,
+            proc = await asyncio.create_subprocess_exec(
+                "minion", "poll", "--agent", self.agent_name,
+                "--interval", str(interval), "--timeout", str(timeout),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
                 env=env,
             )
-            if proc.returncode == 3:
+            returncode, stdout = await self._communicate_unless_stopped(proc)
+            if returncode is None:
+                return None
+            if returncode == 3:
                 self._log("stand_down detected — leader dismissed the party")
                 self._stop_event.set()
                 return None
-            if proc.returncode == 0 and proc.stdout.strip():
+            if returncode == 0 and stdout.strip():
                 try:
-                    return json.loads(proc.stdout.strip())
+                    return json.loads(stdout.strip())
                 except json.JSONDecodeError:
-                    self._log(f"poll returned non-JSON: {proc.stdout[:200]}")
+                    self._log(f"poll returned non-JSON: {stdout[:200]}")
                     return None
             return None
         except Exception as exc:
             self._log(f"poll error: {exc}")
-            self._stop_event.wait(timeout=5.0)
+            await self._wait_stop(5.0)
             return None
 
+    async def _communicate_unless_stopped(self, proc: asyncio.subprocess.Process) -> Tuple[Optional[int], str]:
+        """Collect a helper child's stdout, terminating it if stop is requested first."""
+        io_task = asyncio.ensure_future(proc.communicate())
+        stop_task = asyncio.ensure_future(self._stop_event.wait())
+        try:
+            await asyncio.wait({io_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stop_task.cancel()
+        if not io_task.done():
+            if proc.returncode is None:
+                proc.terminate()
+            await io_task
+            return None, ""
+        stdout, _stderr = io_task.result()
+        return proc.returncode, (stdout or b"").decode("utf-8", errors="replace")
+
+    async def _eager_boot(self) -> None:
+        """Invoke the agent once to run its ON STARTUP instructions."""
+        self._log("boot: invoking agent for ON STARTUP")
+        self._tracer.begin("boot")
+        self._write_state("working")
+        with self._tracer.span("prompt_build"):
+            boot_prompt = self._build_boot_prompt()
+        result = await self._run_agent(boot_prompt)
+        if result.exit_code == 0:
+            self.resume_ready = True
+            if result.input_tokens > 0:
+                # input_tokens now includes cache tokens — real context consumed
+                prompt_tokens = len(boot_prompt) // 4  # rough chars-to-tokens
+                ctx = self._context_window if self._context_window > 0 else 200_000
+                if result.resumed:
+                    self._log(f"boot HP: {result.input_tokens // 1000}k/{ctx // 1000}k context (resumed session, overhead not measured)")
+                else:
+                    overhead = max(0, result.input_tokens - prompt_tokens)
+                    self._log(f"boot HP: {result.input_tokens // 1000}k/{ctx // 1000}k context, overhead≈{overhead // 1000}k, prompt≈{prompt_tokens} tokens")
+                    await self._record_calibration(overhead)
+                self._record_cache_usage(result)
+                self._session_input_tokens += result.input_tokens
+                self._session_output_tokens += result.output_tokens
+                self._update_hp(
+                    self._session_input_tokens, self._session_output_tokens,
+                    turn_input=result.input_tokens, turn_output=result.output_tokens,
+                )
+            self._log("boot: complete")
+            self._tracer.end()
+        else:
+            self._log(f"boot: failed (exit {result.exit_code})")
+            self._tracer.end(error=f"exit {result.exit_code}")
+
+    async def _lazy_boot(self) -> None:
+        """`boot: lazy` — register and set status via the comms CLI, no agent run.
+
+        Agent-side ON STARTUP steps ride along with the first inbox prompt.
+        If the CLI calls fail, the first prompt carries the boot commands too.
+        """
+        name = self.agent_name
+        role = self.agent_cfg.role or "coder"
+        self._log("boot: lazy — registering via minion CLI")
+        steps = [
+            ["--compact", "register", "--name", name, "--class", role, "--transport", "daemon"],
+            ["set-context", "--agent", name, "--context", "just started"],
+            ["set-status", "--agent", name, "--status", "ready for orders"],
+        ]
+        for args in steps:
+            if not await self._run_minion(*args):
+                self._first_turn = "boot"
+                self._log("boot: lazy registration failed; first turn will run the boot commands")
+                return
+        self._first_turn = "startup"
+        self._log("boot: complete (lazy)")
+
+    async def _calibrate_from_first_turn(self, prompt: str) -> None:
+        """Under lazy boot the first inbox turn doubles as the overhead measurement."""
+        result = self._last_run
+        if result is None or result.input_tokens <= 0:
+            return
+        if result.resumed:
+            self._log("first-turn HP: resumed session, overhead not measured")
+            return
+        prompt_tokens = len(prompt) // 4
+        overhead = max(0, result.input_tokens - prompt_tokens)
+        self._log(f"first-turn HP: overhead≈{overhead // 1000}k, prompt≈{prompt_tokens} tokens")
+        await self._record_calibration(overhead)
+
+    async def _run_minion(self, *args: str) -> bool:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "minion", *args,
+                cwd=self._spawn_env.cwd,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=self._spawn_env.env,
+            )
+            output, _ = await asyncio.wait_for(proc.communicate(), timeout=30)
+        except (OSError, asyncio.TimeoutError) as exc:
+            self._log(f"minion {args[0]} failed: {exc!r}")
+            return False
+        if proc.returncode != 0:
+            tail = output.decode("utf-8", errors="replace").strip()[-200:]
+            self._log(f"minion {' '.join(args[:2])} exited {proc.returncode}: {tail}")
+            return False
+        return True
+
     def _build_boot_prompt(self) -> str:
         """Prompt for the first invocation — agent registers and sets up."""
+        self._revalidate_prompt_cache()
+        return self._cached_prompt_prefix("boot")
+
+    def _compose_boot_prompt(self) -> str:
         system_section = self.agent_cfg.system.strip()
         protocol_section = self._build_protocol_section()
         rules_section = self._build_rules_section()
@@ -271,25 +564,10 @@ class AgentDaemon:
 
     def _build_inbox_prompt(self, poll_data: Dict[str, Any]) -> str:
         """Prompt with messages/tasks already inline — no need to fetch."""
-        # Strip ON STARTUP block from system prompt — boot already ran it.
-        # Including it causes the agent to re-register and re-check_inbox
-        # on every invocation, which can create message loops.
-        system_section = self._strip_on_startup(self.agent_cfg.system.strip())
-        protocol_section = self._build_protocol_section()
-        rules_section = self._build_rules_section()
-
-        provider_section = self._build_provider_section()
-        sections: List[str] = []
-        if provider_section:
-            sections.append(provider_section)
-        sections.extend([system_section, protocol_section])
-
-        if self.inject_history_next_turn and len(self.buffer) > 0:
-            sections.append(self._build_history_block(self.buffer.snapshot()))
-            self.inject_history_next_turn = False
-
         # Paste messages inline — poll already consumed them from DB
         inbox_lines: List[str] = []
+        if self._first_turn is not None:
+            inbox_lines.extend([self._build_first_turn_section(), ""])
         messages = poll_data.get("messages", [])
         if messages:
             inbox_lines.append("=== INBOX (already consumed — do NOT run check-inbox) ===")
@@ -315,34 +593,136 @@ class AgentDaemon:
             "Do NOT run check-inbox or re-register.",
         ])
 
-        sections.extend([rules_section, "\n".join(inbox_lines)])
+        # Provider guardrails + system prompt (ON STARTUP stripped) + protocol
+        return self._assemble_prompt("inbox", "\n".join(inbox_lines))
+
+    def _build_first_turn_section(self) -> str:
+        """Startup work folded into the first inbox prompt under `boot: lazy`."""
+        role = self.agent_cfg.role or "coder"
+        lines = ["FIRST TURN: You just started (lazy boot)."]
+        if self._first_turn == "boot":
+            lines.extend([
+                "Before the inbox, run these commands via the Bash tool:",
+                f"  minion --compact register --name {self.agent_name} --class {role} --transport daemon",
+                f"  minion set-context --agent {self.agent_name} --context 'just started'",
+                f"  minion set-status --agent {self.agent_name} --status 'ready for orders'",
+            ])
+        else:
+            lines.append("minion-swarm already registered you and set your status — do NOT register again.")
+        startup = _ON_STARTUP_RE.search(self.agent_cfg.system)
+        steps = startup.group(0).splitlines()[1:] if startup else []
+        if steps:
+            lines.append("Then run your ON STARTUP steps, skipping registration and check-inbox:")
+            lines.extend(steps)
+        lines.append("Do NOT run poll.sh — minion-swarm handles polling for you.")
+        return "\n".join(lines)
+
+    def _assemble_prompt(self, variant: str, body: str) -> str:
+        """Join the cached static sections, optional history and per-turn body.
+
+        `stable_first` layout: prefix, rules, history, body — everything
+        before the history block is byte-identical across turns, so provider
+        prefix caching covers all of it. `legacy`: prefix, history, rules, body.
+        """
+        self._revalidate_prompt_cache()
+        history = ""
+        if self.inject_history_next_turn and len(self.buffer) > 0:
+            history = self._build_history_block(self.buffer.snapshot())
+            self.inject_history_next_turn = False
+
+        prefix = self._cached_prompt_prefix(variant)
+        rules = self._cached_prompt_prefix("rules")
+        if self.agent_cfg.prompt_layout == "stable_first":
+            sections = [prefix, rules, history, body]
+        else:
+            sections = [prefix, history, rules, body]
         return "\n\n".join(s for s in sections if s.strip())
 
     @staticmethod
     def _strip_on_startup(text: str) -> str:
         """Remove ON STARTUP block from system prompt for subsequent invocations."""
-        import re
-        # Match "ON STARTUP ..." through to the next blank line or end of string
-        return re.sub(
-            r"ON STARTUP[^\n]*\n(?:[ \t]+\d+\..*\n)*(?:[ \t]+Then .*\n?)?",
-            "",
-            text,
-        ).strip()
+        return _ON_STARTUP_RE.sub("", text).strip()
+
+    def _revalidate_prompt_cache(self) -> None:
+        """Drop cached prompt text if a protocol doc's mtime/inode/size changed."""
+        stamp = self._protocol_doc_stamp()
+        if stamp != self._prompt_doc_stamp:
+            self._prompt_cache.clear()
+            self._prompt_doc_stamp = stamp
+
+    def _cached_prompt_prefix(self, variant: str) -> str:
+        """Static prompt text for `variant`, built once per protocol doc stamp.
+
+        Variants: "boot" (whole boot prompt), "inbox" and "watcher" (leading
+        sections, see `_assemble_prompt`), "rules". Cached text is reused
+        verbatim, so the prefix is byte-identical across turns. Call
+        `_revalidate_prompt_cache` once per prompt before using it.
+        """
+        cached = self._prompt_cache.get(variant)
+        if cached is not None:
+            self.prompt_cache_stats.hits += 1
+            return cached
+
+        self.prompt_cache_stats.misses += 1
+        if variant == "boot":
+            text = self._compose_boot_prompt()
+        elif variant == "rules":
+            text = self._build_rules_section()
+        elif variant == "inbox":
+            # Strip ON STARTUP block from system prompt — boot already ran it.
+            # Including it causes the agent to re-register and re-check_inbox
+            # on every invocation, which can create message loops.
+            text = "\n\n".join(s for s in [
+                self._build_provider_section(),
+                self._strip_on_startup(self.agent_cfg.system.strip()),
+                self._build_protocol_section(),
+            ] if s.strip())
+        elif variant == "watcher":
+            text = "\n\n".join(s for s in [
+                self.agent_cfg.system.strip(),
+                self._build_protocol_section(),
+            ] if s.strip())
+        else:
+            raise ValueError(f"Unknown prompt variant '{variant}'")
+        self._prompt_cache[variant] = text
+        return text
 
-    def _process_prompt(self, prompt: str) -> bool:
+    def _protocol_doc_stamp(self) -> Tuple[Any, ...]:
+        stamp: List[Any] = []
+        for doc in self._protocol_doc_names:
+            try:
+                st = os.stat(doc)
+            except OSError:
+                stamp.append(None)
+                continue
+            stamp.append((st.st_mtime_ns, st.st_ino, st.st_size))
+        return tuple(stamp)
+
+    async def _process_prompt(self, prompt: str) -> bool:
         """Run the agent with a prompt and handle the result."""
-        result = self._run_agent(prompt)
+        result = await self._run_agent(prompt)
+        self._last_run = result
 
         # Track session-cumulative HP and write to DB
         if result.input_tokens > 0 or result.output_tokens > 0:
-            self._session_input_tokens += result.input_tokens
-            self._session_output_tokens += result.output_tokens
-            self._update_hp(
-                self._session_input_tokens, self._session_output_tokens,
-                turn_input=result.input_tokens, turn_output=result.output_tokens,
-            )
+            with self._tracer.span("hp_update"):
+                self._record_cache_usage(result)
+                self._session_input_tokens += result.input_tokens
+                self._session_output_tokens += result.output_tokens
+                self._update_hp(
+                    self._session_input_tokens, self._session_output_tokens,
+                    turn_input=result.input_tokens, turn_output=result.output_tokens,
+                )
+            for kind, tokens in (
+                ("input", result.input_tokens),
+                ("output", result.output_tokens),
+                ("cache_read", result.cache_read_tokens),
+                ("cache_creation", result.cache_creation_tokens),
+            ):
+                self._metrics.inc("tokens_total", kind, value=tokens)
 
         if result.compaction_detected:
+            self._metrics.inc("compactions_total")
             self.inject_history_next_turn = True
             self._log("detected context compaction marker; history will be re-injected next cycle")
 
@@ -359,57 +739,78 @@ class AgentDaemon:
 
     # ── legacy watcher mode ──────────────────────────────────────────────
 
-    def _run_watcher_mode(self) -> None:
-        """Legacy watcher mode: direct DB access."""
+    async def _run_watcher_mode(self) -> None:
+        """Legacy watcher mode: direct DB access.
+
+        SQLite calls and the watchdog wait are blocking, so they run on the
+        loop's executor to keep other hosted agents responsive.
+        """
         watcher = self._get_watcher()
         watcher.start()
-        watcher.register_agent(
+        await asyncio.to_thread(
+            watcher.register_agent,
             role=self.agent_cfg.role,
             description=f"minion-swarm daemon agent ({self.agent_cfg.zone})",
             status="online",
         )
 
-        signal.signal(signal.SIGTERM, self._handle_signal)
-        signal.signal(signal.SIGINT, self._handle_signal)
-
         self._log(f"starting daemon for {self.agent_name}")
         self._log(f"provider: {self.agent_cfg.provider} (resume_ready={self.resume_ready})")
         self._log(f"mode: watcher (DB: {self.config.comms_db})")
+        await self._load_calibration()
         self._write_state("idle")
 
         try:
             while not self._stop_event.is_set():
-                message = watcher.pop_next_message()
+                self._tracer.begin()  # an idle wait keeps the open trace's wait going
+                batch = await self._drain_watcher_batch(watcher)
 
-                if message is None:
-                    watcher.set_agent_status("idle")
+                if not batch:
+                    self._metrics.set("queue_depth", 0)
+                    await asyncio.to_thread(watcher.set_agent_status, "idle")
                     self._write_state("idle")
-                    watcher.wait_for_update(timeout=5.0)
+                    await self._prepare_next_spawn()
+                    await asyncio.to_thread(watcher.wait_for_update, 5.0)
                     continue
 
-                watcher.set_agent_status("working")
-                self._write_state(
-                    "working",
-                    current_message_id=message.id,
-                    from_agent=message.from_agent,
-                    received_at=message.timestamp,
-                )
-                self._log(f"processing message {message.id} from {message.from_agent}")
+                ids = [m.id for m in batch]
+                self._tracer.add("poll_wait", self._tracer.started_ns, time.time_ns(), messages=len(batch))
+                self._metrics.set("queue_depth", len(batch) + await asyncio.to_thread(watcher.unread_count))
+                with self._tracer.span("state_write", status="working"):
+                    await asyncio.to_thread(watcher.set_agent_status, "working")
+                    self._write_state(
+                        "working",
+                        current_message_id=ids[-1],
+                        current_message_ids=ids,
+                        from_agent=batch[-1].from_agent,
+                        received_at=batch[-1].timestamp,
+                    )
+                if len(batch) == 1:
+                    self._log(f"processing message {ids[0]} from {batch[0].from_agent}")
+                else:
+                    senders = ", ".join(sorted({m.from_agent for m in batch}))
+                    self._log(f"processing {len(batch)} messages ({ids[0]}..{ids[-1]}) from {senders}")
 
-                prompt = self._build_watcher_prompt(message)
-                ok = self._process_prompt(prompt)
+                with self._tracer.span("prompt_build"):
+                    prompt = self._build_watcher_prompt(batch)
+                ok = await self._process_prompt(prompt)
 
                 if ok:
-                    watcher.set_agent_status("online")
-                    self._write_state("idle", last_message_id=message.id)
+                    with self._tracer.span("state_write", status="idle"):
+                        await asyncio.to_thread(watcher.set_agent_status, "online")
+                        self._write_state("idle", last_message_id=ids[-1], acked_message_ids=ids)
+                    self._tracer.end(messages=len(batch))
                     continue
 
-                self._write_state(
-                    "error",
-                    failures=self.consecutive_failures,
-                    last_error=self.last_error,
-                    failed_message_id=message.id,
-                )
+                with self._tracer.span("state_write", status="error"):
+                    self._write_state(
+                        "error",
+                        failures=self.consecutive_failures,
+                        last_error=self.last_error,
+                        failed_message_id=ids[-1],
+                        failed_message_ids=ids,
+                    )
+                self._tracer.end(error=self.last_error, messages=len(batch))
 
                 backoff = min(
                     self.agent_cfg.retry_backoff_sec * (2 ** (self.consecutive_failures - 1)),
@@ -418,32 +819,47 @@ class AgentDaemon:
                 self._log(f"failure #{self.consecutive_failures}; backing off {backoff}s ({self.last_error or 'unknown'})")
 
                 if self.consecutive_failures >= 3:
-                    self._alert_lead_watcher(watcher)
+                    await asyncio.to_thread(self._alert_lead_watcher, watcher)
 
-                self._stop_event.wait(timeout=float(backoff))
+                await self._wait_stop(float(backoff))
 
         finally:
-            watcher.set_agent_status("offline")
+            self._tracer.discard()
+            await asyncio.to_thread(watcher.set_agent_status, "offline")
             self._write_state("stopped")
-            watcher.stop()
+            await asyncio.to_thread(watcher.stop)
             self._log("daemon stopped")
 
-    def _build_watcher_prompt(self, message: Any) -> str:
+    async def _drain_watcher_batch(self, watcher: Any) -> List[Any]:
+        """Consume up to batch_max_messages / batch_max_chars unread messages.
+
+        With a linger window, a partial batch waits that long once for the
+        rest of a burst before the invocation starts.
+        """
+        cfg = self.agent_cfg
+        batch = await asyncio.to_thread(watcher.pop_messages, cfg.batch_max_messages, cfg.batch_max_chars)
+        if not batch or len(batch) >= cfg.batch_max_messages or cfg.batch_linger_ms <= 0:
+            return batch
+
+        if await self._wait_stop(cfg.batch_linger_ms / 1000):
+            return batch
+        used_chars = sum(len(m.content) for m in batch)
+        if used_chars < cfg.batch_max_chars:
+            batch.extend(await asyncio.to_thread(
+                watcher.pop_messages,
+                cfg.batch_max_messages - len(batch),
+                cfg.batch_max_chars - used_chars,
+            ))
+        return batch
+
+    def _build_watcher_prompt(self, messages: List[Any]) -> str:
         """Build prompt with message content baked in (watcher mode)."""
         max_prompt_chars = self.agent_cfg.max_prompt_chars
-        system_section = self.agent_cfg.system.strip()
-        protocol_section = self._build_protocol_section()
-        rules_section = self._build_rules_section()
-        incoming_section = self._build_incoming_section(message)
-
-        sections: List[str] = [system_section, protocol_section]
-
-        if self.inject_history_next_turn and len(self.buffer) > 0:
-            sections.append(self._build_history_block(self.buffer.snapshot()))
-            self.inject_history_next_turn = False
-
-        sections.extend([rules_section, incoming_section])
-        prompt = "\n\n".join(s for s in sections if s.strip())
+        if len(messages) == 1:
+            incoming_section = self._build_incoming_section(messages[0])
+        else:
+            incoming_section = self._build_incoming_batch_section(messages)
+        prompt = self._assemble_prompt("watcher", incoming_section)
 
         if len(prompt) > max_prompt_chars:
             prompt = prompt[:max_prompt_chars]
@@ -464,6 +880,21 @@ class AgentDaemon:
             ]
         )
 
+    def _build_incoming_batch_section(self, messages: List[Any]) -> str:
+        lines = [f"Incoming messages ({len(messages)}, oldest first — handle each one):"]
+        for i, message in enumerate(messages, 1):
+            lines.extend([
+                "",
+                f"--- message {i}/{len(messages)} ---",
+                f"- id: {message.id}",
+                f"- from: {message.from_agent}",
+                f"- timestamp: {message.timestamp}",
+                f"- broadcast: {message.is_broadcast}",
+                "",
+                message.content,
+            ])
+        return "\n".join(lines)
+
     def _alert_lead_watcher(self, watcher: Any) -> None:
         lead = watcher.find_lead_agent() or "lead"
         content = (
@@ -478,7 +909,7 @@ class AgentDaemon:
 
     # ── shared ─────────────────────────────────────────────────────────────
 
-    def _handle_signal(self, signum: int, _frame: Any) -> None:
+    def _handle_signal(self, signum: int, _frame: Any = None) -> None:
         self._log(f"received signal {signum}, shutting down")
         self._stop_event.set()
 
@@ -523,11 +954,8 @@ class AgentDaemon:
 
     def _build_protocol_section(self) -> str:
         """Read protocol-common.md + protocol-{role}.md, fallback to hardcoded."""
-        protocol_dir = self.config.docs_dir
-        role = self.agent_cfg.role or "coder"
         sections: List[str] = []
-        for fname in ["protocol-common.md", f"protocol-{role}.md"]:
-            doc = protocol_dir / fname
+        for doc in self._protocol_docs:
             if doc.exists():
                 sections.append(doc.read_text().strip())
         if sections:
@@ -550,7 +978,8 @@ class AgentDaemon:
         return "\n".join(
             [
                 "════════════════════ RECENT HISTORY (rolling buffer) ════════════════════",
-                "The following is your captured stream-json history from before compaction.",
+                "The following is a condensed transcript of your turns from before compaction",
+                "(tool output truncated).",
                 "Use it to restore recent context and avoid redoing completed work.",
                 "══════════════════════════════════════════════════════════════════════════",
                 history_snapshot,
@@ -568,264 +997,355 @@ class AgentDaemon:
         keep = max_chars - len(prefix)
         return f"{prefix}{text[-keep:]}"
 
-    def _run_agent(self, prompt: str) -> AgentRunResult:
+    async def _run_agent(self, prompt: str) -> AgentRunResult:
         provider = self._provider
-        cmd = provider.build_command(prompt, use_resume=False)
+        stdin_prompt = prompt if self._prompt_on_stdin else None
+        argv_prompt = None if self._prompt_on_stdin else prompt
+        cmd = provider.build_command(argv_prompt, use_resume=False)
         if provider.supports_resume:
-            return self._run_with_optional_resume(
-                resume_cmd=provider.build_command(prompt, use_resume=True),
+            return await self._run_with_optional_resume(
+                resume_cmd=provider.build_command(argv_prompt, use_resume=True),
                 fresh_cmd=cmd,
                 resume_label=provider.resume_label,
+                stdin_prompt=stdin_prompt,
             )
-        return self._run_command(cmd)
+        return await self._run_command(cmd, stdin_prompt)
 
-    def _run_with_optional_resume(self, resume_cmd: List[str], fresh_cmd: List[str], resume_label: str) -> AgentRunResult:
+    async def _run_with_optional_resume(
+        self, resume_cmd: List[str], fresh_cmd: List[str], resume_label: str, stdin_prompt: Optional[str] = None,
+    ) -> AgentRunResult:
         if self.resume_ready:
-            resumed = self._run_command(resume_cmd)
+            resumed = await self._run_command(resume_cmd, stdin_prompt)
+            resumed.resumed = resume_cmd != fresh_cmd
             if resumed.timed_out or resumed.exit_code == 0:
                 return resumed
             self.resume_ready = False
             self._log(f"{resume_label} failed with exit {resumed.exit_code}; retrying without resume")
 
-        return self._run_command(fresh_cmd)
-
-    def _run_command(self, cmd: List[str]) -> AgentRunResult:
-        self._log(f"exec: {cmd[0]} ({self.agent_cfg.provider})")
-        self._print_stream_start(cmd[0])
-
-        # Strip CLAUDECODE env var so nested claude sessions don't refuse to start
-        env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
-        env[ENV_CLASS] = self.agent_cfg.role or "coder"
-        env[ENV_DB_PATH] = str(self.config.comms_db)
-        env[ENV_DOCS_DIR] = str(self.config.docs_dir)
+        return await self._run_command(fresh_cmd, stdin_prompt)
 
-        try:
-            proc = subprocess.Popen(
-                cmd,
-                cwd=str(self.config.project_dir),
-                stdin=subprocess.DEVNULL,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                env=env,
+    async def _prepare_next_spawn(self) -> None:
+        """While idle, resolve the next run's command and start its warm spare."""
+        provider = self._provider
+        argv_prompt = None if self._prompt_on_stdin else ""
+        cmd = provider.build_command(argv_prompt, use_resume=provider.supports_resume and self.resume_ready)
+        self._spawn_env.resolve(cmd)
+        if self._warm is not None and await self._warm.fill(cmd):
+            self._log(f"warm spare started: {cmd[0]}")
+
+    async def _run_command(self, cmd: List[str], stdin_prompt: Optional[str] = None) -> AgentRunResult:
+        """Spawn one provider CLI run and consume its stream.
+
+        `stdin_prompt` is handed to the child as fd 0 via an anonymous temp
+        file — the CLI reads it to EOF, with no pipe writer to keep alive.
+        A matching warm spare is used instead when there is one; its prompt
+        is written to the spare's stdin pipe alongside the stream pump.
+        """
+        loop = asyncio.get_running_loop()
+        invocation_span = self._tracer.start("invocation", cmd=cmd[0])
+        spawn_ns = time.time_ns()
+        proc: Optional[asyncio.subprocess.Process] = None
+        if stdin_prompt is not None and self._warm is not None:
+            taken_at = loop.time()
+            proc = await self._warm.take(cmd)
+            if proc is not None:
+                self._metrics.observe("spawn_seconds", loop.time() - taken_at, "warm")
+        spawn_mode = "warm" if proc is not None else "cold"
+
+        if stdin_prompt is None:
+            self._log(f"exec: {cmd[0]} ({self.agent_cfg.provider})")
+        else:
+            self._log(
+                f"exec: {cmd[0]} ({self.agent_cfg.provider}, prompt on stdin: {len(stdin_prompt)} chars, {spawn_mode})"
             )
-        except FileNotFoundError:
-            self._log(f"command not found: {cmd[0]}")
-            return AgentRunResult(exit_code=127, timed_out=False, compaction_detected=False, command_name=cmd[0])
-        except Exception as exc:
-            self._log(f"failed to launch {cmd[0]}: {exc}")
-            return AgentRunResult(exit_code=127, timed_out=False, compaction_detected=False, command_name=cmd[0])
-
-        q: "queue.Queue[Optional[str]]" = queue.Queue()
-
-        def _reader() -> None:
-            assert proc.stdout is not None
-            for line in proc.stdout:
-                q.put(line)
-            q.put(None)
-
-        t = threading.Thread(target=_reader, daemon=True)
-        t.start()
+        self._print_stream_start(cmd[0])
 
-        # Raw stream log — full stream-json for context inspection
-        stream_log = self.config.logs_dir / f"{self.agent_name}.stream.jsonl"
-        stream_fp = open(stream_log, "a")
-
-        timed_out = False
-        compaction_detected = False
-        last_output_at = time.monotonic()
-        displayed_chars = 0
-        hidden_chars = 0
-        total_input_tokens = 0
-        total_output_tokens = 0
-
-        while True:
+        started_at = loop.time()
+        feeder: Optional[asyncio.Future[None]] = None
+        if proc is not None:
+            assert stdin_prompt is not None
+            feeder = asyncio.ensure_future(self._feed_stdin(proc, stdin_prompt))
+        else:
+            stdin: Any = subprocess.DEVNULL
             try:
-                line = q.get(timeout=1.0)
-            except queue.Empty:
-                if proc.poll() is not None and q.empty():
-                    break
-                if time.monotonic() - last_output_at > self.agent_cfg.no_output_timeout_sec:
-                    timed_out = True
-                    proc.terminate()
-                    break
-                continue
-
-            if line is None:
-                break
-
-            last_output_at = time.monotonic()
-            self.buffer.append(line)
-            stream_fp.write(line)  # Full unfiltered line to stream log
-            stream_fp.flush()
-
-            # Filter through provider before rendering (catches verbose errors)
-            filtered_line = self._provider.filter_log_line(line, self._error_log)
-            rendered, has_compaction = self._render_stream_line(filtered_line)
-
-            # Extract token usage from stream-json (last value wins —
-            # result event comes last with full totals including cache)
-            inp, out = self._extract_usage(line)
-            if inp > 0:
-                total_input_tokens = inp
-            if out > 0:
-                total_output_tokens = out
-
-            if rendered:
-                remaining = MAX_CONSOLE_STREAM_CHARS - displayed_chars
-                if remaining > 0:
-                    chunk = rendered[:remaining]
-                    print(chunk, end="", flush=True)
-                    displayed_chars += len(chunk)
-                else:
-                    chunk = ""
-                hidden_chars += len(rendered) - len(chunk)
-            if has_compaction:
-                compaction_detected = True
+                if stdin_prompt is not None:
+                    stdin = tempfile.TemporaryFile()
+                    stdin.write(stdin_prompt.encode("utf-8"))
+                    stdin.seek(0)
+                proc = await self._spawn_env.spawn(cmd, stdin=stdin)
+                self._metrics.observe("spawn_seconds", loop.time() - started_at, "cold")
+            except FileNotFoundError:
+                self._spawn_env.forget(cmd[0])
+                self._log(f"command not found: {cmd[0]}")
+                self._metrics.inc("invocations_total", self.agent_cfg.provider, 127)
+                self._tracer.finish(invocation_span, error=f"failed to launch {cmd[0]}", exit_code=127)
+                return AgentRunResult(exit_code=127, timed_out=False, compaction_detected=False, command_name=cmd[0])
+            except Exception as exc:
+                self._log(f"failed to launch {cmd[0]}: {exc}")
+                self._metrics.inc("invocations_total", self.agent_cfg.provider, 127)
+                self._tracer.finish(invocation_span, error=f"failed to launch {cmd[0]}", exit_code=127)
+                return AgentRunResult(exit_code=127, timed_out=False, compaction_detected=False, command_name=cmd[0])
+            finally:
+                if stdin is not subprocess.DEVNULL:
+                    stdin.close()  # the child holds its own descriptor
+
+        spawned_ns = time.time_ns()
+        self._tracer.add("spawn", spawn_ns, spawned_ns, invocation_span, mode=spawn_mode)
+        tally = _StreamTally()
+        self._stream_log.begin_invocation(self._invocation)
+        try:
+            timed_out = await self._pump_stream(proc, tally)
+        finally:
+            self._stream_log.end_invocation()
+            if feeder is not None and not feeder.done():
+                feeder.cancel()
+        streamed_ns = time.time_ns()
+        if tally.first_output_ns:
+            self._tracer.add("first_byte", spawned_ns, tally.first_output_ns, invocation_span)
+            self._tracer.add("stream", tally.first_output_ns, streamed_ns, invocation_span)
+        else:
+            self._tracer.add("stream", spawned_ns, streamed_ns, invocation_span, output=False)
 
-        stream_fp.close()
+        if tally.first_output_at is not None:
+            first_byte_ms = (tally.first_output_at - started_at) * 1000
+            self.spawn_stats.record(spawn_mode, first_byte_ms)
+            self._metrics.observe("first_output_seconds", first_byte_ms / 1000, spawn_mode)
+            self._log(f"first output after {first_byte_ms:.0f} ms ({spawn_mode} start)")
 
-        if timed_out and proc.poll() is None:
+        if timed_out and proc.returncode is None:
             try:
-                proc.wait(timeout=5)
-            except subprocess.TimeoutExpired:
+                await asyncio.wait_for(proc.wait(), timeout=5)
+            except asyncio.TimeoutError:
                 proc.kill()
 
         try:
-            exit_code = proc.wait(timeout=30)
-        except subprocess.TimeoutExpired:
+            exit_code = await asyncio.wait_for(proc.wait(), timeout=30)
+        except asyncio.TimeoutError:
             proc.kill()
-            exit_code = proc.wait(timeout=5)
-
-        self._print_stream_end(cmd[0], displayed_chars=displayed_chars, hidden_chars=hidden_chars)
+            exit_code = await asyncio.wait_for(proc.wait(), timeout=5)
+
+        self._metrics.observe("invocation_seconds", loop.time() - started_at)
+        self._metrics.inc("invocations_total", self.agent_cfg.provider, exit_code)
+        if timed_out:
+            self._metrics.inc("timeouts_total")
+        self._tracer.add("process_wait", streamed_ns, time.time_ns(), invocation_span)
+        self._tracer.finish(
+            invocation_span,
+            error="no-output timeout" if timed_out else (f"exit {exit_code}" if exit_code != 0 else None),
+            v=self._invocation,
+            exit_code=exit_code,
+        )
+        self._print_stream_end(cmd[0], displayed_chars=tally.displayed_chars, hidden_chars=tally.hidden_chars)
         return AgentRunResult(
             exit_code=exit_code,
             timed_out=timed_out,
-            compaction_detected=compaction_detected,
+            compaction_detected=tally.compaction_detected,
             command_name=cmd[0],
-            input_tokens=total_input_tokens,
-            output_tokens=total_output_tokens,
+            input_tokens=tally.input_tokens,
+            output_tokens=tally.output_tokens,
+            cache_read_tokens=tally.cache_read_tokens,
+            cache_creation_tokens=tally.cache_creation_tokens,
         )
 
-    def _render_stream_line(self, line: str) -> Tuple[str, bool]:
-        raw = line.rstrip("\n")
-        if not raw:
-            return "", False
-
-        compaction = self._contains_compaction_marker(raw)
-
+    @staticmethod
+    async def _feed_stdin(proc: asyncio.subprocess.Process, prompt: str) -> None:
+        assert proc.stdin is not None
         try:
-            payload = json.loads(raw)
-        except json.JSONDecodeError:
-            return raw + "\n", compaction
-
-        fragments = self._extract_text_fragments(payload)
-        rendered = "".join(fragments)
-
-        if not rendered:
-            event_type = payload.get("type") if isinstance(payload, dict) else None
-            if event_type in {"error", "warning"}:
-                rendered = f"[{event_type}] {payload.get('message', '')}\n"
-
-        if self._contains_compaction_marker(rendered):
-            compaction = True
-
-        if isinstance(payload, dict) and self._contains_compaction_marker(json.dumps(payload).lower()):
-            compaction = True
-
-        return rendered, compaction
-
-    def _extract_text_fragments(self, payload: Any) -> List[str]:
-        out: List[str] = []
-        text_keys = {"text", "content", "delta", "output_text"}
-
-        def walk(node: Any) -> None:
-            if isinstance(node, dict):
-                for key, value in node.items():
-                    if key in text_keys and isinstance(value, str):
-                        out.append(value)
-                    else:
-                        walk(value)
-            elif isinstance(node, list):
-                for item in node:
-                    walk(item)
-
-        walk(payload)
-        return out
-
-    def _contains_compaction_marker(self, text: str) -> bool:
-        low = text.lower()
-        markers = (
-            "compaction",
-            "compacted",
-            "context window",
-            "summarized prior",
-            "summarised prior",
-            "auto-compact",
-        )
-        return any(marker in low for marker in markers)
+            proc.stdin.write(prompt.encode("utf-8"))
+            await proc.stdin.drain()
+            proc.stdin.close()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # child exited early; its exit code tells the story
+
+    async def _pump_stream(self, proc: asyncio.subprocess.Process, tally: _StreamTally) -> bool:
+        """Consume the child's stdout until EOF or the no-output timeout.
+
+        Reads arrive in `STREAM_READ_CHUNK` blocks and are split into lines
+        here. The no-output deadline is one loop timer, re-armed lazily from
+        the last-read timestamp, so nothing is scheduled per line. A second
+        timer, armed only while the stream log holds buffered lines, writes
+        them out `flush_interval` after the last flush even if the child
+        goes quiet. Returns True if the child was terminated for going silent.
+        """
+        assert proc.stdout is not None
+        loop = asyncio.get_running_loop()
+        timeout = float(self.agent_cfg.no_output_timeout_sec)
+        last_output_at = loop.time()
+        expired = loop.create_future()
+
+        def _check_deadline() -> None:
+            nonlocal deadline_handle
+            due = last_output_at + timeout
+            if loop.time() >= due:
+                if not expired.done():
+                    expired.set_result(None)
+                return
+            deadline_handle = loop.call_at(due, _check_deadline)
+
+        deadline_handle = loop.call_at(last_output_at + timeout, _check_deadline)
+        flush_handle: Optional[asyncio.TimerHandle] = None
+
+        def _flush_stream_log() -> None:
+            nonlocal flush_handle
+            due = self._stream_log.flush_in()
+            if due is None:
+                flush_handle = None
+            elif due > 0:
+                flush_handle = loop.call_later(due, _flush_stream_log)
+            else:
+                flush_handle = None
+                self._stream_log.flush()
+
+        async def _read_all() -> None:
+            nonlocal last_output_at, flush_handle
+            pending = bytearray()
+            while True:
+                chunk = await proc.stdout.read(STREAM_READ_CHUNK)
+                if not chunk:
+                    break
+                last_output_at = loop.time()
+                if tally.first_output_at is None:
+                    tally.first_output_at = last_output_at
+                    tally.first_output_ns = time.time_ns()
+                pending += chunk
+                if b"\n" not in chunk:
+                    continue
+                cut = pending.rfind(b"\n")
+                complete = bytes(pending[:cut])
+                del pending[:cut + 1]
+                for raw in complete.split(b"\n"):
+                    self._consume_stream_line(raw.decode("utf-8", errors="replace") + "\n", tally)
+                if flush_handle is None:
+                    due = self._stream_log.flush_in()
+                    if due is not None:
+                        flush_handle = loop.call_later(due, _flush_stream_log)
+            if pending:
+                self._consume_stream_line(pending.decode("utf-8", errors="replace"), tally)
+
+        reader = asyncio.ensure_future(_read_all())
+        try:
+            await asyncio.wait({reader, expired}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            deadline_handle.cancel()
+            if flush_handle is not None:
+                flush_handle.cancel()  # end_invocation flushes the rest
+            if not reader.done():
+                reader.cancel()
+                try:
+                    await reader
+                except asyncio.CancelledError:
+                    pass
 
-    def _extract_usage(self, line: str) -> Tuple[int, int]:
-        """Extract token usage from a stream-json line. Returns (input_tokens, output_tokens).
+        if reader.done() and not reader.cancelled():
+            reader.result()  # surface reader errors
+            return False
+        proc.terminate()
+        return True
 
-        Claude Code stream-json reports tokens split across fields:
-        - input_tokens: non-cached prompt tokens (often tiny)
-        - cache_creation_input_tokens: system prompt tokens being cached
-        - cache_read_input_tokens: system prompt tokens read from cache
-        Total context consumed = input + cache_creation + cache_read.
+    def _consume_stream_line(self, line: str, tally: _StreamTally) -> None:
+        self._stream_log.write(line)  # Full unfiltered line, group-flushed
+
+        # Decode once; every consumer below reads the typed event
+        event = parse_stream_line(line)
+        self.buffer.append(event)
+
+        # Filter through provider before rendering (catches verbose errors)
+        replacement = self._provider.filter_event(event, self._error_log)
+        rendered = event.render() if replacement is None else replacement
+
+        # Token usage (last value wins — result event comes last with
+        # full totals including cache)
+        self._apply_usage(event, tally)
+
+        if rendered:
+            remaining = MAX_CONSOLE_STREAM_CHARS - tally.displayed_chars
+            if remaining > 0:
+                chunk = rendered[:remaining]
+                self._emit(chunk)
+                tally.displayed_chars += len(chunk)
+            else:
+                chunk = ""
+            tally.hidden_chars += len(rendered) - len(chunk)
+        if event.compaction:
+            tally.compaction_detected = True
+
+    def _apply_usage(self, event: StreamEvent, tally: _StreamTally) -> None:
+        if event.input_tokens > 0:
+            tally.input_tokens = event.input_tokens
+            tally.cache_read_tokens = event.cache_read_tokens
+            tally.cache_creation_tokens = event.cache_creation_tokens
+        if event.output_tokens > 0:
+            tally.output_tokens = event.output_tokens
+        # Extract context window for accurate HP limit
+        if event.context_window > 0:
+            self._context_window = event.context_window
+
+    def _record_cache_usage(self, result: AgentRunResult) -> None:
+        """Fold one turn's cache_read/cache_creation tokens into the hit ratio."""
+        stats = self.token_cache_stats
+        stats.turns += 1
+        stats.input_tokens += result.input_tokens
+        stats.cache_read_tokens += result.cache_read_tokens
+        stats.cache_creation_tokens += result.cache_creation_tokens
+        if result.input_tokens > 0:
+            turn_ratio = result.cache_read_tokens / result.input_tokens
+            self._log(
+                f"prompt cache: read {result.cache_read_tokens}, created {result.cache_creation_tokens}, "
+                f"uncached {result.input_tokens - result.cache_read_tokens - result.cache_creation_tokens} "
+                f"— hit {turn_ratio:.0%} (session {stats.hit_ratio:.0%})"
+            )
+
+    async def _load_calibration(self) -> None:
+        """Seed overhead and context window from a stored boot measurement.
 
-        The 'result' event also has modelUsage with contextWindow — we extract
-        that to set the HP limit accurately.
+        Without one, fall back to the static table, scaled by what earlier
+        calibrations of this provider observed.
+        """
+        cfg = self.agent_cfg
+        exe = self._spawn_env.resolve(self._provider.build_command(None if self._prompt_on_stdin else ""))[0]
+        version = await probe_cli_version(exe, self._spawn_env.env)
+        key = CalibrationKey(cfg.provider, cfg.model, cfg.allowed_tools, version)
+        self._calibration_key = key
+        stored = await asyncio.to_thread(self._calibrations.get, key)
+        label = version or "unknown version"
+        if stored is not None:
+            self._tool_overhead_tokens = stored.overhead_tokens
+            if stored.context_window > 0 and self._context_window <= 0:
+                self._context_window = stored.context_window
+            self._log(
+                f"calibration: overhead≈{stored.overhead_tokens // 1000}k, "
+                f"context {stored.context_window // 1000}k ({label}, {stored.samples} boot(s))"
+            )
+            return
+        estimate = self._estimate_tool_overhead()
+        scale = await asyncio.to_thread(self._calibrations.static_scale, cfg.provider)
+        if scale is not None:
+            estimate = int(estimate * scale)
+        self._tool_overhead_tokens = estimate
+        scaled = f", static table x{scale:.2f}" if scale is not None else ", static table"
+        self._log(f"calibration: none for {label}; overhead≈{estimate // 1000}k estimated{scaled}")
+
+    async def _record_calibration(self, overhead: int) -> None:
+        """Adopt the overhead measured by a fresh run and store it for later daemons.
+
+        If the store rejects it as an outlier, the loaded overhead stays in use.
         """
-        raw = line.strip()
-        if not raw or "tokens" not in raw:
-            return 0, 0
+        previous, self._tool_overhead_tokens = self._tool_overhead_tokens, overhead
+        if self._calibration_key is None or overhead <= 0:
+            return
         try:
-            data = json.loads(raw)
-        except (json.JSONDecodeError, ValueError):
-            return 0, 0
-        if not isinstance(data, dict):
-            return 0, 0
-
-        # Prefer modelUsage from result event — it has contextWindow too
-        if data.get("type") == "result":
-            model_usage = data.get("modelUsage")
-            if isinstance(model_usage, dict):
-                for model_info in model_usage.values():
-                    if isinstance(model_info, dict):
-                        inp = (model_info.get("inputTokens", 0) or 0) + \
-                              (model_info.get("cacheCreationInputTokens", 0) or 0) + \
-                              (model_info.get("cacheReadInputTokens", 0) or 0)
-                        out = model_info.get("outputTokens", 0) or 0
-                        # Extract context window for accurate HP limit
-                        ctx_window = model_info.get("contextWindow", 0)
-                        if ctx_window > 0:
-                            self._context_window = ctx_window
-                        return inp, out
-
-        # Fall back to usage dict in assistant/message events
-        usage = self._find_usage_dict(data)
-        if not usage:
-            return 0, 0
-        inp = (usage.get("input_tokens", 0) or 0) + \
-              (usage.get("cache_creation_input_tokens", 0) or 0) + \
-              (usage.get("cache_read_input_tokens", 0) or 0)
-        out = usage.get("output_tokens", 0) or 0
-        return inp, out
-
-    def _find_usage_dict(self, obj: Any) -> Optional[dict]:
-        """Recursively find a dict containing 'input_tokens' in a JSON structure."""
-        if not isinstance(obj, dict):
-            return None
-        if "input_tokens" in obj:
-            return obj
-        for v in obj.values():
-            if isinstance(v, dict):
-                found = self._find_usage_dict(v)
-                if found:
-                    return found
-        return None
+            await asyncio.to_thread(
+                self._calibrations.record,
+                self._calibration_key,
+                overhead,
+                self._context_window,
+                self._estimate_tool_overhead(),
+            )
+        except CalibrationRejected as exc:
+            self._tool_overhead_tokens = previous
+            self._log(f"calibration: sample rejected ({exc}); keeping overhead≈{previous // 1000}k")
+        except OSError as exc:
+            self._log(f"calibration: failed to save: {exc}")
 
     def _estimate_tool_overhead(self) -> int:
         """Estimate Claude Code system prompt + tool definition token overhead."""
@@ -847,69 +1367,56 @@ class AgentDaemon:
         self, input_tokens: int, output_tokens: int,
         turn_input: int | None = None, turn_output: int | None = None,
     ) -> None:
-        """Call minion update-hp to write observed HP to SQLite."""
+        """Queue observed HP for the background writer; never blocks the loop."""
         # Use API-reported context window, fall back to 200k default
         limit = self._context_window if self._context_window > 0 else 200_000
-        env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
-        env[ENV_CLASS] = "lead"  # Daemon has permission to write HP
-        env[ENV_DB_PATH] = str(self.config.comms_db)
-        env[ENV_DOCS_DIR] = str(self.config.docs_dir)
-        cmd = [
-            "minion", "update-hp",
-            "--agent", self.agent_name,
-            "--input-tokens", str(input_tokens),
-            "--output-tokens", str(output_tokens),
-            "--limit", str(limit),
-        ]
-        if turn_input is not None:
-            cmd.extend(["--turn-input", str(turn_input)])
-        if turn_output is not None:
-            cmd.extend(["--turn-output", str(turn_output)])
-        try:
-            subprocess.run(cmd, capture_output=True, text=True, timeout=10, env=env)
-        except Exception as exc:
-            self._log(f"update-hp failed: {exc}")
+        self._metrics.set("context_tokens", input_tokens)
+        self._metrics.set("context_limit_tokens", limit)
+        self._hp.submit(HpUpdate(input_tokens, output_tokens, limit, turn_input, turn_output))
 
     def _print_stream_start(self, command_name: str) -> None:
         self._invocation += 1
         ts = datetime.now().strftime("%H:%M:%S")
-        print(
-            f"\n=== model-stream start: agent={self.agent_name} cmd={command_name} v={self._invocation} ts={ts} ===",
-            flush=True,
+        self._emit(
+            f"\n=== model-stream start: agent={self.agent_name} cmd={command_name} v={self._invocation} ts={ts}"
+            f"{self._trace_label()} ===\n"
         )
 
     def _print_stream_end(self, command_name: str, displayed_chars: int, hidden_chars: int) -> None:
         ts = datetime.now().strftime("%H:%M:%S")
         if hidden_chars > 0:
-            print(f"\n[model-stream abbreviated: {hidden_chars} chars hidden]", flush=True)
-        print(
-            f"=== model-stream end: agent={self.agent_name} cmd={command_name} v={self._invocation} ts={ts} shown={displayed_chars} chars ===",
-            flush=True,
+            self._emit(f"\n[model-stream abbreviated: {hidden_chars} chars hidden]\n")
+        self._emit(
+            f"=== model-stream end: agent={self.agent_name} cmd={command_name} v={self._invocation} ts={ts} "
+            f"shown={displayed_chars} chars{self._trace_label()} ===\n"
         )
 
+    def _trace_label(self) -> str:
+        return f" trace={self._tracer.trace_id}" if self._tracer.active else ""
+
     def _load_resume_ready(self) -> bool:
-        if not self.state_path.exists():
-            return False
-        try:
-            payload = json.loads(self.state_path.read_text())
-        except (OSError, json.JSONDecodeError, TypeError):
-            return False
-        return bool(payload.get("resume_ready", False))
+        state = self._store.get(self.agent_name)
+        return bool(state and state.resume_ready)
 
     def _write_state(self, status: str, **extra: Any) -> None:
-        payload = {
-            "agent": self.agent_name,
-            "provider": self.agent_cfg.provider,
-            "pid": os.getpid(),
-            "status": status,
-            "updated_at": utc_now_iso(),
-            "consecutive_failures": self.consecutive_failures,
-            "resume_ready": self.resume_ready,
-        }
-        payload.update(extra)
-        self.state_path.parent.mkdir(parents=True, exist_ok=True)
-        self.state_path.write_text(json.dumps(payload, indent=2))
+        extra.setdefault("hp_writer", self._hp.stats.as_dict())
+        extra.setdefault("prompt_cache", asdict(self.prompt_cache_stats))
+        extra.setdefault("token_cache", self.token_cache_stats.as_dict())
+        extra.setdefault("spawn", self.spawn_stats.as_dict())
+        self._store.write_state(
+            self.agent_name,
+            provider=self.agent_cfg.provider,
+            status=status,
+            updated_at=utc_now_iso(),
+            consecutive_failures=self.consecutive_failures,
+            resume_ready=self.resume_ready,
+            extra=extra,
+        )
+
+    def _emit(self, text: str) -> None:
+        self._out.write(text)
+        self._out.flush()
 
     def _log(self, message: str) -> None:
         ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{ts}] [{self.agent_name}] {message}", flush=True)
+        self._emit(f"[{ts}] [{self.agent_name}] {message}\n")
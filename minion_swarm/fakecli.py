@@ -0,0 +1,148 @@
+"""Fake provider CLI — synthetic Claude-style stream-json for load tests.
+
+Run as `python -m minion_swarm.fakecli` (the `fake` provider does this). It
+reads the prompt from stdin (or `-p PROMPT`) and writes exactly `--lines`
+stdout lines: a system init event, a cycle of text deltas, tool_use and
+tool_result messages and usage events, and a final result event carrying
+modelUsage. Compaction boundaries and oversized error lines replace regular
+lines at the configured rates, so the line count stays fixed.
+
+Every option defaults from a `MINION_SWARM_FAKE_*` environment variable so a
+daemon's provider command needs no extra flags; `minion-swarm bench` sets
+them for the supervisor it launches. With `MINION_SWARM_FAKE_LOG` set, each
+run appends `pickup <seconds>` for every `t=<unix time>` stamp found in its
+prompt, and `run <lines>` when it finishes.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+ENV_PREFIX = "MINION_SWARM_FAKE_"
+STAMP_PREFIX = "t="
+CONTEXT_WINDOW = 200_000
+
+
+def _env(name: str, default: Any) -> Any:
+    return type(default)(os.environ.get(ENV_PREFIX + name, default))
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="minion-swarm-fake", description=__doc__.splitlines()[0])
+    parser.add_argument("-p", "--prompt", default=None, help="prompt text (default: read stdin)")
+    parser.add_argument("--lines", type=int, default=_env("LINES", 50), help="stdout lines per run (min 2)")
+    parser.add_argument("--rate", type=float, default=_env("RATE", 0.0), help="lines per second, 0 = unthrottled")
+    parser.add_argument("--first-byte-ms", type=float, default=_env("FIRST_BYTE_MS", 0.0), help="delay before the first line")
+    parser.add_argument("--text-chars", type=int, default=_env("TEXT_CHARS", 80), help="chars per text delta")
+    parser.add_argument("--tool-result-bytes", type=int, default=_env("TOOL_RESULT_BYTES", 2048))
+    parser.add_argument("--compact-rate", type=float, default=_env("COMPACT_RATE", 0.0), help="per-line compaction probability")
+    parser.add_argument("--error-rate", type=float, default=_env("ERROR_RATE", 0.0), help="per-line large-error probability")
+    parser.add_argument("--error-bytes", type=int, default=_env("ERROR_BYTES", 64 * 1024))
+    parser.add_argument("--exit-code", type=int, default=_env("EXIT_CODE", 0))
+    parser.add_argument("--log", default=os.environ.get(ENV_PREFIX + "LOG"), help="append pickup/run records here")
+    # Flags a real provider command may carry; accepted and ignored
+    parser.add_argument("--output-format", default="stream-json")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+def _stamps(prompt: str) -> List[float]:
+    out = []
+    for token in prompt.split():
+        if token.startswith(STAMP_PREFIX):
+            try:
+                out.append(float(token[len(STAMP_PREFIX):]))
+            except ValueError:
+                continue
+    return out
+
+
+def _body_event(i: int, args: argparse.Namespace, rng: random.Random) -> Dict[str, Any]:
+    if args.compact_rate and rng.random() < args.compact_rate:
+        return {"type": "system", "subtype": "compact_boundary", "compact_metadata": {"trigger": "auto"}}
+    if args.error_rate and rng.random() < args.error_rate:
+        return {"type": "error", "message": "overloaded", "error": {"code": 529, "message": "overloaded " + "x" * args.error_bytes}}
+
+    step = i % 4
+    if step == 0:
+        return {
+            "type": "stream_event",
+            "event": {"type": "content_block_delta", "delta": {"type": "text_delta", "text": "lorem " * (args.text_chars // 6) + "\n"}},
+        }
+    if step == 1:
+        return {
+            "type": "assistant",
+            "message": {"content": [{"type": "tool_use", "id": f"toolu_{i}", "name": "Bash", "input": {"command": "ls"}}]},
+        }
+    if step == 2:
+        return {
+            "type": "user",
+            "message": {"content": [{"type": "tool_result", "tool_use_id": f"toolu_{i - 1}", "content": "y" * args.tool_result_bytes}]},
+        }
+    return {
+        "type": "assistant",
+        "message": {
+            "content": [{"type": "text", "text": "ok\n"}],
+            "usage": {"input_tokens": 3, "cache_read_input_tokens": 1000 + i, "output_tokens": 10},
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = _parse_args(argv)
+    started = time.time()
+    prompt = args.prompt if args.prompt is not None else sys.stdin.read()
+    if args.log:
+        with open(args.log, "a", encoding="utf-8") as fp:
+            fp.writelines(f"pickup {started - stamp:.6f}\n" for stamp in _stamps(prompt))
+
+    if args.first_byte_ms > 0:
+        time.sleep(args.first_byte_ms / 1000)
+
+    rng = random.Random()
+    interval = 1.0 / args.rate if args.rate > 0 else 0.0
+    lines = max(2, args.lines)
+    out = sys.stdout
+
+    def emit(event: Dict[str, Any]) -> None:
+        out.write(json.dumps(event, separators=(",", ":")) + "\n")
+        if interval:
+            out.flush()
+            time.sleep(interval)
+
+    emit({"type": "system", "subtype": "init", "model": args.model or "fake", "tools": ["Bash"]})
+    for i in range(lines - 2):
+        emit(_body_event(i, args, rng))
+    prompt_tokens = len(prompt) // 4
+    emit({
+        "type": "result",
+        "subtype": "success" if args.exit_code == 0 else "error",
+        "is_error": args.exit_code != 0,
+        "duration_ms": int((time.time() - started) * 1000),
+        "usage": {"input_tokens": prompt_tokens, "output_tokens": 10 * lines},
+        "modelUsage": {
+            args.model or "fake": {
+                "inputTokens": prompt_tokens,
+                "outputTokens": 10 * lines,
+                "cacheReadInputTokens": 1000,
+                "cacheCreationInputTokens": 0,
+                "contextWindow": CONTEXT_WINDOW,
+            }
+        },
+    })
+    out.flush()
+
+    if args.log:
+        with open(args.log, "a", encoding="utf-8") as fp:
+            fp.write(f"run {lines}\n")
+    return args.exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""Compact, token-budgeted history of recent agent turns.
+
+The buffer keeps parsed stream events in a condensed form — assistant text,
+one-line tool calls, truncated tool output — instead of raw stream-json, and
+renders them as a short transcript for re-injection after compaction.
+"""
+from __future__ import annotations
+
+import json
+import re
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from .stream import StreamEvent
+
+# Importance levels — lower is evicted first once outside the recent window.
+IMPORTANCE_TOOL_RESULT = 1
+IMPORTANCE_TOOL_CALL = 2
+IMPORTANCE_TEXT = 3
+
+TOOL_RESULT_KEEP_CHARS = 1_200   # head of tool output kept per result
+TOOL_INPUT_KEEP_CHARS = 240      # one-line tool call summary
+TEXT_KEEP_CHARS = 8_000          # cap for a single assistant text entry
+PROTECT_RECENT_ENTRIES = 8       # newest entries evicted only as a last resort
+
+_TOKEN_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_TOOL_INPUT_KEYS = ("command", "file_path", "path", "pattern", "url", "query", "description", "prompt")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count.
+
+    Counts letter runs (long words split every ~6 chars), digit runs (split
+    every 3 digits) and each punctuation/symbol/non-ASCII char, which tracks
+    Claude/GPT tokenizers far better than len/4 on code and JSON.
+    """
+    if not text:
+        return 0
+    total = 0
+    for piece in _TOKEN_RE.findall(text):
+        first = piece[0]
+        if first.isdigit():
+            total += (len(piece) + 2) // 3
+        elif first.isascii() and first.isalpha():
+            total += 1 + (len(piece) - 1) // 6
+        else:
+            total += 1
+    return total
+
+
+def _truncate(text: str, keep: int) -> str:
+    if len(text) <= keep:
+        return text
+    return f"{text[:keep]}… [{len(text) - keep} chars truncated]"
+
+
+@dataclass(slots=True)
+class HistoryEntry:
+    seq: int
+    role: str        # "assistant", "tool", "result", "error", "output"
+    text: str
+    tokens: int
+    importance: int
+
+    def render(self) -> str:
+        return f"[{self.role}] {self.text}"
+
+
+class RollingBuffer:
+    """Token-budgeted transcript of recent turns, evicted by importance.
+
+    Once over `max_tokens`, the oldest entry of the lowest importance level
+    is dropped first (tool output, then tool calls, then assistant text);
+    the newest `PROTECT_RECENT_ENTRIES` entries are only evicted when nothing
+    older remains.
+    """
+
+    def __init__(self, max_tokens: int) -> None:
+        self.max_tokens = max_tokens
+        self._entries: "OrderedDict[int, HistoryEntry]" = OrderedDict()
+        self._by_importance: Dict[int, Deque[int]] = {
+            IMPORTANCE_TOOL_RESULT: deque(),
+            IMPORTANCE_TOOL_CALL: deque(),
+            IMPORTANCE_TEXT: deque(),
+        }
+        self._seq = 0
+        self._total_tokens = 0
+
+    @property
+    def tokens(self) -> int:
+        return self._total_tokens
+
+    def append(self, event: StreamEvent) -> None:
+        for role, text, importance in self._condense(event):
+            self._add(role, text, importance)
+        self._evict()
+
+    def snapshot(self) -> str:
+        """Render the buffered history as a compact transcript."""
+        return "\n".join(entry.render() for entry in self._entries.values())
+
+    def __iter__(self) -> Iterator[HistoryEntry]:
+        return iter(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ── internals ──────────────────────────────────────────────────────────
+
+    def _add(self, role: str, text: str, importance: int) -> None:
+        if not text.strip():
+            return
+        last = next(reversed(self._entries.values()), None) if self._entries else None
+        if last is not None and last.role == role == "assistant" and len(last.text) + len(text) <= TEXT_KEEP_CHARS:
+            # Coalesce streamed text deltas into one entry
+            added = estimate_tokens(text)
+            last.text += text
+            last.tokens += added
+            self._total_tokens += added
+            return
+
+        self._seq += 1
+        entry = HistoryEntry(self._seq, role, text, estimate_tokens(text) + 2, importance)
+        self._entries[entry.seq] = entry
+        self._by_importance[importance].append(entry.seq)
+        self._total_tokens += entry.tokens
+
+    def _evict(self) -> None:
+        cutoff = self._seq - PROTECT_RECENT_ENTRIES
+        while self._total_tokens > self.max_tokens and self._entries:
+            victim: Optional[int] = None
+            for importance in sorted(self._by_importance):
+                queue = self._by_importance[importance]
+                while queue and queue[0] not in self._entries:
+                    queue.popleft()
+                if queue and queue[0] <= cutoff:
+                    victim = queue.popleft()
+                    break
+            if victim is None:
+                victim = next(iter(self._entries))
+            self._total_tokens -= self._entries.pop(victim).tokens
+
+    def _condense(self, event: StreamEvent) -> List[tuple[str, str, int]]:
+        """Reduce one event to (role, text, importance) entries."""
+        if event.kind == "raw":
+            text = event.raw.strip()
+            return [("output", _truncate(text, TOOL_RESULT_KEEP_CHARS), IMPORTANCE_TOOL_RESULT)] if text else []
+        if event.kind == "error":
+            return [("error", _truncate(event.render().strip(), TOOL_RESULT_KEEP_CHARS), IMPORTANCE_TEXT)]
+        if event.kind in {"system", "usage", "result"}:
+            return []
+
+        payload = event.payload
+        message = payload.get("message") if isinstance(payload, dict) else None
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, list):
+            if event.kind == "text":
+                return [("assistant", _truncate(event.text, TEXT_KEEP_CHARS), IMPORTANCE_TEXT)]
+            return []
+
+        out: List[tuple[str, str, int]] = []
+        for block in content:
+            if not isinstance(block, dict):
+                continue
+            block_type = block.get("type")
+            if block_type == "text" and isinstance(block.get("text"), str):
+                out.append(("assistant", _truncate(block["text"], TEXT_KEEP_CHARS), IMPORTANCE_TEXT))
+            elif block_type == "tool_use":
+                out.append(("tool", self._summarize_tool_call(block), IMPORTANCE_TOOL_CALL))
+            elif block_type == "tool_result":
+                body = _block_text(block.get("content"))
+                importance = IMPORTANCE_TOOL_CALL if block.get("is_error") else IMPORTANCE_TOOL_RESULT
+                role = "error" if block.get("is_error") else "result"
+                out.append((role, _truncate(body, TOOL_RESULT_KEEP_CHARS), importance))
+        return out
+
+    @staticmethod
+    def _summarize_tool_call(block: Dict[str, Any]) -> str:
+        name = block.get("name") or "tool"
+        tool_input = block.get("input")
+        if isinstance(tool_input, dict):
+            for key in _TOOL_INPUT_KEYS:
+                value = tool_input.get(key)
+                if isinstance(value, str) and value:
+                    return f"{name}: {_truncate(value, TOOL_INPUT_KEEP_CHARS)}"
+            summary = json.dumps(tool_input, ensure_ascii=False)
+        else:
+            summary = str(tool_input or "")
+        return f"{name}: {_truncate(summary, TOOL_INPUT_KEEP_CHARS)}"
+
+
+def _block_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            item.get("text", "") for item in content
+            if isinstance(item, dict) and isinstance(item.get("text"), str)
+        )
+    return ""
@@ -0,0 +1,76 @@
+"""Long-lived `minion update-hp` runner behind `HpHelper`.
+
+Run as `python -m minion_swarm.hphelper` with the comms env already set.
+It loads the `minion` console-script entry point from minion-comms once,
+then runs one CLI call per request line in this interpreter, so a
+daemon or supervisor pays for one interpreter start instead of one per HP
+write.
+
+Protocol, one line each way: the helper first prints `ready` (or
+`unavailable <reason>` and exits). Each request is a JSON array of CLI
+arguments, e.g. `["update-hp", "--agent", "w1", ...]`, and is answered
+with the exit code. The helper exits at stdin EOF.
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import sys
+from importlib.metadata import entry_points
+from typing import Any, Callable, List, Optional, TextIO
+
+ENTRY_POINT = "minion"
+
+
+def _load_cli() -> Callable[[], Any]:
+    found = entry_points(group="console_scripts", name=ENTRY_POINT)
+    if not found:
+        raise LookupError(f"no '{ENTRY_POINT}' console script in this environment")
+    return next(iter(found)).load()
+
+
+def _call(cli: Callable[[], Any], args: List[str]) -> int:
+    """Run the CLI as if from the command line; its output is discarded."""
+    saved_argv = sys.argv
+    sys.argv = [ENTRY_POINT, *args]
+    sink = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(sink), contextlib.redirect_stderr(sink):
+            cli()
+        return 0
+    except SystemExit as exc:
+        if exc.code is None:
+            return 0
+        return exc.code if isinstance(exc.code, int) else 1
+    except Exception:
+        return 1
+    finally:
+        sys.argv = saved_argv
+
+
+def main(stdin: Optional[TextIO] = None, stdout: Optional[TextIO] = None) -> int:
+    stdin = stdin or sys.stdin
+    stdout = stdout or sys.stdout
+    try:
+        cli = _load_cli()
+    except Exception as exc:
+        stdout.write(f"unavailable {exc!r}\n")
+        stdout.flush()
+        return 1
+    stdout.write("ready\n")
+    stdout.flush()
+    for line in stdin:
+        try:
+            args = [str(arg) for arg in json.loads(line)]
+        except (json.JSONDecodeError, TypeError):
+            code = 2
+        else:
+            code = _call(cli, args)
+        stdout.write(f"{code}\n")
+        stdout.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,269 @@
+"""Coalescing, off-critical-path HP/usage writer.
+
+The daemon used to await `minion update-hp` after boot and after every turn,
+so the next poll or invocation waited on a fresh interpreter and an SQLite
+write. `HpWriter.submit()` now only records the latest reading and returns;
+a background task on the daemon's loop performs the write. Readings that
+arrive while a write is in flight replace each other — session totals are
+cumulative, so only the newest one matters — and are counted as coalesced.
+
+Writes go to a long-lived `minion_swarm.hphelper` process (`HpHelper`),
+which runs minion-comms' `minion` CLI in-process, so no interpreter starts
+on the turn path. A supervisor shares one helper between all the agents it
+hosts; a standalone daemon's writer starts its own. Where that entry point
+is not importable from this environment (e.g. `minion` installed in a
+separate pipx venv), each write falls back to spawning `minion update-hp`.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from minion_comms.defaults import ENV_CLASS, ENV_DB_PATH, ENV_DOCS_DIR
+
+WRITE_TIMEOUT_SEC = 10.0
+HELPER_START_TIMEOUT_SEC = 30.0
+
+
+@dataclass
+class HpUpdate:
+    input_tokens: int
+    output_tokens: int
+    limit: int
+    turn_input: Optional[int] = None
+    turn_output: Optional[int] = None
+
+
+@dataclass
+class HpWriterStats:
+    submitted: int = 0
+    written: int = 0
+    coalesced: int = 0
+    failed: int = 0
+    spawned: int = 0  # `minion update-hp` processes started (helper unavailable)
+    last_write_ms: float = 0.0
+    max_write_ms: float = 0.0
+    total_write_ms: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        attempts = self.written + self.failed
+        data["avg_write_ms"] = round(self.total_write_ms / attempts, 1) if attempts else 0.0
+        for key in ("last_write_ms", "max_write_ms", "total_write_ms"):
+            data[key] = round(data[key], 1)
+        return data
+
+
+class HpHelper:
+    """One `minion_swarm.hphelper` process, shared by every writer on a loop.
+
+    Calls are serialized on a lock; the helper is started on first use and
+    restarted after it dies or falls out of step.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        docs_dir: Path,
+        log: Callable[[str], None],
+        timeout: float = WRITE_TIMEOUT_SEC,
+    ) -> None:
+        self.db_path = db_path
+        self.docs_dir = docs_dir
+        self.timeout = timeout
+        self._log = log
+        self._lock = asyncio.Lock()
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._unavailable = False
+
+    def env(self) -> Dict[str, str]:
+        env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
+        env[ENV_CLASS] = "lead"  # Daemon has permission to write HP
+        env[ENV_DB_PATH] = str(self.db_path)
+        env[ENV_DOCS_DIR] = str(self.docs_dir)
+        return env
+
+    async def call(self, args: List[str]) -> Optional[int]:
+        """Run one `minion` CLI call; None if the helper cannot run here."""
+        async with self._lock:
+            proc = await self._ensure()
+            if proc is None:
+                return None
+            assert proc.stdin is not None and proc.stdout is not None
+            try:
+                proc.stdin.write((json.dumps(args) + "\n").encode())
+                await proc.stdin.drain()
+                reply = await asyncio.wait_for(proc.stdout.readline(), timeout=self.timeout)
+                if not reply:
+                    raise RuntimeError("helper exited")
+                return int(reply)
+            except BaseException:
+                # Out of step or gone: drop it, the next call starts a fresh one
+                self._proc = None
+                await _reap(proc)
+                raise
+
+    async def close(self) -> None:
+        async with self._lock:
+            proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        if proc.stdin is not None:
+            proc.stdin.close()
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            await _reap(proc)
+
+    async def _ensure(self) -> Optional[asyncio.subprocess.Process]:
+        if self._proc is not None and self._proc.returncode is None:
+            return self._proc
+        self._proc = None
+        if self._unavailable:
+            return None
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "minion_swarm.hphelper",
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, env=self.env(),
+        )
+        assert proc.stdout is not None
+        try:
+            banner = (await asyncio.wait_for(proc.stdout.readline(), HELPER_START_TIMEOUT_SEC)).decode().strip()
+        except asyncio.TimeoutError:
+            banner = "unavailable (no banner)"
+        if banner != "ready":
+            await _reap(proc)
+            self._unavailable = True
+            self._log(f"update-hp: in-process helper {banner or 'exited'}; spawning `minion update-hp` per write")
+            return None
+        self._proc = proc
+        return proc
+
+
+async def _reap(proc: asyncio.subprocess.Process) -> None:
+    if proc.returncode is None:
+        proc.kill()
+    await proc.wait()
+
+
+class HpWriter:
+    """Single-slot background writer for one agent's HP readings.
+
+    Pass a shared `helper` to write through it; otherwise the writer starts
+    and owns one of its own.
+    """
+
+    def __init__(
+        self,
+        agent_name: str,
+        db_path: Path,
+        docs_dir: Path,
+        log: Callable[[str], None],
+        timeout: float = WRITE_TIMEOUT_SEC,
+        helper: Optional[HpHelper] = None,
+    ) -> None:
+        self.agent_name = agent_name
+        self.timeout = timeout
+        self.stats = HpWriterStats()
+
+        self._log = log
+        self._pending: Optional[HpUpdate] = None
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._owns_helper = helper is None
+        self._helper = helper if helper is not None else HpHelper(db_path, docs_dir, log, timeout)
+
+    def submit(self, update: HpUpdate) -> None:
+        """Queue a reading without waiting. Must be called on the daemon loop."""
+        self.stats.submitted += 1
+        if self._pending is not None:
+            self.stats.coalesced += 1
+        self._pending = update
+        self._idle.clear()
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=f"hp-writer-{self.agent_name}")
+
+    async def close(self, timeout: float = WRITE_TIMEOUT_SEC) -> None:
+        """Flush the last pending reading (bounded by `timeout`) and stop."""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._log("update-hp: gave up flushing pending HP on shutdown")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._owns_helper:
+            await self._helper.close()
+        stats = self.stats
+        self._log(
+            f"update-hp: {stats.written} written, {stats.coalesced} coalesced, {stats.failed} failed, "
+            f"{stats.spawned} spawned, avg {stats.as_dict()['avg_write_ms']}ms, max {stats.max_write_ms:.0f}ms"
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            update, self._pending = self._pending, None
+            if update is not None:
+                await self._write(update)
+            if self._pending is None:
+                self._idle.set()
+
+    async def _write(self, update: HpUpdate) -> None:
+        args = [
+            "update-hp",
+            "--agent", self.agent_name,
+            "--input-tokens", str(update.input_tokens),
+            "--output-tokens", str(update.output_tokens),
+            "--limit", str(update.limit),
+        ]
+        if update.turn_input is not None:
+            args.extend(["--turn-input", str(update.turn_input)])
+        if update.turn_output is not None:
+            args.extend(["--turn-output", str(update.turn_output)])
+
+        started = time.perf_counter()
+        try:
+            code = await self._helper.call(args)
+            if code is None:
+                code = await self._spawn(args)
+            if code != 0:
+                raise RuntimeError(f"exit {code}")
+            self.stats.written += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            self.stats.failed += 1
+            self._log(f"update-hp failed: {exc!r}")
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.stats.last_write_ms = elapsed_ms
+            self.stats.max_write_ms = max(self.stats.max_write_ms, elapsed_ms)
+            self.stats.total_write_ms += elapsed_ms
+
+    async def _spawn(self, args: List[str]) -> int:
+        proc = await asyncio.create_subprocess_exec(
+            "minion", *args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=self._helper.env(),
+        )
+        self.stats.spawned += 1
+        try:
+            return await asyncio.wait_for(proc.wait(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
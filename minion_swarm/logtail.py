@@ -0,0 +1,196 @@
+"""Tail and follow several agent logs as one timestamp-ordered stream.
+
+`LogFollower.tail` reads the last N lines of each log by seeking backwards
+from the end in `TAIL_BLOCK` steps, so a multi-GB log costs a few reads.
+`LogFollower.follow` then parks on watchdog/inotify events for the log
+files (falling back to polling without inotify) and prints whatever each
+wake appended. Lines read together are merged by their `[YYYY-mm-dd
+HH:MM:SS]` stamp; provider output lines carry no stamp and sort with the
+last stamped line of their own log. Truncated or replaced logs are re-read
+from the start, and logs that do not exist yet are picked up on creation.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+TAIL_BLOCK = 64 * 1024
+INOTIFY_SAFETY_INTERVAL_SEC = 2.0  # re-stat even with inotify (missed events, NFS)
+POLLING_INTERVAL_SEC = 0.5         # without inotify
+PARTIAL_FLUSH_SEC = 1.0            # print an unterminated line after this long
+
+_STAMP = re.compile(r"\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] ")
+
+# (agent, line) in display order
+LogLine = Tuple[str, str]
+
+
+def tail_lines(fp: IO[bytes], count: int) -> List[bytes]:
+    """The last `count` lines of a file, read backwards from its end."""
+    end = fp.seek(0, os.SEEK_END)
+    if count <= 0 or end == 0:
+        return []
+    pos = end
+    chunks: List[bytes] = []
+    newlines = 0
+    # One extra newline marks the start of the first wanted line; a final
+    # newline at EOF terminates the last line rather than starting a new one
+    needed = count + 1
+    while pos > 0 and newlines < needed:
+        step = min(TAIL_BLOCK, pos)
+        pos -= step
+        fp.seek(pos)
+        chunk = fp.read(step)
+        chunks.append(chunk)
+        newlines += chunk.count(b"\n")
+    data = b"".join(reversed(chunks))
+    fp.seek(end)
+    return data.splitlines(keepends=True)[-count:]
+
+
+class _LogChangeHandler(FileSystemEventHandler):
+    def __init__(self, paths: set[str], wake: threading.Event) -> None:
+        super().__init__()
+        self._paths = paths
+        self._wake = wake
+
+    def _maybe_wake(self, path: Any) -> None:
+        if os.fsdecode(path) in self._paths:
+            self._wake.set()
+
+    def on_modified(self, event: FileSystemEvent) -> None:
+        self._maybe_wake(event.src_path)
+
+    def on_created(self, event: FileSystemEvent) -> None:
+        self._maybe_wake(event.src_path)
+
+    def on_moved(self, event: FileSystemEvent) -> None:
+        self._maybe_wake(event.dest_path)
+
+
+@dataclass
+class _Source:
+    agent: str
+    path: Path
+    fp: Optional[IO[bytes]] = None
+    inode: int = 0
+    pos: int = 0
+    partial: bytes = b""
+    partial_since: float = 0.0
+    stamp: str = ""  # last timestamp seen, inherited by unstamped lines
+
+
+class LogFollower:
+    """Merged tail/follow over a set of agent logs."""
+
+    def __init__(self, logs: Dict[str, Path]) -> None:
+        self._sources = [_Source(agent, path) for agent, path in logs.items()]
+        self._wake = threading.Event()
+
+    def close(self) -> None:
+        for source in self._sources:
+            if source.fp is not None:
+                source.fp.close()
+                source.fp = None
+
+    def tail(self, count: int) -> List[LogLine]:
+        """The last `count` lines across all logs, and position every log at its end."""
+        batches = []
+        for source in self._sources:
+            if not self._open(source):
+                continue
+            lines = tail_lines(source.fp, count)  # type: ignore[arg-type]
+            source.pos = source.fp.tell()  # type: ignore[union-attr]
+            batches.append((source, [line.decode("utf-8", errors="replace") for line in lines]))
+        merged = self._merge(batches)
+        return merged[-count:] if count > 0 else []
+
+    def follow(self, emit: Callable[[List[LogLine]], None], stop: Optional[threading.Event] = None) -> None:
+        """Emit appended lines until `stop` is set (or forever)."""
+        observer = self._start_observer()
+        interval = INOTIFY_SAFETY_INTERVAL_SEC if observer is not None else POLLING_INTERVAL_SEC
+        try:
+            while stop is None or not stop.is_set():
+                pending = any(source.partial for source in self._sources)
+                self._wake.wait(min(interval, PARTIAL_FLUSH_SEC) if pending else interval)
+                self._wake.clear()
+                lines = self.read_new()
+                if lines:
+                    emit(lines)
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join(timeout=5.0)
+
+    def read_new(self) -> List[LogLine]:
+        """Lines appended to any log since the last read, merged by timestamp."""
+        now = time.monotonic()
+        batches = []
+        for source in self._sources:
+            if not self._open(source):
+                continue
+            source.fp.seek(source.pos)  # type: ignore[union-attr]
+            data = source.fp.read()  # type: ignore[union-attr]
+            source.pos += len(data)
+            if data and not source.partial:
+                source.partial_since = now
+            data = source.partial + data
+            cut = data.rfind(b"\n") + 1
+            complete, source.partial = data[:cut], data[cut:]
+            if source.partial and now - source.partial_since >= PARTIAL_FLUSH_SEC:
+                complete, source.partial = data + b"\n", b""
+            if complete:
+                batches.append((source, complete.decode("utf-8", errors="replace").splitlines(keepends=True)))
+        return self._merge(batches)
+
+    def _open(self, source: _Source) -> bool:
+        """Open (or re-open after truncation/replacement) one log; False if absent."""
+        try:
+            st = source.path.stat()
+        except OSError:
+            return source.fp is not None  # unlinked: drain what is still open
+        if source.fp is not None and st.st_ino == source.inode and st.st_size >= source.pos:
+            return True
+        if source.fp is not None:
+            source.fp.close()
+        try:
+            source.fp = source.path.open("rb")
+        except OSError:
+            source.fp = None
+            return False
+        source.inode = st.st_ino
+        source.pos = 0
+        source.partial = b""
+        return True
+
+    def _start_observer(self) -> Optional[Any]:
+        paths = {str(source.path) for source in self._sources}
+        try:
+            observer = Observer()
+            handler = _LogChangeHandler(paths, self._wake)
+            for parent in {source.path.parent for source in self._sources}:
+                observer.schedule(handler, str(parent), recursive=False)
+            observer.start()
+            return observer
+        except Exception:
+            return None  # no inotify — poll
+
+    @staticmethod
+    def _merge(batches: List[Tuple[_Source, List[str]]]) -> List[LogLine]:
+        keyed = []
+        for order, (source, lines) in enumerate(batches):
+            for seq, line in enumerate(lines):
+                match = _STAMP.match(line)
+                if match:
+                    source.stamp = match.group(1)
+                keyed.append((source.stamp, order, seq, source.agent, line))
+        keyed.sort()
+        return [(agent, line) for _, _, _, agent, line in keyed]
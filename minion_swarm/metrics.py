@@ -0,0 +1,244 @@
+"""Prometheus-style metrics for the daemons, served from `.minion-swarm/metrics/`.
+
+Every daemon process (a supervisor, or a daemon launched by `start`) keeps
+one `MetricsRegistry` and serves it in the Prometheus text format on a unix
+socket `.minion-swarm/metrics/<pid>.sock`; a supervisor also listens on
+127.0.0.1:`metrics_port` when that is configured. `minion-swarm metrics`
+scrapes every live socket and prints the merged exposition.
+
+Daemons feed the registry through an `AgentMetrics` view that carries the
+`agent` label. The families are fixed in `_FAMILIES` below.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import socket
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+METRICS_DIR = "metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SCRAPE_TIMEOUT_SEC = 2.0
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+_PREFIX = "minion_swarm_"
+_FAMILIES: Tuple[Tuple[str, str, Tuple[str, ...], str], ...] = (
+    # (name, type, labels besides `agent`, help)
+    ("invocations_total", "counter", ("provider", "exit_code"), "Provider CLI invocations by exit code."),
+    ("timeouts_total", "counter", (), "Invocations killed by the no-output timeout."),
+    ("compactions_total", "counter", (), "Context compaction markers seen in provider output."),
+    ("tokens_total", "counter", ("kind",), "Tokens reported by the provider (input, output, cache_read, cache_creation)."),
+    ("context_tokens", "gauge", (), "Session context tokens last reported to HP."),
+    ("context_limit_tokens", "gauge", (), "Context window used for HP."),
+    ("queue_depth", "gauge", (), "Messages picked up or still waiting for the agent."),
+    ("poll_wait_seconds", "histogram", ("result",), "Time spent waiting for inbox work."),
+    ("spawn_seconds", "histogram", ("mode",), "Time to start the provider process (warm: take the spare)."),
+    ("first_output_seconds", "histogram", ("mode",), "Time from spawn to the first byte of provider output."),
+    ("invocation_seconds", "histogram", (), "Wall time of one provider invocation."),
+)
+
+
+@dataclass
+class _Family:
+    name: str
+    kind: str
+    labels: Tuple[str, ...]
+    help: str
+    values: Dict[Tuple[str, ...], float] = field(default_factory=dict)
+    histograms: Dict[Tuple[str, ...], List[float]] = field(default_factory=dict)  # bucket counts + [sum, count]
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms keyed by label values; thread-safe."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DURATION_BUCKETS) -> None:
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._families = {
+            name: _Family(_PREFIX + name, kind, ("agent",) + labels, help_text)
+            for name, kind, labels, help_text in _FAMILIES
+        }
+
+    def for_agent(self, agent: str) -> "AgentMetrics":
+        return AgentMetrics(self, agent)
+
+    def inc(self, name: str, labels: Tuple[str, ...], value: float = 1.0) -> None:
+        family = self._families[name]
+        with self._lock:
+            family.values[labels] = family.values.get(labels, 0.0) + value
+
+    def set(self, name: str, labels: Tuple[str, ...], value: float) -> None:
+        family = self._families[name]
+        with self._lock:
+            family.values[labels] = float(value)
+
+    def observe(self, name: str, labels: Tuple[str, ...], value: float) -> None:
+        family = self._families[name]
+        with self._lock:
+            counts = family.histograms.get(labels)
+            if counts is None:
+                counts = family.histograms[labels] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def render(self) -> str:
+        """The registry in the Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for family in self._families.values():
+                lines.append(f"# HELP {family.name} {family.help}")
+                lines.append(f"# TYPE {family.name} {family.kind}")
+                for key, value in sorted(family.values.items()):
+                    lines.append(f"{family.name}{_labels(family.labels, key)} {_number(value)}")
+                for key, counts in sorted(family.histograms.items()):
+                    for bound, count in zip(self.buckets, counts):
+                        le = _labels(family.labels + ("le",), key + (_number(bound),))
+                        lines.append(f"{family.name}_bucket{le} {_number(count)}")
+                    lines.append(f"{family.name}_bucket{_labels(family.labels + ('le',), key + ('+Inf',))} {_number(counts[-1])}")
+                    lines.append(f"{family.name}_sum{_labels(family.labels, key)} {_number(counts[-2])}")
+                    lines.append(f"{family.name}_count{_labels(family.labels, key)} {_number(counts[-1])}")
+        return "\n".join(lines) + "\n"
+
+
+class AgentMetrics:
+    """One agent's handle on a shared registry; label values after `agent` are positional."""
+
+    def __init__(self, registry: MetricsRegistry, agent: str) -> None:
+        self.registry = registry
+        self.agent = agent
+
+    def inc(self, name: str, *labels: object, value: float = 1.0) -> None:
+        self.registry.inc(name, self._key(labels), value)
+
+    def set(self, name: str, value: float, *labels: object) -> None:
+        self.registry.set(name, self._key(labels), value)
+
+    def observe(self, name: str, value: float, *labels: object) -> None:
+        self.registry.observe(name, self._key(labels), value)
+
+    def _key(self, labels: Tuple[object, ...]) -> Tuple[str, ...]:
+        return (self.agent,) + tuple(str(label) for label in labels)
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+# ── serving ──────────────────────────────────────────────────────────────────
+
+class MetricsServer:
+    """Minimal HTTP/1.0 `GET /metrics` endpoint on a unix socket and optional TCP port."""
+
+    def __init__(self, registry: MetricsRegistry, runtime_dir: Path, port: Optional[int] = None) -> None:
+        self.registry = registry
+        self.socket_path = runtime_dir / METRICS_DIR / f"{os.getpid()}.sock"
+        self.port = port
+        self._servers: List[asyncio.AbstractServer] = []
+
+    async def start(self, log: Callable[[str], None]) -> None:
+        try:
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            self.socket_path.unlink(missing_ok=True)
+            self._servers.append(await asyncio.start_unix_server(self._handle, path=str(self.socket_path)))
+            log(f"metrics: serving on {self.socket_path}")
+        except OSError as exc:
+            log(f"metrics: unix socket unavailable ({exc})")
+        if self.port:
+            try:
+                self._servers.append(await asyncio.start_server(self._handle, "127.0.0.1", self.port))
+                log(f"metrics: serving on http://127.0.0.1:{self.port}/metrics")
+            except OSError as exc:
+                log(f"metrics: port {self.port} unavailable ({exc})")
+
+    async def close(self) -> None:
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        self._servers.clear()
+        self.socket_path.unlink(missing_ok=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=SCRAPE_TIMEOUT_SEC)
+            while (await asyncio.wait_for(reader.readline(), timeout=SCRAPE_TIMEOUT_SEC)).strip():
+                pass  # headers are not used
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/", "/metrics"):
+                status, body = "200 OK", self.registry.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.0 {status}\r\nContent-Type: {CONTENT_TYPE}\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+# ── scraping ─────────────────────────────────────────────────────────────────
+
+def scrape_sockets(runtime_dir: Path) -> Iterator[Tuple[Path, str]]:
+    """(socket, exposition) for each live metrics socket; stale sockets are removed."""
+    for path in sorted((runtime_dir / METRICS_DIR).glob("*.sock")):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(SCRAPE_TIMEOUT_SEC)
+        try:
+            sock.connect(str(path))
+            sock.sendall(b"GET /metrics HTTP/1.0\r\n\r\n")
+            chunks = []
+            while chunk := sock.recv(65536):
+                chunks.append(chunk)
+        except (ConnectionRefusedError, FileNotFoundError):
+            path.unlink(missing_ok=True)  # owner died without cleaning up
+            continue
+        except OSError:
+            continue
+        finally:
+            sock.close()
+        head, _, body = b"".join(chunks).partition(b"\r\n\r\n")
+        if head.startswith(b"HTTP/1.0 200"):
+            yield path, body.decode("utf-8", errors="replace")
+
+
+def merge_expositions(texts: List[str]) -> str:
+    """Merge per-process expositions so each metric family appears once."""
+    families: Dict[str, List[str]] = {}
+    headers: Dict[str, List[str]] = {}
+    for text in texts:
+        current = ""
+        for line in text.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                current = line.split()[2]
+                if current not in headers:
+                    headers[current] = []
+                    families[current] = []
+                if len(headers[current]) < 2:
+                    headers[current].append(line)
+            elif line and current:
+                families[current].append(line)
+    out: List[str] = []
+    for name, header in headers.items():
+        out.extend(header)
+        out.extend(families[name])
+    return "\n".join(out) + "\n" if out else ""
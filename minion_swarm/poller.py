@@ -0,0 +1,302 @@
+"""In-process inbox change detection for poll mode.
+
+Instead of running `minion poll --interval 5 --timeout 30` in a loop, the
+daemon parks on `InboxPoller.wait_for_work()`. The poller holds one
+read-only SQLite connection to the comms DB and wakes when the DB or its WAL
+file changes (watchdog/inotify), confirming real commits with
+`PRAGMA data_version`.
+
+Each commit is probed for the agent's stand-down flag, unread direct
+messages and broadcasts, and changes to the `tasks` table. Unread messages
+are consumed in-process by `consume()` on a second, writable connection, so
+a pickup never starts an interpreter. Task changes, the heartbeat and an
+unknown schema still run `minion poll` once, which owns the task listing
+and any stand-down signal this module does not recognise.
+
+Probing uses the `messages`/`broadcast_reads`/`tasks`/`flags` tables (and
+`CommsWatcher`'s `broadcast_watermarks`) when present; on an unknown schema
+any committed change counts as work.
+"""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
+
+DEFAULT_HEARTBEAT_SEC = 120.0
+INOTIFY_SAFETY_INTERVAL_SEC = 10.0   # data_version re-check even with inotify
+POLLING_INTERVAL_SEC = 1.0           # data_version polling without inotify
+MIN_BLIND_CONSUME_INTERVAL_SEC = 1.0  # unknown schema: rate-limit consumes
+WAKE_RECHECK_SEC = 0.05              # WAL write can land before its commit is visible
+STAND_DOWN_FLAG = "stand_down"       # `flags` row set when the lead dismisses the party
+CONSUME_COLUMNS = frozenset({"id", "from_agent", "to_agent", "content", "read_flag"})
+
+# Why `wait_for_work` returned: unread messages to `consume()`, something
+# only `minion poll` can hand out (tasks, heartbeat, unknown schema), the
+# stand-down flag, or a stop request.
+PollWake = Literal["inbox", "poll", "stand_down", "stopped"]
+
+
+class _DbChangeHandler(FileSystemEventHandler):
+    def __init__(self, names: set[str], wake: Any) -> None:
+        super().__init__()
+        self._names = names
+        self._wake = wake
+
+    def _maybe_wake(self, path: str) -> None:
+        if Path(path).name in self._names:
+            self._wake()
+
+    def on_modified(self, event: FileSystemEvent) -> None:
+        self._maybe_wake(event.src_path)
+
+    def on_created(self, event: FileSystemEvent) -> None:
+        self._maybe_wake(event.src_path)
+
+    def on_moved(self, event: FileSystemEvent) -> None:
+        self._maybe_wake(event.dest_path)
+
+
+class InboxPoller:
+    def __init__(self, agent_name: str, db_path: Path, heartbeat_sec: float = DEFAULT_HEARTBEAT_SEC) -> None:
+        self.agent_name = agent_name
+        self.db_path = db_path.expanduser().resolve()
+        self.heartbeat_sec = heartbeat_sec
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._writer: Optional[sqlite3.Connection] = None
+        self._schema: Optional[dict[str, set[str]]] = None
+        self._seen_version: Optional[int] = None
+        self._tasks_sig: Optional[Tuple[Any, ...]] = None
+        self._last_consume = 0.0
+
+        self._observer: Optional[Any] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake = asyncio.Event()
+
+    # ── lifecycle ──────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        names = {self.db_path.name, f"{self.db_path.name}-wal", f"{self.db_path.name}-journal"}
+        try:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            observer = Observer()
+            observer.schedule(_DbChangeHandler(names, self._wake_threadsafe), str(self.db_path.parent), recursive=False)
+            observer.start()
+            self._observer = observer
+        except Exception:
+            self._observer = None  # no inotify — fall back to data_version polling
+
+    def stop(self) -> None:
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5.0)
+            self._observer = None
+        for conn in (self._conn, self._writer):
+            if conn is not None:
+                conn.close()
+        self._conn = None
+        self._writer = None
+
+    def _wake_threadsafe(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    # ── waiting ────────────────────────────────────────────────────────────
+
+    async def wait_for_work(self, stop_event: asyncio.Event) -> PollWake:
+        """Block until there is likely work for this agent, or a stand-down."""
+        self.start()
+        loop = asyncio.get_running_loop()
+        heartbeat_at = loop.time() + self.heartbeat_sec
+        interval = INOTIFY_SAFETY_INTERVAL_SEC if self._observer is not None else POLLING_INTERVAL_SEC
+        woken = False
+
+        while not stop_event.is_set():
+            self._wake.clear()
+            wake = self._check()
+            if wake is None and loop.time() >= heartbeat_at:
+                wake = "poll"
+            if wake is not None:
+                self._last_consume = time.monotonic()
+                return wake
+            wait = WAKE_RECHECK_SEC if woken else interval
+            timeout = max(0.0, min(wait, heartbeat_at - loop.time()))
+            await self._wait_any(self._wake, stop_event, timeout)
+            woken = self._wake.is_set()
+        return "stopped"
+
+    @staticmethod
+    async def _wait_any(a: asyncio.Event, b: asyncio.Event, timeout: float) -> None:
+        waiters = [asyncio.ensure_future(a.wait()), asyncio.ensure_future(b.wait())]
+        try:
+            await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for w in waiters:
+                w.cancel()
+
+    # ── probing ────────────────────────────────────────────────────────────
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            if not self.db_path.exists():
+                return None
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=0.2, check_same_thread=False)
+            self._schema = {
+                table: {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+                for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+            }
+            self._conn = conn
+        return self._conn
+
+    def _check(self) -> Optional[PollWake]:
+        try:
+            conn = self._connect()
+            if conn is None:
+                return None
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._seen_version:
+                return None
+            first_check = self._seen_version is None
+            self._seen_version = version
+            return self._probe(conn, first_check)
+        except sqlite3.Error:
+            # Locked or replaced DB — reopen next time and let `minion poll` decide
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._seen_version = None
+            return "poll"
+
+    def _probe(self, conn: sqlite3.Connection, first_check: bool) -> Optional[PollWake]:
+        schema = self._schema or {}
+        if self._stand_down(conn, schema):
+            return "stand_down"
+        messages = schema.get("messages", set())
+        if not {"to_agent", "read_flag"} <= messages:
+            # Unknown schema: any commit by someone else may be work for us
+            if first_check or time.monotonic() - self._last_consume >= MIN_BLIND_CONSUME_INTERVAL_SEC:
+                return "poll"
+            return None
+
+        pending = conn.execute(
+            "SELECT EXISTS(SELECT 1 FROM messages WHERE to_agent = ? AND read_flag = 0)",
+            (self.agent_name,),
+        ).fetchone()[0]
+        if not pending and "broadcast_reads" in schema:
+            # Broadcasts at or below a CommsWatcher watermark are read
+            watermark = 0
+            if "broadcast_watermarks" in schema:
+                row = conn.execute(
+                    "SELECT last_message_id FROM broadcast_watermarks WHERE agent_name = ?",
+                    (self.agent_name,),
+                ).fetchone()
+                watermark = int(row[0]) if row else 0
+            pending = conn.execute(
+                """
+                SELECT EXISTS(
+                    SELECT 1 FROM messages m
+                    WHERE m.to_agent = 'all' AND m.id > ? AND NOT EXISTS (
+                        SELECT 1 FROM broadcast_reads br
+                        WHERE br.agent_name = ? AND br.message_id = m.id
+                    )
+                )
+                """,
+                (watermark, self.agent_name),
+            ).fetchone()[0]
+
+        tasks_changed = False
+        if "tasks" in schema:
+            sig = tuple(conn.execute("SELECT COUNT(*), MAX(rowid) FROM tasks").fetchone())
+            tasks_changed = self._tasks_sig is not None and sig != self._tasks_sig
+            self._tasks_sig = sig
+
+        if tasks_changed:
+            return "poll"  # `minion poll` lists the tasks; it consumes messages too
+        if pending:
+            return "inbox" if CONSUME_COLUMNS <= messages else "poll"
+        return None
+
+    def _stand_down(self, conn: sqlite3.Connection, schema: Dict[str, set[str]]) -> bool:
+        if not {"key", "value"} <= schema.get("flags", set()):
+            return False
+        row = conn.execute("SELECT value FROM flags WHERE key = ?", (STAND_DOWN_FLAG,)).fetchone()
+        return row is not None and str(row[0]).strip().lower() not in {"", "0", "false"}
+
+    # ── consuming ──────────────────────────────────────────────────────────
+
+    def consume(self) -> List[Dict[str, Any]]:
+        """Take every unread message for this agent, oldest first, in one transaction.
+
+        Direct messages get `read_flag = 1`; broadcasts get a
+        `broadcast_reads` row, as `minion poll` records them. Returns them in
+        `minion poll`'s JSON shape. Blocking; run it off the event loop.
+        """
+        conn = self._writer_conn()
+        schema = self._schema or {}
+        watermark_sql = "0"
+        if "broadcast_watermarks" in schema:
+            watermark_sql = "COALESCE((SELECT last_message_id FROM broadcast_watermarks WHERE agent_name = :agent), 0)"
+        broadcasts = ""
+        if "broadcast_reads" in schema:
+            broadcasts = f"""
+                UNION ALL
+                SELECT m.id, m.from_agent, m.to_agent, m.content, 1 AS is_broadcast
+                FROM messages m
+                WHERE m.to_agent = 'all' AND m.id > {watermark_sql} AND NOT EXISTS (
+                    SELECT 1 FROM broadcast_reads br
+                    WHERE br.agent_name = :agent AND br.message_id = m.id
+                )
+            """
+        now = datetime.now(timezone.utc).isoformat()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT id, from_agent, to_agent, content, 0 AS is_broadcast
+                FROM messages WHERE to_agent = :agent AND read_flag = 0
+                {broadcasts}
+                ORDER BY id ASC
+                """,
+                {"agent": self.agent_name},
+            ).fetchall()
+            direct = [(row[0],) for row in rows if not row[4]]
+            read = [(self.agent_name, row[0]) for row in rows if row[4]]
+            if direct:
+                conn.executemany("UPDATE messages SET read_flag = 1 WHERE id = ?", direct)
+            if read:
+                conn.executemany("INSERT OR IGNORE INTO broadcast_reads (agent_name, message_id) VALUES (?, ?)", read)
+            if rows and {"name", "last_seen", "last_inbox_check"} <= schema.get("agents", set()):
+                conn.execute(
+                    "UPDATE agents SET last_seen = ?, last_inbox_check = ? WHERE name = ?",
+                    (now, now, self.agent_name),
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return [
+            {"id": row[0], "from_agent": row[1], "to_agent": row[2], "content": row[3]}
+            for row in rows
+        ]
+
+    def _writer_conn(self) -> sqlite3.Connection:
+        if self._writer is None:
+            if not self.db_path.exists():
+                raise sqlite3.OperationalError(f"comms DB not found: {self.db_path}")
+            # mode=rw never creates the DB; autocommit so BEGIN IMMEDIATE is ours
+            self._writer = sqlite3.connect(
+                f"file:{self.db_path}?mode=rw", uri=True, timeout=5.0,
+                check_same_thread=False, isolation_level=None,
+            )
+        return self._writer
@@ -0,0 +1,164 @@
+"""Provider CLI start-up: prepared spawn environment, warm spare, first-byte stats.
+
+Cold start of a provider CLI (runtime boot, config and auth load) dominates
+short turns. Two measures, both prepared while the agent is idle:
+
+- `SpawnEnv` builds what every invocation needs — the child env dict, cwd
+  and resolved executable paths — once, instead of on each turn.
+- `WarmSpare` (`spawn_mode: warm`) keeps one provider process pre-spawned
+  with a stdin pipe, for providers that take the prompt on stdin. The CLI
+  boots and parks reading fd 0; the next turn writes the prompt and closes
+  the pipe. A spare whose command no longer matches (e.g. the resume
+  decision flipped), that exited, or that is too old is discarded.
+
+`SpawnStats` records spawn-to-first-byte latency per start mode.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import subprocess
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+
+WARM_SPARE_MAX_AGE_SEC = 900.0
+
+
+@dataclass
+class FirstByteStats:
+    runs: int = 0
+    total_ms: float = 0.0
+    last_ms: float = 0.0
+    min_ms: float = 0.0
+    max_ms: float = 0.0
+
+    def add(self, ms: float) -> None:
+        self.min_ms = ms if self.runs == 0 else min(self.min_ms, ms)
+        self.max_ms = max(self.max_ms, ms)
+        self.runs += 1
+        self.total_ms += ms
+        self.last_ms = ms
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = {k: round(v, 1) if isinstance(v, float) else v for k, v in asdict(self).items()}
+        data["avg_ms"] = round(self.total_ms / self.runs, 1) if self.runs else 0.0
+        return data
+
+
+@dataclass
+class SpawnStats:
+    """Spawn-to-first-byte latency of provider runs, split by start mode."""
+    cold: FirstByteStats = field(default_factory=FirstByteStats)
+    warm: FirstByteStats = field(default_factory=FirstByteStats)
+    warm_discarded: int = 0
+
+    def record(self, mode: str, ms: float) -> None:
+        (self.warm if mode == "warm" else self.cold).add(ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "cold": self.cold.as_dict(),
+            "warm": self.warm.as_dict(),
+            "warm_discarded": self.warm_discarded,
+        }
+
+
+class SpawnEnv:
+    """Child env, cwd and executable paths, computed once per daemon."""
+
+    def __init__(self, cwd: Path, overrides: Mapping[str, str]) -> None:
+        # Strip CLAUDECODE env var so nested claude sessions don't refuse to start
+        env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
+        env.update(overrides)
+        self.env = env
+        self.cwd = str(cwd)
+        self._exe: Dict[str, str] = {}
+
+    def resolve(self, cmd: List[str]) -> List[str]:
+        """`cmd` with its executable replaced by the cached PATH lookup."""
+        exe = self._exe.get(cmd[0])
+        if exe is None:
+            exe = shutil.which(cmd[0], path=self.env.get("PATH")) or cmd[0]
+            self._exe[cmd[0]] = exe
+        return [exe, *cmd[1:]]
+
+    def forget(self, name: str) -> None:
+        self._exe.pop(name, None)
+
+    async def spawn(self, cmd: List[str], stdin: Any) -> asyncio.subprocess.Process:
+        return await asyncio.create_subprocess_exec(
+            *self.resolve(cmd),
+            cwd=self.cwd,
+            stdin=stdin,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            env=self.env,
+        )
+
+
+class WarmSpare:
+    """At most one pre-spawned provider process, parked on a stdin pipe."""
+
+    def __init__(self, spawn_env: SpawnEnv, stats: SpawnStats, max_age_sec: float = WARM_SPARE_MAX_AGE_SEC) -> None:
+        self.spawn_env = spawn_env
+        self.stats = stats
+        self.max_age_sec = max_age_sec
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._cmd: Optional[List[str]] = None
+        self._spawned_at = 0.0
+
+    async def fill(self, cmd: List[str]) -> bool:
+        """Make sure a live spare for `cmd` exists; True if one was started."""
+        if self._usable(cmd):
+            return False
+        await self.discard()
+        try:
+            self._proc = await self.spawn_env.spawn(cmd, stdin=subprocess.PIPE)
+        except Exception:
+            self._proc = None
+            return False
+        self._cmd = list(cmd)
+        self._spawned_at = time.monotonic()
+        return True
+
+    async def take(self, cmd: List[str]) -> Optional[asyncio.subprocess.Process]:
+        """Hand over the spare if it was spawned for `cmd` and is still fresh."""
+        if self._proc is None:
+            return None
+        if not self._usable(cmd):
+            await self.discard()
+            return None
+        proc = self._proc
+        self._proc = None
+        self._cmd = None
+        return proc
+
+    async def discard(self) -> None:
+        """Drop a spare that can no longer be used (counted in the stats)."""
+        if self._proc is not None:
+            self.stats.warm_discarded += 1
+        await self.close()
+
+    async def close(self) -> None:
+        proc = self._proc
+        self._proc = None
+        self._cmd = None
+        if proc is None:
+            return
+        if proc.returncode is None:
+            proc.kill()
+        try:
+            await asyncio.wait_for(proc.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            pass
+
+    def _usable(self, cmd: List[str]) -> bool:
+        return (
+            self._proc is not None
+            and self._proc.returncode is None
+            and self._cmd == list(cmd)
+            and time.monotonic() - self._spawned_at < self.max_age_sec
+        )
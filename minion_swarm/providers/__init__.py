@@ -1,9 +1,10 @@
 """Provider registry — maps provider name to concrete BaseProvider subclass."""
 from __future__ import annotations
 
-from .base import BaseProvider
+from .base import BaseProvider, PromptTransport
 from .claude import ClaudeProvider
 from .codex import CodexProvider
+from .fake import FakeProvider
 from .gemini import GeminiProvider
 from .opencode import OpencodeProvider
 
@@ -11,14 +12,17 @@ __all__ = [
     "BaseProvider",
     "ClaudeProvider",
     "CodexProvider",
+    "FakeProvider",
     "GeminiProvider",
     "OpencodeProvider",
+    "PromptTransport",
     "get_provider",
 ]
 
 _REGISTRY: dict[str, type[BaseProvider]] = {
     "claude": ClaudeProvider,
     "codex": CodexProvider,
+    "fake": FakeProvider,
     "gemini": GeminiProvider,
     "opencode": OpencodeProvider,
 }
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import json
 import re
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, List, Literal, Optional
+
+from ..stream import StreamEvent, parse_stream_line
+
+PromptTransport = Literal["argv", "stdin"]
 
 
 class BaseProvider(ABC):
@@ -15,19 +20,34 @@ class BaseProvider(ABC):
         self.use_poll = use_poll
 
     @abstractmethod
-    def build_command(self, prompt: str, use_resume: bool = False) -> List[str]:
+    def build_command(self, prompt: Optional[str], use_resume: bool = False) -> List[str]:
+        """Build the CLI argv. `prompt` is None when it is delivered on stdin."""
         ...
 
     @abstractmethod
     def prompt_guardrails(self) -> str:
         ...
 
+    def filter_event(self, event: StreamEvent, error_log: Path) -> Optional[str]:
+        """Return a replacement line for the tmux pane, or None to render as-is.
+
+        Default: no replacement. Override for providers that dump verbose errors.
+        """
+        return None
+
     def filter_log_line(self, line: str, error_log: Path) -> str:
-        """Parse raw output line, return cleaned version for tmux pane.
+        """Parse raw output line, return cleaned version for tmux pane."""
+        replacement = self.filter_event(parse_stream_line(line), error_log)
+        return line if replacement is None else replacement
+
+    @property
+    def prompt_transport(self) -> PromptTransport:
+        """How the CLI accepts the prompt: one argv element, or read from stdin.
 
-        Default: return as-is. Override for providers that dump verbose errors.
+        Stdin avoids ARG_MAX/MAX_ARG_STRLEN failures on large prompts and
+        the kernel copy of the prompt on every exec.
         """
-        return line
+        return "argv"
 
     @property
     def supports_resume(self) -> bool:
@@ -40,20 +60,41 @@ class BaseProvider(ABC):
     # shared helpers
 
     @staticmethod
-    def _extract_error_summary(line: str, max_normal: int = 500) -> Optional[str]:
-        """If line exceeds max_normal chars, try to extract a short error summary."""
+    def _decoded(line: str, data: Any, is_json: Optional[bool]) -> Any:
+        """The line's JSON payload, or None if it is not JSON.
+
+        `is_json` is None when the caller has not decoded the line; only
+        then is it decoded here. Otherwise `data` is used as given.
+        """
+        if is_json is None:
+            try:
+                return json.loads(line)
+            except (json.JSONDecodeError, ValueError):
+                return None
+        return data if is_json else None
+
+    @staticmethod
+    def _extract_error_summary(
+        line: str, max_normal: int = 500, data: Any = None, is_json: Optional[bool] = None,
+    ) -> Optional[str]:
+        """If line exceeds max_normal chars, try to extract a short error summary.
+
+        `data`/`is_json` are the caller's decode of the line, if it has one.
+        """
         if len(line) <= max_normal:
             return None
         # Try JSON error extraction
         try:
-            import json
-            data = json.loads(line)
+            data = BaseProvider._decoded(line, data, is_json)
             if isinstance(data, dict):
-                code = data.get("error", {}).get("code") or data.get("code") or data.get("status")
-                msg = data.get("error", {}).get("message") or data.get("message") or ""
+                error = data.get("error")
+                if not isinstance(error, dict):
+                    error = {}  # "error": null / a bare string
+                code = error.get("code") or data.get("code") or data.get("status")
+                msg = str(error.get("message") or data.get("message") or "")
                 if code or msg:
                     return f"{code or 'ERROR'}: {msg[:120]}"
-        except (json.JSONDecodeError, TypeError, AttributeError):
+        except (TypeError, AttributeError):
             pass
         # Try HTTP status code pattern
         m = re.search(r'\b([45]\d{2})\b', line[:200])
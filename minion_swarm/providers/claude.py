@@ -1,22 +1,19 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
-from .base import BaseProvider
+from .base import BaseProvider, PromptTransport
 
 
 class ClaudeProvider(BaseProvider):
     """Claude Code CLI provider."""
 
-    def build_command(self, prompt: str, use_resume: bool = False) -> List[str]:
-        cmd = [
-            "claude",
-            "-p",
-            prompt,
-            "--output-format",
-            "stream-json",
-            "--verbose",
-        ]
+    def build_command(self, prompt: Optional[str], use_resume: bool = False) -> List[str]:
+        # `-p` without a positional prompt reads the prompt from stdin
+        cmd = ["claude", "-p"]
+        if prompt is not None:
+            cmd.append(prompt)
+        cmd.extend(["--output-format", "stream-json", "--verbose"])
         # Only use --continue in watcher mode (single agent per session).
         # In poll mode, multiple agents share the project dir so --continue
         # would resume the wrong agent's session.
@@ -34,6 +31,10 @@ class ClaudeProvider(BaseProvider):
         # Claude follows instructions well — minimal guardrails needed
         return ""
 
+    @property
+    def prompt_transport(self) -> PromptTransport:
+        return "stdin"
+
     @property
     def supports_resume(self) -> bool:
         return False
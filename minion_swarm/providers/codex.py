@@ -1,17 +1,17 @@
 from __future__ import annotations
 
-import json
 import re
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, List, Optional
 
-from .base import BaseProvider
+from ..stream import StreamEvent
+from .base import BaseProvider, PromptTransport
 
 
 class CodexProvider(BaseProvider):
     """OpenAI Codex CLI provider."""
 
-    def build_command(self, prompt: str, use_resume: bool = False) -> List[str]:
+    def build_command(self, prompt: Optional[str], use_resume: bool = False) -> List[str]:
         cmd = ["codex", "exec"]
         if use_resume:
             cmd.extend(["resume", "--last"])
@@ -20,7 +20,8 @@ class CodexProvider(BaseProvider):
             cmd.extend(["-c", 'sandbox_permissions=["disk-full-read-access"]'])
         if self.agent_cfg.model:
             cmd.extend(["--model", self.agent_cfg.model])
-        cmd.append(prompt)
+        # `-` makes codex exec read the instructions from stdin
+        cmd.append(prompt if prompt is not None else "-")
         return cmd
 
     def prompt_guardrails(self) -> str:
@@ -30,16 +31,20 @@ class CodexProvider(BaseProvider):
             "Do not explore the codebase or take initiative beyond the task.",
         ])
 
-    def filter_log_line(self, line: str, error_log: Path) -> str:
-        stripped = line.rstrip("\n")
+    def filter_event(self, event: StreamEvent, error_log: Path) -> Optional[str]:
+        stripped = event.raw.rstrip("\n")
         if not stripped or len(stripped) <= 500:
-            return line
+            return None
 
-        summary = self._classify_codex_error(stripped)
+        summary = self._classify_codex_error(stripped, event.payload, event.is_json)
         if summary:
             self._append_error_log(error_log, stripped)
             return f"[{self.agent_name}] {summary}. Full error: {error_log}\n"
-        return line
+        return None
+
+    @property
+    def prompt_transport(self) -> PromptTransport:
+        return "stdin"
 
     @property
     def supports_resume(self) -> bool:
@@ -49,17 +54,17 @@ class CodexProvider(BaseProvider):
     def resume_label(self) -> str:
         return "codex resume --last"
 
-    def _classify_codex_error(self, line: str) -> Optional[str]:
+    def _classify_codex_error(self, line: str, data: Any = None, is_json: Optional[bool] = None) -> Optional[str]:
         """Extract short error summary from Codex verbose output."""
         try:
-            data = json.loads(line)
+            data = self._decoded(line, data, is_json)
             if isinstance(data, dict):
                 err_msg = data.get("error") or data.get("message") or ""
                 if isinstance(err_msg, str) and err_msg:
                     return f"CODEX_ERROR — {err_msg[:120]}"
                 if isinstance(err_msg, dict):
                     return f"CODEX_ERROR — {err_msg.get('message', '')[:120]}"
-        except (json.JSONDecodeError, TypeError, AttributeError):
+        except (TypeError, AttributeError):
             pass
 
         # Pattern: "capacity exhausted", "rate limit", etc.
@@ -67,7 +72,7 @@ class CodexProvider(BaseProvider):
         if m:
             return f"CODEX_ERROR — {m.group(1)}"
 
-        summary = self._extract_error_summary(line)
+        summary = self._extract_error_summary(line, data=data, is_json=data is not None)
         return summary
 
     @staticmethod
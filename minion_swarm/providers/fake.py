@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import sys
+from typing import List, Optional
+
+from .base import BaseProvider, PromptTransport
+
+
+class FakeProvider(BaseProvider):
+    """Synthetic stream-json CLI (`minion_swarm.fakecli`) for benchmarks and load tests."""
+
+    def build_command(self, prompt: Optional[str], use_resume: bool = False) -> List[str]:
+        cmd = [sys.executable, "-m", "minion_swarm.fakecli", "--output-format", "stream-json"]
+        if prompt is not None:
+            cmd.append(f"--prompt={prompt}")
+        if self.agent_cfg.model:
+            cmd.extend(["--model", self.agent_cfg.model])
+        return cmd
+
+    def prompt_guardrails(self) -> str:
+        return ""
+
+    @property
+    def prompt_transport(self) -> PromptTransport:
+        return "stdin"
+
+    @property
+    def supports_resume(self) -> bool:
+        return False
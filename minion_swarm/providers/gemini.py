@@ -1,18 +1,22 @@
 from __future__ import annotations
 
-import json
 import re
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, List, Optional
 
-from .base import BaseProvider
+from ..stream import StreamEvent
+from .base import BaseProvider, PromptTransport
 
 
 class GeminiProvider(BaseProvider):
     """Gemini CLI provider."""
 
-    def build_command(self, prompt: str, use_resume: bool = False) -> List[str]:
-        cmd = ["gemini", "--prompt", prompt, "--output-format", "stream-json"]
+    def build_command(self, prompt: Optional[str], use_resume: bool = False) -> List[str]:
+        # Without --prompt, non-interactive gemini takes the prompt from piped stdin
+        cmd = ["gemini"]
+        if prompt is not None:
+            cmd.extend(["--prompt", prompt])
+        cmd.extend(["--output-format", "stream-json"])
         if use_resume:
             cmd.extend(["--resume", "latest"])
         if self.agent_cfg.permission_mode:
@@ -39,16 +43,20 @@ class GeminiProvider(BaseProvider):
             "- One response = one task. No chaining, no speculative exploration.",
         ])
 
-    def filter_log_line(self, line: str, error_log: Path) -> str:
-        stripped = line.rstrip("\n")
+    def filter_event(self, event: StreamEvent, error_log: Path) -> Optional[str]:
+        stripped = event.raw.rstrip("\n")
         if not stripped or len(stripped) <= 500:
-            return line
+            return None
 
-        summary = self._classify_gemini_error(stripped)
+        summary = self._classify_gemini_error(stripped, event.payload, event.is_json)
         if summary:
             self._append_error_log(error_log, stripped)
             return f"[{self.agent_name}] {summary}. Full error: {error_log}\n"
-        return line
+        return None
+
+    @property
+    def prompt_transport(self) -> PromptTransport:
+        return "stdin"
 
     @property
     def supports_resume(self) -> bool:
@@ -58,11 +66,11 @@ class GeminiProvider(BaseProvider):
     def resume_label(self) -> str:
         return "gemini --resume latest"
 
-    def _classify_gemini_error(self, line: str) -> Optional[str]:
+    def _classify_gemini_error(self, line: str, data: Any = None, is_json: Optional[bool] = None) -> Optional[str]:
         """Extract error code and short message from Gemini's verbose error output."""
         # Try JSON parse first
         try:
-            data = json.loads(line)
+            data = self._decoded(line, data, is_json)
             if isinstance(data, dict):
                 err = data.get("error", {})
                 if isinstance(err, dict):
@@ -71,7 +79,7 @@ class GeminiProvider(BaseProvider):
                     msg = err.get("message", "")[:120]
                     if code or status:
                         return f"{status or 'ERROR'} ({code}) — {msg}"
-        except (json.JSONDecodeError, TypeError, AttributeError):
+        except (TypeError, AttributeError):
             pass
 
         # Pattern match for HTTP error codes in raw text
@@ -85,7 +93,7 @@ class GeminiProvider(BaseProvider):
             return f"{status} ({code}) — {msg}"
 
         # Generic large output
-        summary = self._extract_error_summary(line)
+        summary = self._extract_error_summary(line, data=data, is_json=data is not None)
         return summary
 
     @staticmethod
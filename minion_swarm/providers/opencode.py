@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import List, Optional
 
 from .base import BaseProvider
 
@@ -8,13 +8,14 @@ from .base import BaseProvider
 class OpencodeProvider(BaseProvider):
     """Opencode CLI provider."""
 
-    def build_command(self, prompt: str, use_resume: bool = False) -> List[str]:
+    def build_command(self, prompt: Optional[str], use_resume: bool = False) -> List[str]:
         cmd = ["opencode", "run", "--format", "json"]
         if use_resume:
             cmd.append("--continue")
         if self.agent_cfg.model:
             cmd.extend(["--model", self.agent_cfg.model])
-        cmd.append(prompt)
+        # opencode run only takes the message as arguments
+        cmd.append(prompt or "")
         return cmd
 
     def prompt_guardrails(self) -> str:
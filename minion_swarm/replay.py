@@ -0,0 +1,230 @@
+"""Offline replay of recorded provider streams through the daemon hot path.
+
+`minion-swarm replay <agent>` reads an agent's raw stream log (every segment,
+or one file) and feeds each line to `AgentDaemon._consume_stream_line` —
+parse, rolling-buffer append, provider filter, render, usage and the console
+cap — at full speed with no subprocess. The daemon is built against a
+scratch project so replay never touches the real runtime DB, logs or comms
+DB; its console goes to /dev/null and the raw stream log is not re-written.
+Each recorded invocation gets a fresh tally, as a live turn would.
+
+The same lines are replayed three ways: timed (best of `repeat`) for lines/s
+and MB/s, under tracemalloc for peak/retained memory and the top allocation
+sites, and under cProfile with the stats dumped to a .prof file.
+"""
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import shutil
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import List, Optional, TextIO, Tuple
+
+from .config import SwarmConfig
+from .daemon import AgentDaemon, _StreamTally
+from .streamlog import iter_invocations, iter_segment_invocations
+
+TRACEMALLOC_FRAMES = 1
+
+
+@dataclass
+class ReplayOptions:
+    repeat: int = 3
+    provider: Optional[str] = None
+    file: Optional[Path] = None
+    profile_path: Optional[Path] = None  # None skips the cProfile pass
+    trace_memory: bool = True
+    top: int = 15
+
+
+@dataclass
+class ReplayReport:
+    agent: str
+    provider: str
+    source: str
+    invocations: int = 0
+    lines: int = 0
+    bytes: int = 0
+    timings: List[float] = field(default_factory=list)
+    peak_bytes: int = 0
+    retained_bytes: int = 0
+    top_allocations: List[Tuple[str, int, int]] = field(default_factory=list)  # (site, bytes, blocks)
+    profile_path: Optional[Path] = None
+    profile_top: List[str] = field(default_factory=list)
+
+    def format(self) -> List[str]:
+        best = min(self.timings) if self.timings else 0.0
+        out = [
+            f"replay: {self.agent} ({self.provider}) from {self.source}",
+            f"input          {self.invocations} invocation(s), {self.lines} lines, {self.bytes / 1e6:.2f} MB",
+        ]
+        if best > 0:
+            runs = " ".join(f"{t * 1000:.1f}" for t in self.timings)
+            out.append(
+                f"throughput     {self.lines / best:,.0f} lines/s  {self.bytes / 1e6 / best:.1f} MB/s  "
+                f"{best * 1e6 / max(1, self.lines):.1f} us/line  (best of {len(self.timings)}: {runs} ms)"
+            )
+        if self.peak_bytes:
+            out.append(
+                f"memory         peak {self.peak_bytes / 1024:,.0f} KiB  retained {self.retained_bytes / 1024:,.0f} KiB "
+                f"(tracemalloc, above the idle daemon)"
+            )
+            for site, size, blocks in self.top_allocations:
+                out.append(f"  {size / 1024:10,.1f} KiB {blocks:8,} blocks  {site}")
+        if self.profile_path is not None:
+            out.append(f"profile        {self.profile_path}")
+            out.extend(self.profile_top)
+        return out
+
+
+class _NullStreamLog:
+    """Stands in for `StreamLogWriter`; the replayed lines are already on disk."""
+
+    def write(self, line: str) -> None:
+        pass
+
+    def begin_invocation(self, v: int) -> None:
+        pass
+
+    def end_invocation(self) -> None:
+        pass
+
+    def flush(self) -> None:
+        pass
+
+    def close(self, wait: bool = True) -> None:
+        pass
+
+
+def load_invocations(config: SwarmConfig, agent: str, path: Optional[Path] = None) -> List[List[str]]:
+    """Recorded invocations of `agent`, oldest first, or of one segment file."""
+    source = iter_segment_invocations(path) if path is not None else iter_invocations(config.logs_dir, agent)
+    return [lines for _, lines in source if lines]
+
+
+def run_replay(config: SwarmConfig, agent: str, options: ReplayOptions) -> ReplayReport:
+    if agent not in config.agents:
+        raise KeyError(f"Unknown agent '{agent}' in config")
+    agent_cfg = config.agents[agent]
+    if options.provider:
+        agent_cfg = replace(agent_cfg, provider=options.provider)
+
+    invocations = load_invocations(config, agent, options.file)
+    source = str(options.file) if options.file is not None else f"{config.logs_dir}/{agent}.stream.*"
+    if not invocations:
+        raise RuntimeError(f"No recorded stream lines in {source}")
+
+    report = ReplayReport(agent, agent_cfg.provider, source)
+    report.invocations = len(invocations)
+    report.lines = sum(len(lines) for lines in invocations)
+    report.bytes = sum(len(line.encode("utf-8")) for lines in invocations for line in lines)
+
+    scratch = Path(tempfile.mkdtemp(prefix="minion-swarm-replay-"))
+    scratch_cfg = replace(
+        config,
+        project_dir=scratch,
+        comms_dir=scratch,
+        comms_db=scratch / "comms.db",  # legacy name: no poller, watcher stays lazy
+        docs_dir=scratch / "docs",
+        agents={agent: agent_cfg},
+        metrics_port=None,
+    )
+    scratch_cfg.ensure_runtime_dirs()
+    try:
+        with open(os.devnull, "w", encoding="utf-8") as sink:
+            for _ in range(max(1, options.repeat)):
+                report.timings.append(_timed_pass(scratch_cfg, agent, sink, invocations))
+            if options.trace_memory:
+                _memory_pass(scratch_cfg, agent, sink, invocations, options.top, report)
+            if options.profile_path is not None:
+                _profile_pass(scratch_cfg, agent, sink, invocations, options, report)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return report
+
+
+def _daemon(config: SwarmConfig, agent: str, sink: TextIO) -> AgentDaemon:
+    daemon = AgentDaemon(config, agent, out=sink)
+    daemon._stream_log = _NullStreamLog()  # type: ignore[assignment]
+    return daemon
+
+
+def _replay(daemon: AgentDaemon, invocations: List[List[str]]) -> None:
+    consume = daemon._consume_stream_line
+    for lines in invocations:
+        tally = _StreamTally()
+        for line in lines:
+            consume(line, tally)
+
+
+def _timed_pass(config: SwarmConfig, agent: str, sink: TextIO, invocations: List[List[str]]) -> float:
+    daemon = _daemon(config, agent, sink)
+    try:
+        started = time.perf_counter()
+        _replay(daemon, invocations)
+        return time.perf_counter() - started
+    finally:
+        daemon._store.close()
+
+
+def _memory_pass(
+    config: SwarmConfig, agent: str, sink: TextIO, invocations: List[List[str]], top: int, report: ReplayReport,
+) -> None:
+    daemon = _daemon(config, agent, sink)
+    tracemalloc.start(TRACEMALLOC_FRAMES)
+    try:
+        baseline = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        floor, _ = tracemalloc.get_traced_memory()
+        _replay(daemon, invocations)
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+        daemon._store.close()
+
+    report.peak_bytes = peak - floor
+    report.retained_bytes = current - floor
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    diff = snapshot.filter_traces(ignore).compare_to(baseline.filter_traces(ignore), "lineno")
+    for stat in [s for s in diff if s.size_diff > 0][:top]:
+        frame = stat.traceback[0]
+        report.top_allocations.append((f"{_short_path(frame.filename)}:{frame.lineno}", stat.size_diff, stat.count_diff))
+
+
+def _profile_pass(
+    config: SwarmConfig, agent: str, sink: TextIO, invocations: List[List[str]], options: ReplayOptions, report: ReplayReport,
+) -> None:
+    assert options.profile_path is not None
+    daemon = _daemon(config, agent, sink)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        _replay(daemon, invocations)
+        profiler.disable()
+    finally:
+        daemon._store.close()
+
+    options.profile_path.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(str(options.profile_path))
+    report.profile_path = options.profile_path
+
+    text = io.StringIO()
+    stats = pstats.Stats(profiler, stream=text)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(options.top)
+    body = text.getvalue().splitlines()
+    start = next((i for i, line in enumerate(body) if line.lstrip().startswith("ncalls")), 0)
+    report.profile_top = [f"  {line}" for line in body[start:] if line.strip()]
+
+
+def _short_path(filename: str) -> str:
+    marker = f"{os.sep}minion_swarm{os.sep}"
+    if marker in filename:
+        return "minion_swarm" + os.sep + filename.split(marker, 1)[1]
+    return filename
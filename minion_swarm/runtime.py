@@ -0,0 +1,172 @@
+"""Shared runtime state store for all agents of a crew.
+
+One WAL-mode SQLite database, `.minion-swarm/runtime.db`, replaces the
+per-agent `state/<agent>.json` and `pids/<agent>.pid` files. Every update is
+a single-row upsert in its own transaction, so readers never see a torn
+record, and `status` reads every agent in one query.
+
+`pid` is the process that owns the agent (its daemon, or the supervisor
+hosting it). It is written by whoever launches the agent and cleared on
+clean exit or by `stop`; status fields are written by the daemon itself.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS agents (
+    name                 TEXT PRIMARY KEY,
+    pid                  INTEGER,
+    provider             TEXT,
+    status               TEXT NOT NULL DEFAULT 'unknown',
+    updated_at           TEXT,
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+    resume_ready         INTEGER NOT NULL DEFAULT 0,
+    extra                TEXT NOT NULL DEFAULT '{}'
+)
+"""
+
+
+@dataclass
+class AgentRuntime:
+    name: str
+    pid: Optional[int] = None
+    provider: Optional[str] = None
+    status: str = "unknown"
+    updated_at: Optional[str] = None
+    consecutive_failures: int = 0
+    resume_ready: bool = False
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "AgentRuntime":
+        try:
+            extra = json.loads(row["extra"] or "{}")
+        except json.JSONDecodeError:
+            extra = {}
+        return cls(
+            name=row["name"],
+            pid=row["pid"],
+            provider=row["provider"],
+            status=row["status"],
+            updated_at=row["updated_at"],
+            consecutive_failures=row["consecutive_failures"],
+            resume_ready=bool(row["resume_ready"]),
+            extra=extra if isinstance(extra, dict) else {},
+        )
+
+
+class RuntimeStore:
+    """Thread-safe handle on the runtime DB; one per process is enough."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fresh = not path.exists()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        if fresh:
+            self._import_legacy(path.parent)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # ── pids ───────────────────────────────────────────────────────────────
+
+    def get_pid(self, name: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute("SELECT pid FROM agents WHERE name = ?", (name,)).fetchone()
+        return row["pid"] if row else None
+
+    def set_pid(self, name: str, pid: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO agents (name, pid) VALUES (?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET pid = excluded.pid",
+                (name, pid),
+            )
+
+    def clear_pid(self, name: str, only_if: Optional[int] = None) -> None:
+        """Forget an agent's owner pid (only if it is still `only_if`, when given)."""
+        with self._lock:
+            if only_if is None:
+                self._conn.execute("UPDATE agents SET pid = NULL WHERE name = ?", (name,))
+            else:
+                self._conn.execute("UPDATE agents SET pid = NULL WHERE name = ? AND pid = ?", (name, only_if))
+
+    # ── state ──────────────────────────────────────────────────────────────
+
+    def write_state(
+        self,
+        name: str,
+        *,
+        provider: str,
+        status: str,
+        updated_at: str,
+        consecutive_failures: int,
+        resume_ready: bool,
+        extra: Dict[str, Any],
+    ) -> None:
+        payload = json.dumps(extra, separators=(",", ":"), default=str)
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO agents (name, provider, status, updated_at, consecutive_failures, resume_ready, extra)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    provider = excluded.provider,
+                    status = excluded.status,
+                    updated_at = excluded.updated_at,
+                    consecutive_failures = excluded.consecutive_failures,
+                    resume_ready = excluded.resume_ready,
+                    extra = excluded.extra
+                """,
+                (name, provider, status, updated_at, consecutive_failures, int(resume_ready), payload),
+            )
+
+    def get(self, name: str) -> Optional[AgentRuntime]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM agents WHERE name = ?", (name,)).fetchone()
+        return AgentRuntime.from_row(row) if row else None
+
+    def all(self) -> Dict[str, AgentRuntime]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM agents").fetchall()
+        return {row["name"]: AgentRuntime.from_row(row) for row in rows}
+
+    # ── migration ──────────────────────────────────────────────────────────
+
+    def _import_legacy(self, runtime_dir: Path) -> None:
+        """Seed a new store from pre-store `state/*.json` and `pids/*.pid` files."""
+        for state_file in (runtime_dir / "state").glob("*.json"):
+            try:
+                payload = json.loads(state_file.read_text())
+            except (OSError, json.JSONDecodeError):
+                continue
+            if not isinstance(payload, dict):
+                continue
+            known = {"agent", "provider", "pid", "status", "updated_at", "consecutive_failures", "resume_ready"}
+            self.write_state(
+                state_file.stem,
+                provider=str(payload.get("provider") or ""),
+                status=str(payload.get("status") or "unknown"),
+                updated_at=str(payload.get("updated_at") or ""),
+                consecutive_failures=int(payload.get("consecutive_failures") or 0),
+                resume_ready=bool(payload.get("resume_ready", False)),
+                extra={k: v for k, v in payload.items() if k not in known},
+            )
+        for pid_file in (runtime_dir / "pids").glob("*.pid"):
+            try:
+                self.set_pid(pid_file.stem, int(pid_file.read_text().strip()))
+            except (OSError, ValueError):
+                continue
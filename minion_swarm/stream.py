@@ -0,0 +1,202 @@
+"""Parse-once stream-json pipeline.
+
+Every stdout line from a provider CLI is decoded exactly once into a
+`StreamEvent`. Rendering, token accounting, compaction detection and provider
+error filtering all read the event instead of re-decoding the raw line.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, List, Literal, Optional
+
+EventKind = Literal[
+    "text",         # assistant/delta text
+    "tool_use",     # assistant message carrying a tool call
+    "tool_result",  # user message carrying tool output
+    "usage",        # token accounting only (no text)
+    "result",       # final result event with session totals
+    "error",        # error/warning events
+    "system",       # init, compact boundaries, rate limits, ...
+    "other",        # any other JSON event
+    "raw",          # non-JSON line (stderr, plain-text providers)
+]
+
+TEXT_KEYS = frozenset({"text", "content", "delta", "output_text"})
+
+COMPACTION_MARKERS = (
+    "compaction",
+    "compacted",
+    "context window",
+    "summarized prior",
+    "summarised prior",
+    "auto-compact",
+)
+
+
+@dataclass
+class StreamEvent:
+    kind: EventKind
+    raw: str
+    payload: Any = None
+    is_json: bool = False
+    text: str = ""
+    tool_name: Optional[str] = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+    context_window: int = 0
+    compaction: bool = False
+
+    @property
+    def event_type(self) -> Optional[str]:
+        if isinstance(self.payload, dict):
+            value = self.payload.get("type")
+            return value if isinstance(value, str) else None
+        return None
+
+    def render(self) -> str:
+        """Human-readable text for the console/log pane."""
+        if not self.is_json:
+            stripped = self.raw.rstrip("\n")
+            return stripped + "\n" if stripped else ""
+        if self.text:
+            return self.text
+        if self.event_type in {"error", "warning"}:
+            return f"[{self.event_type}] {self.payload.get('message', '')}\n"
+        return ""
+
+
+def contains_compaction_marker(text: str) -> bool:
+    low = text.lower()
+    return any(marker in low for marker in COMPACTION_MARKERS)
+
+
+def parse_stream_line(line: str) -> StreamEvent:
+    """Decode one stdout line into a typed event. Never raises."""
+    raw = line.rstrip("\n")
+    stripped = raw.strip()
+    if not stripped:
+        return StreamEvent(kind="raw", raw=line)
+
+    compaction = contains_compaction_marker(raw)
+
+    try:
+        payload = json.loads(stripped)
+    except (json.JSONDecodeError, ValueError):
+        return StreamEvent(kind="raw", raw=line, compaction=compaction)
+
+    event = StreamEvent(kind="other", raw=line, payload=payload, is_json=True, compaction=compaction)
+    event.text = "".join(_extract_text_fragments(payload))
+    if "tokens" in stripped:
+        _apply_usage(event, payload)
+    event.kind = _classify(event, payload)
+    return event
+
+
+def _classify(event: StreamEvent, payload: Any) -> EventKind:
+    if not isinstance(payload, dict):
+        return "text" if event.text else "other"
+
+    event_type = payload.get("type")
+    if event_type == "result":
+        return "result"
+    if event_type in {"error", "warning"}:
+        return "error"
+    if event_type == "system":
+        if payload.get("subtype") == "compact_boundary":
+            event.compaction = True
+        return "system"
+
+    message = payload.get("message")
+    content = message.get("content") if isinstance(message, dict) else None
+    if isinstance(content, list):
+        for block in content:
+            if not isinstance(block, dict):
+                continue
+            block_type = block.get("type")
+            if block_type == "tool_use":
+                name = block.get("name")
+                event.tool_name = name if isinstance(name, str) else None
+                return "tool_use"
+            if block_type == "tool_result":
+                return "tool_result"
+
+    if event.text:
+        return "text"
+    if event.input_tokens or event.output_tokens:
+        return "usage"
+    return "other"
+
+
+def _extract_text_fragments(payload: Any) -> List[str]:
+    out: List[str] = []
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in TEXT_KEYS and isinstance(value, str):
+                    out.append(value)
+                else:
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(payload)
+    return out
+
+
+def _apply_usage(event: StreamEvent, data: Any) -> None:
+    """Fill token fields from a decoded payload.
+
+    Claude Code stream-json reports tokens split across fields:
+    - input_tokens: non-cached prompt tokens (often tiny)
+    - cache_creation_input_tokens: system prompt tokens being cached
+    - cache_read_input_tokens: system prompt tokens read from cache
+    Total context consumed = input + cache_creation + cache_read.
+
+    The 'result' event also has modelUsage with contextWindow — we extract
+    that to set the HP limit accurately.
+    """
+    if not isinstance(data, dict):
+        return
+
+    # Prefer modelUsage from result event — it has contextWindow too
+    if data.get("type") == "result":
+        model_usage = data.get("modelUsage")
+        if isinstance(model_usage, dict):
+            for model_info in model_usage.values():
+                if isinstance(model_info, dict):
+                    event.cache_creation_tokens = model_info.get("cacheCreationInputTokens", 0) or 0
+                    event.cache_read_tokens = model_info.get("cacheReadInputTokens", 0) or 0
+                    event.input_tokens = (model_info.get("inputTokens", 0) or 0) + \
+                        event.cache_creation_tokens + event.cache_read_tokens
+                    event.output_tokens = model_info.get("outputTokens", 0) or 0
+                    event.context_window = model_info.get("contextWindow", 0) or 0
+                    return
+
+    # Fall back to usage dict in assistant/message events
+    usage = _find_usage_dict(data)
+    if not usage:
+        return
+    event.cache_creation_tokens = usage.get("cache_creation_input_tokens", 0) or 0
+    event.cache_read_tokens = usage.get("cache_read_input_tokens", 0) or 0
+    event.input_tokens = (usage.get("input_tokens", 0) or 0) + \
+        event.cache_creation_tokens + event.cache_read_tokens
+    event.output_tokens = usage.get("output_tokens", 0) or 0
+
+
+def _find_usage_dict(obj: Any) -> Optional[dict]:
+    """Recursively find a dict containing 'input_tokens' in a JSON structure."""
+    if not isinstance(obj, dict):
+        return None
+    if "input_tokens" in obj:
+        return obj
+    for v in obj.values():
+        if isinstance(v, dict):
+            found = _find_usage_dict(v)
+            if found:
+                return found
+    return None
@@ -0,0 +1,341 @@
+"""Buffered, rotating, compressed raw stream log.
+
+Layout under `.minion-swarm/logs/`:
+
+    <agent>.stream.jsonl                      active segment (plain JSONL)
+    <agent>.stream.jsonl.idx                  its invocation index
+    <agent>.stream.<stamp>.jsonl.gz|.zst      closed, compressed segment
+    <agent>.stream.<stamp>.jsonl.gz|.zst.idx  its invocation index
+
+Each index line is `{"run": ..., "v": N, "offset": ..., "ts": ...}` — the
+byte offset where invocation `v` (the counter shown in the model-stream
+banners) of daemon run `run` starts. Closed segments compress every
+invocation as its own gzip member / zstd frame and index the compressed
+offset, so one invocation is a seek plus a single-member decompress.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any, Iterator, List, Literal, Optional
+
+Compression = Literal["gzip", "zstd", "none"]
+
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+DEFAULT_FLUSH_BYTES = 64 * 1024
+DEFAULT_FLUSH_INTERVAL_SEC = 1.0
+DEFAULT_KEEP_SEGMENTS = 20
+
+_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+
+@dataclass
+class IndexEntry:
+    run: str
+    v: int
+    offset: int
+    ts: str
+
+
+def _zstd_module():
+    try:
+        import zstandard  # optional dependency
+    except ImportError:
+        return None
+    return zstandard
+
+
+def resolve_compression(requested: str) -> Compression:
+    """Map a config value to an available codec (zstd falls back to gzip)."""
+    value = (requested or "gzip").strip().lower()
+    if value == "zstd" and _zstd_module() is None:
+        return "gzip"
+    if value not in _SUFFIXES:
+        raise ValueError(f"Unknown stream log compression '{requested}'. Expected one of: gzip, zstd, none.")
+    return value  # type: ignore[return-value]
+
+
+def active_segment_path(logs_dir: Path, agent_name: str) -> Path:
+    return logs_dir / f"{agent_name}.stream.jsonl"
+
+
+def _index_path(segment: Path) -> Path:
+    return segment.with_name(segment.name + ".idx")
+
+
+def read_index(segment: Path) -> List[IndexEntry]:
+    path = _index_path(segment)
+    entries: List[IndexEntry] = []
+    try:
+        with path.open("r", encoding="utf-8") as fp:
+            for line in fp:
+                try:
+                    item = json.loads(line)
+                    entries.append(IndexEntry(str(item["run"]), int(item["v"]), int(item["offset"]), str(item.get("ts", ""))))
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    continue
+    except OSError:
+        pass
+    return entries
+
+
+def list_segments(logs_dir: Path, agent_name: str) -> List[Path]:
+    """All segments for an agent, oldest first, active segment last."""
+    prefix = f"{agent_name}.stream."
+    closed = sorted(
+        p for p in logs_dir.glob(f"{prefix}*.jsonl*")
+        if not p.name.endswith(".idx") and not p.name.endswith(".tmp")
+        and p.name != f"{prefix}jsonl"
+    )
+    active = active_segment_path(logs_dir, agent_name)
+    return closed + ([active] if active.exists() else [])
+
+
+class StreamLogWriter:
+    """Append-only sink for an agent's raw provider stream.
+
+    Lines are buffered in memory and written in groups once `flush_bytes`
+    accumulate or `flush_interval` elapses, and always at invocation end.
+    `write` only checks the interval when a line arrives; a caller whose
+    stream can go quiet mid-invocation arms a timer from `flush_in`.
+    Segments rotate at invocation boundaries once they pass `segment_bytes`;
+    closed segments are compressed on a background thread and the oldest
+    are pruned beyond `keep_segments`.
+    """
+
+    def __init__(
+        self,
+        logs_dir: Path,
+        agent_name: str,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        compression: str = "gzip",
+        keep_segments: int = DEFAULT_KEEP_SEGMENTS,
+        flush_bytes: int = DEFAULT_FLUSH_BYTES,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SEC,
+    ) -> None:
+        self.logs_dir = logs_dir
+        self.agent_name = agent_name
+        self.segment_bytes = segment_bytes
+        self.compression = resolve_compression(compression)
+        self.keep_segments = keep_segments
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.run_id = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S") + f"-{os.getpid()}"
+
+        self._path = active_segment_path(logs_dir, agent_name)
+        self._fp: Optional[IO[bytes]] = None
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._last_flush = time.monotonic()
+        self._compressors: List[threading.Thread] = []
+
+    # ── writing ────────────────────────────────────────────────────────────
+
+    def begin_invocation(self, v: int) -> None:
+        self.flush()
+        if self._open().tell() >= self.segment_bytes:
+            self._rotate()
+        fp = self._open()
+        entry = {"run": self.run_id, "v": v, "offset": fp.tell(), "ts": datetime.now(timezone.utc).isoformat()}
+        with _index_path(self._path).open("a", encoding="utf-8") as idx:
+            idx.write(json.dumps(entry) + "\n")
+
+    def write(self, line: str) -> None:
+        data = line.encode("utf-8", errors="replace")
+        self._pending.append(data)
+        self._pending_bytes += len(data)
+        if self._pending_bytes >= self.flush_bytes or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush_in(self) -> Optional[float]:
+        """Seconds until buffered lines are due to be written, or None if none are buffered."""
+        if not self._pending:
+            return None
+        return max(0.0, self._last_flush + self.flush_interval - time.monotonic())
+
+    def end_invocation(self) -> None:
+        self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        fp = self._open()
+        fp.write(b"".join(self._pending))
+        fp.flush()
+        self._pending.clear()
+        self._pending_bytes = 0
+
+    def close(self, wait: bool = True) -> None:
+        self.flush()
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+        if wait:
+            for thread in self._compressors:
+                thread.join()
+            self._compressors.clear()
+
+    def _open(self) -> IO[bytes]:
+        if self._fp is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._fp = self._path.open("ab")
+        return self._fp
+
+    # ── rotation + compression ────────────────────────────────────────────
+
+    def _rotate(self) -> None:
+        assert self._fp is not None
+        self._fp.close()
+        self._fp = None
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        closed = self._path.with_name(f"{self.agent_name}.stream.{stamp}.jsonl")
+        os.replace(self._path, closed)
+        if _index_path(self._path).exists():
+            os.replace(_index_path(self._path), _index_path(closed))
+
+        self._compressors = [t for t in self._compressors if t.is_alive()]
+        thread = threading.Thread(
+            target=self._compress_and_prune,
+            args=(closed,),
+            name=f"streamlog-{self.agent_name}",
+            daemon=True,
+        )
+        thread.start()
+        self._compressors.append(thread)
+
+    def _compress_and_prune(self, segment: Path) -> None:
+        try:
+            if self.compression != "none":
+                compress_segment(segment, self.compression)
+            self._prune()
+        except OSError:
+            pass  # leave the plain segment in place; it is still readable
+
+    def _prune(self) -> None:
+        if self.keep_segments <= 0:
+            return
+        closed = list_segments(self.logs_dir, self.agent_name)
+        closed = [p for p in closed if p != self._path]
+        for old in closed[: max(0, len(closed) - self.keep_segments)]:
+            old.unlink(missing_ok=True)
+            _index_path(old).unlink(missing_ok=True)
+
+
+def compress_segment(segment: Path, compression: Compression) -> Path:
+    """Compress a closed plain segment, one member/frame per invocation."""
+    data = segment.read_bytes()
+    entries = read_index(segment)
+    bounds = sorted({0, *(e.offset for e in entries if 0 <= e.offset <= len(data)), len(data)})
+
+    out_path = segment.with_name(segment.name + _SUFFIXES[compression])
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    starts: dict[int, int] = {}
+    zstd = _zstd_module() if compression == "zstd" else None
+    with tmp_path.open("wb") as out:
+        for start, end in zip(bounds, bounds[1:]):
+            starts[start] = out.tell()
+            chunk = data[start:end]
+            if zstd is not None:
+                out.write(zstd.ZstdCompressor(level=3).compress(chunk))
+            else:
+                out.write(gzip.compress(chunk, compresslevel=6))
+        starts.setdefault(len(data), out.tell())
+
+    with _index_path(tmp_path).open("w", encoding="utf-8") as idx:
+        for e in entries:
+            if e.offset in starts:
+                idx.write(json.dumps({"run": e.run, "v": e.v, "offset": starts[e.offset], "ts": e.ts}) + "\n")
+
+    os.replace(_index_path(tmp_path), _index_path(out_path))
+    os.replace(tmp_path, out_path)
+    segment.unlink(missing_ok=True)
+    _index_path(segment).unlink(missing_ok=True)
+    return out_path
+
+
+# ── reading ────────────────────────────────────────────────────────────────
+
+def find_invocation(logs_dir: Path, agent_name: str, v: int, run: Optional[str] = None) -> Optional[tuple[Path, IndexEntry, Optional[int]]]:
+    """Locate invocation `v` (latest run unless `run` is given).
+
+    Returns (segment, entry, end_offset) — end_offset is the next entry's
+    offset in a plain segment, or None to read to the end of the member.
+    """
+    for segment in reversed(list_segments(logs_dir, agent_name)):
+        entries = read_index(segment)
+        for i in range(len(entries) - 1, -1, -1):
+            entry = entries[i]
+            if entry.v == v and (run is None or entry.run == run):
+                end = entries[i + 1].offset if i + 1 < len(entries) else None
+                return segment, entry, end
+    return None
+
+
+def read_invocation(logs_dir: Path, agent_name: str, v: int, run: Optional[str] = None) -> Iterator[str]:
+    """Yield the raw stream lines of one invocation by seeking to its offset."""
+    found = find_invocation(logs_dir, agent_name, v, run)
+    if found is None:
+        return
+    segment, entry, end = found
+    with segment.open("rb") as fp:
+        yield from _read_span(fp, segment, entry.offset, end)
+
+
+def iter_invocations(logs_dir: Path, agent_name: str) -> Iterator[tuple[Optional[IndexEntry], List[str]]]:
+    """Yield every recorded invocation of an agent, oldest first, as (entry, lines)."""
+    for segment in list_segments(logs_dir, agent_name):
+        yield from iter_segment_invocations(segment)
+
+
+def iter_segment_invocations(segment: Path) -> Iterator[tuple[Optional[IndexEntry], List[str]]]:
+    """Yield each invocation in one segment file as (entry, lines).
+
+    A segment without an index (a copied or hand-made file) is yielded
+    whole with entry None.
+    """
+    entries = read_index(segment)
+    with segment.open("rb") as fp:
+        if not entries:
+            yield None, list(_read_span(fp, segment, 0, None, whole=True))
+            return
+        for i, entry in enumerate(entries):
+            end = entries[i + 1].offset if i + 1 < len(entries) else None
+            yield entry, list(_read_span(fp, segment, entry.offset, end))
+
+
+def _read_span(fp: IO[bytes], segment: Path, offset: int, end: Optional[int], whole: bool = False) -> Iterator[str]:
+    """Lines of one invocation starting at `offset` (or every member if `whole`)."""
+    fp.seek(offset)
+    if segment.suffix == ".gz":
+        data = gzip.GzipFile(fileobj=fp).read() if whole else _read_one_member(fp, zlib.decompressobj(wbits=31))
+    elif segment.suffix == ".zst":
+        zstd = _zstd_module()
+        if zstd is None:
+            raise RuntimeError("zstandard is required to read .zst stream segments")
+        if whole:
+            data = zstd.ZstdDecompressor().stream_reader(fp, read_across_frames=True).read()
+        else:
+            data = _read_one_member(fp, zstd.ZstdDecompressor().decompressobj())
+    else:
+        data = fp.read(end - offset) if end is not None else fp.read()
+    yield from data.decode("utf-8", errors="replace").splitlines(keepends=True)
+
+
+def _read_one_member(fp: IO[bytes], decomp: Any) -> bytes:
+    """Decompress a single gzip member / zstd frame starting at fp's position."""
+    out: List[bytes] = []
+    while not decomp.eof:
+        chunk = fp.read(64 * 1024)
+        if not chunk:
+            break
+        out.append(decomp.decompress(chunk))
+    return b"".join(out)
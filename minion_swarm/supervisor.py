@@ -0,0 +1,113 @@
+"""Single-process supervisor — hosts every agent of a crew on one event loop."""
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, TextIO
+
+from .config import SwarmConfig
+from .daemon import AgentDaemon
+from .hpwriter import HpHelper
+from .metrics import MetricsRegistry, MetricsServer
+from .runtime import RuntimeStore
+from .watcher import WatchHub
+
+
+class Supervisor:
+    """Run several `AgentDaemon` coroutines in one interpreter.
+
+    Each agent keeps its own log file and runtime-store row, so `status`,
+    `logs` and `stop` work the same as for daemons launched by `start`. All
+    hosted agents share one store connection and record the supervisor's
+    pid; stopping any hosted agent stops the whole supervisor. Watcher-mode
+    agents share one `WatchHub` instead of watching the comms DB each, all
+    agents write HP through one `HpHelper` process, and all agents report
+    into one metrics registry served by the supervisor.
+    """
+
+    def __init__(self, config: SwarmConfig, agent_names: List[str]) -> None:
+        unknown = [name for name in agent_names if name not in config.agents]
+        if unknown:
+            raise KeyError(f"Unknown agent(s) in config: {', '.join(unknown)}")
+        if not agent_names:
+            raise ValueError("Supervisor needs at least one agent")
+
+        self.config = config
+        self.agent_names = list(agent_names)
+        self.daemons: Dict[str, AgentDaemon] = {}
+        self._log_fps: Dict[str, TextIO] = {}
+
+    def run(self) -> None:
+        asyncio.run(self.run_async())
+
+    async def run_async(self) -> None:
+        self.config.ensure_runtime_dirs()
+        loop = asyncio.get_running_loop()
+
+        # Watcher-mode agents park blocking SQLite/watchdog waits on the
+        # executor; size it so every hosted agent can block at once.
+        executor = ThreadPoolExecutor(
+            max_workers=2 * len(self.agent_names) + 4,
+            thread_name_prefix="minion-swarm",
+        )
+        loop.set_default_executor(executor)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signum, self._handle_signal, signum)
+
+        store = RuntimeStore(self.config.runtime_db)
+        hub = WatchHub(self.config.comms_db)  # starts only if a watcher-mode agent subscribes
+        hp_helper = HpHelper(self.config.comms_db, self.config.docs_dir, self._log)
+        metrics = MetricsRegistry()
+        server = MetricsServer(metrics, self.config.runtime_dir, self.config.metrics_port)
+        await server.start(self._log)
+        try:
+            for name in self.agent_names:
+                fp = self._open_agent_log(name)
+                self._log_fps[name] = fp
+                self.daemons[name] = AgentDaemon(
+                    self.config, name, out=fp, store=store, watch_hub=hub, metrics=metrics, hp_helper=hp_helper,
+                )
+                store.set_pid(name, os.getpid())
+
+            self._log(f"hosting {len(self.daemons)} agent(s): {', '.join(self.daemons)}")
+            await asyncio.gather(*(self._run_one(d) for d in self.daemons.values()))
+        finally:
+            await server.close()
+            await hp_helper.close()
+            await asyncio.to_thread(hub.stop)
+            for name in self.agent_names:
+                store.clear_pid(name, only_if=os.getpid())
+            store.close()
+            for fp in self._log_fps.values():
+                fp.close()
+            self._log_fps.clear()
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._log("supervisor stopped")
+
+    def request_stop(self) -> None:
+        for daemon in self.daemons.values():
+            daemon.request_stop()
+
+    async def _run_one(self, daemon: AgentDaemon) -> None:
+        """Run one hosted agent; a crash is logged to its own log and isolated."""
+        try:
+            await daemon.run_async()
+        except Exception as exc:
+            daemon._log(f"daemon crashed: {exc!r}")
+            daemon._write_state("error", last_error=f"supervisor: daemon crashed: {exc!r}")
+
+    def _handle_signal(self, signum: int, _frame: Any = None) -> None:
+        self._log(f"received signal {signum}, stopping {len(self.daemons)} agent(s)")
+        self.request_stop()
+
+    def _open_agent_log(self, name: str) -> TextIO:
+        path = self.config.logs_dir / f"{name}.log"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return path.open("a", encoding="utf-8")
+
+    def _log(self, message: str) -> None:
+        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[{ts}] [supervisor] {message}", flush=True)
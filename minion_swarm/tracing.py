@@ -0,0 +1,228 @@
+"""Per-turn tracing spans, written as OTLP/JSON lines.
+
+A turn is one trace: the poll wait that ended with work, prompt build, each
+provider invocation (spawn, first byte, streaming, process wait), HP update
+and state write. `TurnTracer` appends one OTLP `ExportTraceServiceRequest`
+per finished trace to `.minion-swarm/traces/<agent>.jsonl` — the layout the
+OpenTelemetry collector's file exporter/receiver uses — so the file can be
+replayed into any OTLP backend. `minion-swarm trace <agent>` renders recent
+turns as a flame-style tree with `format_trace`.
+
+The trace id also appears in the `model-stream start/end` banners of the
+agent log.
+"""
+from __future__ import annotations
+
+import json
+import os
+import secrets
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+TRACES_DIR = "traces"
+TRACE_FILE_MAX_BYTES = 16 * 1024 * 1024  # rotated once to <agent>.jsonl.1
+SCOPE_NAME = "minion-swarm"
+SPAN_KIND_INTERNAL = 1
+STATUS_OK = 1
+STATUS_ERROR = 2
+FLAME_WIDTH = 30
+
+
+@dataclass
+class Span:
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int = 0
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def to_otlp(self, trace_id: str) -> Dict[str, Any]:
+        span: Dict[str, Any] = {
+            "traceId": trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": SPAN_KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [_attribute(key, value) for key, value in self.attrs.items()],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.error is not None:
+            span["status"] = {"code": STATUS_ERROR, "message": self.error}
+        else:
+            span["status"] = {"code": STATUS_OK}
+        return span
+
+
+class TurnTracer:
+    """Collects one trace at a time for an agent and appends it when it ends.
+
+    Spans are only recorded while a trace is active, so callers can trace
+    unconditionally; outside a turn every call is a no-op.
+    """
+
+    def __init__(self, runtime_dir: Path, agent_name: str, resource: Dict[str, Any]) -> None:
+        self.path = runtime_dir / TRACES_DIR / f"{agent_name}.jsonl"
+        self.resource = {"service.name": "minion-swarm", "minion_swarm.agent": agent_name, **resource}
+        self.trace_id: Optional[str] = None
+        self._root: Optional[Span] = None
+        self._spans: List[Span] = []
+
+    @property
+    def active(self) -> bool:
+        return self._root is not None
+
+    @property
+    def started_ns(self) -> int:
+        return self._root.start_ns if self._root is not None else time.time_ns()
+
+    def begin(self, name: str = "turn", **attrs: Any) -> None:
+        """Open a trace unless one is already open (an idle wait keeps its trace)."""
+        if self._root is not None:
+            return
+        self.trace_id = secrets.token_hex(16)
+        self._root = Span(name, secrets.token_hex(8), None, time.time_ns(), attrs=dict(attrs))
+        self._spans = []
+
+    def add(self, name: str, start_ns: int, end_ns: int, parent: Optional[Span] = None, **attrs: Any) -> Optional[Span]:
+        """Record a span whose bounds were measured by the caller."""
+        if self._root is None:
+            return None
+        span = Span(name, secrets.token_hex(8), (parent or self._root).span_id, start_ns, end_ns, dict(attrs))
+        self._spans.append(span)
+        return span
+
+    def start(self, name: str, parent: Optional[Span] = None, **attrs: Any) -> Optional[Span]:
+        """Open a span now; close it with `finish`."""
+        return self.add(name, time.time_ns(), 0, parent, **attrs)
+
+    def finish(self, span: Optional[Span], error: Optional[str] = None, **attrs: Any) -> None:
+        if span is None:
+            return
+        span.end_ns = time.time_ns()
+        span.error = error
+        span.attrs.update(attrs)
+
+    @contextmanager
+    def span(self, name: str, parent: Optional[Span] = None, **attrs: Any) -> Iterator[Optional[Span]]:
+        span = self.start(name, parent, **attrs)
+        try:
+            yield span
+        finally:
+            self.finish(span)
+
+    def end(self, error: Optional[str] = None, **attrs: Any) -> None:
+        """Close the trace and append it to the trace log."""
+        root = self._root
+        if root is None:
+            return
+        self.finish(root, error, **attrs)
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_attribute(key, value) for key, value in self.resource.items()]},
+                "scopeSpans": [{
+                    "scope": {"name": SCOPE_NAME},
+                    "spans": [span.to_otlp(self.trace_id or "") for span in [root, *self._spans]],
+                }],
+            }]
+        }
+        self._root = None
+        self._spans = []
+        self._append(json.dumps(request, separators=(",", ":")))
+
+    def discard(self) -> None:
+        self._root = None
+        self._spans = []
+
+    def _append(self, line: str) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists() and self.path.stat().st_size > TRACE_FILE_MAX_BYTES:
+                os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+            with self.path.open("a", encoding="utf-8") as fp:
+                fp.write(line + "\n")
+        except OSError:
+            pass  # tracing never takes a turn down
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+def _attribute_value(value: Dict[str, Any]) -> Any:
+    for kind in ("stringValue", "boolValue", "doubleValue"):
+        if kind in value:
+            return value[kind]
+    if "intValue" in value:
+        return int(value["intValue"])
+    return None
+
+
+# ── reading ──────────────────────────────────────────────────────────────────
+
+def read_traces(path: Path, limit: int) -> List[Dict[str, Any]]:
+    """The last `limit` trace requests in a trace log."""
+    if not path.exists():
+        return []
+    with path.open("r", encoding="utf-8") as fp:
+        lines = deque(fp, maxlen=limit)
+    traces = []
+    for line in lines:
+        try:
+            traces.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue  # torn last line from a killed daemon
+    return traces
+
+
+def format_trace(request: Dict[str, Any]) -> List[str]:
+    """Render one trace request as an indented, bar-per-span breakdown."""
+    spans = [
+        span
+        for resource in request.get("resourceSpans", [])
+        for scope in resource.get("scopeSpans", [])
+        for span in scope.get("spans", [])
+    ]
+    if not spans:
+        return []
+    children: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for span in spans:
+        children.setdefault(span.get("parentSpanId"), []).append(span)
+    root = children.get(None, spans[:1])[0]
+    total_ns = max(1, _duration_ns(root))
+
+    attrs = {a["key"]: _attribute_value(a["value"]) for a in root.get("attributes", [])}
+    started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(int(root["startTimeUnixNano"]) / 1e9))
+    status = root.get("status", {})
+    outcome = "ok" if status.get("code") != STATUS_ERROR else f"error: {status.get('message', '')}"
+    details = " ".join(f"{key}={value}" for key, value in attrs.items())
+    lines = [f"trace {root['traceId']} {root['name']} {started} total {total_ns / 1e9:.3f}s {outcome} {details}".rstrip()]
+
+    def walk(span: Dict[str, Any], depth: int) -> None:
+        for child in sorted(children.get(span["spanId"], []), key=lambda s: int(s["startTimeUnixNano"])):
+            duration = _duration_ns(child)
+            share = duration / total_ns
+            bar = "█" * round(share * FLAME_WIDTH)
+            label = f"{'  ' * depth}{child['name']}"
+            lines.append(f"  {label:<22} {duration / 1e9:9.3f}s {share * 100:5.1f}% {bar}")
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return lines
+
+
+def _duration_ns(span: Dict[str, Any]) -> int:
+    return max(0, int(span.get("endTimeUnixNano", 0)) - int(span.get("startTimeUnixNano", 0)))
@@ -1,21 +1,36 @@
 from __future__ import annotations
 
+import json
 import sqlite3
 import threading
 import time
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 from watchdog.events import FileSystemEvent, FileSystemEventHandler
 from watchdog.observers import Observer
 
+from .poller import INOTIFY_SAFETY_INTERVAL_SEC, POLLING_INTERVAL_SEC, WAKE_RECHECK_SEC
+
+STORM_WINDOW_SEC = 1.0     # wakes closer together than this grow the debounce
+DEBOUNCE_STEP_SEC = 0.02   # first debounce inside a storm; doubles up to the cap
+
 
 def utc_now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+# (table, leading columns, index created when no existing index starts with them)
+_INBOX_INDEXES: Tuple[Tuple[str, Sequence[str], str], ...] = (
+    ("messages", ("to_agent", "read_flag", "id"), "idx_messages_to_agent_read_flag_id"),
+    ("messages", ("to_agent", "id"), "idx_messages_to_agent_id"),
+    ("broadcast_reads", ("agent_name", "message_id"), "idx_broadcast_reads_agent_message"),
+)
+
+
 @dataclass
 class CommsMessage:
     id: int
@@ -29,70 +44,382 @@ class CommsMessage:
 
 
 class _DbFileEventHandler(FileSystemEventHandler):
+    """Signal on events for the DB or its -wal file (paths pre-resolved)."""
+
     def __init__(self, db_path: Path, signal: threading.Event) -> None:
         super().__init__()
-        self.db_path = db_path.resolve()
+        # watchdog reports paths under the scheduled (resolved) directory, so
+        # a plain string match is enough — no per-event resolve().
+        self.targets = frozenset({str(db_path), f"{db_path}-wal"})
         self.signal = signal
 
-    def _signal_if_target(self, path: str) -> None:
-        try:
-            if Path(path).resolve() == self.db_path:
-                self.signal.set()
-        except FileNotFoundError:
+    def on_any_event(self, event: FileSystemEvent) -> None:
+        if event.is_directory:
             return
+        if event.src_path in self.targets or getattr(event, "dest_path", "") in self.targets:
+            self.signal.set()
+
+
+class WatchHub:
+    """One DB watch shared by every watcher-mode agent of a process.
+
+    Instead of each `CommsWatcher` running its own watchdog observer on the
+    comms directory, subscribed watchers wait on a per-agent event. A single
+    thread watches the DB, confirms commits with `PRAGMA data_version` and
+    runs one query over all subscribers to wake only those with unread mail.
+    The thread and connection start with the first subscriber.
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path.expanduser().resolve()
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._change_signal = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer: Optional[Observer] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._seen_version: Optional[int] = None
+
+    def subscribe(self, agent_name: str) -> threading.Event:
+        with self._lock:
+            event = self._events.setdefault(agent_name, threading.Event())
+            if self._thread is None:
+                self._start()
+        return event
+
+    def unsubscribe(self, agent_name: str) -> None:
+        with self._lock:
+            self._events.pop(agent_name, None)
 
-    def on_modified(self, event: FileSystemEvent) -> None:
-        self._signal_if_target(event.src_path)
+    def stop(self) -> None:
+        self._stopping.set()
+        self._change_signal.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5.0)
+            self._observer = None
 
-    def on_created(self, event: FileSystemEvent) -> None:
-        self._signal_if_target(event.src_path)
+    def _start(self) -> None:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            observer = Observer()
+            observer.schedule(
+                _DbFileEventHandler(self.db_path, self._change_signal), str(self.db_path.parent), recursive=False,
+            )
+            observer.start()
+            self._observer = observer
+        except Exception:
+            self._observer = None  # no inotify — fall back to data_version polling
+        self._thread = threading.Thread(target=self._run, name="minion-swarm-watch-hub", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        interval = INOTIFY_SAFETY_INTERVAL_SEC if self._observer is not None else POLLING_INTERVAL_SEC
+        woken = False
+        try:
+            while not self._stopping.is_set():
+                self._change_signal.clear()
+                try:
+                    if self._db_changed():
+                        self._fan_out()
+                except sqlite3.Error:
+                    self._close_conn()  # DB replaced or not created yet — reopen next round
+                woken = self._change_signal.wait(timeout=WAKE_RECHECK_SEC if woken else interval)
+        finally:
+            self._close_conn()
+
+    def _db_changed(self) -> bool:
+        if self._conn is None:
+            if not self.db_path.exists():
+                return False
+            self._conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, timeout=0.2)
+            self._seen_version = None
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._seen_version
+        self._seen_version = version
+        return changed
 
-    def on_moved(self, event: FileSystemEvent) -> None:
-        self._signal_if_target(event.dest_path)
+    def _fan_out(self) -> None:
+        with self._lock:
+            names = list(self._events)
+        if not names or self._conn is None:
+            return
+        tables = {row[0] for row in self._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "messages" not in tables:
+            return
+        watermark = (
+            "COALESCE((SELECT last_message_id FROM broadcast_watermarks WHERE agent_name = s.value), 0)"
+            if "broadcast_watermarks" in tables else "0"
+        )
+        broadcast = (
+            f"""
+               OR EXISTS (
+                   SELECT 1 FROM messages m
+                   WHERE m.to_agent = 'all' AND m.id > {watermark} AND NOT EXISTS (
+                       SELECT 1 FROM broadcast_reads br
+                       WHERE br.agent_name = s.value AND br.message_id = m.id
+                   )
+               )"""
+            if "broadcast_reads" in tables else ""
+        )
+        rows = self._conn.execute(
+            f"""
+            SELECT s.value FROM json_each(?) s
+            WHERE EXISTS (SELECT 1 FROM messages WHERE to_agent = s.value AND read_flag = 0){broadcast}
+            """,
+            (json.dumps(names),),
+        ).fetchall()
+        with self._lock:
+            for (name,) in rows:
+                event = self._events.get(name)
+                if event is not None:
+                    event.set()
+
+    def _close_conn(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
 
 
 class CommsWatcher:
-    def __init__(self, agent_name: str, db_path: Path, debounce_seconds: float = 0.5) -> None:
+    def __init__(
+        self,
+        agent_name: str,
+        db_path: Path,
+        debounce_seconds: float = 0.5,
+        hub: Optional[WatchHub] = None,
+    ) -> None:
         self.agent_name = agent_name
         self.db_path = db_path.expanduser().resolve()
         self.debounce_seconds = debounce_seconds
+        self.hub = hub
+        self._hub_event: Optional[threading.Event] = None
 
         self._observer: Optional[Observer] = None
         self._change_signal = threading.Event()
+        self._inotify = False
+        self._seen_version: Optional[int] = None
+        self._debounce = 0.0
+        self._last_wake = 0.0
+
+        # One long-lived connection per watcher; calls arrive from executor
+        # threads, so access is serialized by the lock.
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
 
     def _connect(self) -> sqlite3.Connection:
-        conn = sqlite3.connect(self.db_path, timeout=5.0)
-        conn.row_factory = sqlite3.Row
-        return conn
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=5.0, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            try:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                self._ensure_indexes(conn)
+            except sqlite3.OperationalError:
+                pass  # read-only or busy DB — run without the tuning
+            try:
+                self._ensure_watermarks(conn)
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _transaction(self, mark_seen: bool = False) -> Iterator[sqlite3.Connection]:
+        """Run one transaction on the shared connection.
+
+        With `mark_seen` (inbox reads), the change baseline moves to the
+        `data_version` read before the transaction: every commit it counts
+        is visible to the reads below, and one landing later still moves
+        the counter. Our own commits never change this connection's
+        `data_version`, so nothing needs advancing after the write.
+        """
+        with self._conn_lock:
+            conn = self._connect()
+            version = conn.execute("PRAGMA data_version").fetchone()[0] if mark_seen else None
+            with conn:
+                yield conn
+            if version is not None:
+                self._seen_version = version
+
+    def close(self) -> None:
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _ensure_indexes(conn: sqlite3.Connection) -> None:
+        """Create the inbox indexes unless an index with the same leading columns exists."""
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table, columns, index_name in _INBOX_INDEXES:
+            if table not in tables:
+                continue
+            covered = False
+            for index in conn.execute(f"PRAGMA index_list({table})").fetchall():
+                info = conn.execute(f"PRAGMA index_info({index[1]})").fetchall()
+                leading = tuple(row[2] for row in sorted(info, key=lambda r: r[0]))
+                if leading[: len(columns)] == tuple(columns):
+                    covered = True
+                    break
+            if not covered:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({', '.join(columns)})")
+                conn.commit()
+
+    @classmethod
+    def _ensure_watermarks(cls, conn: sqlite3.Connection) -> None:
+        """Create `broadcast_watermarks` and fold existing `broadcast_reads` into it.
+
+        An agent has read every broadcast with id <= its watermark, plus any
+        later one listed in `broadcast_reads` (read out of order, e.g. by
+        another tool). Existing rows are kept: `minion poll` and other
+        readers that only know `broadcast_reads` may share the DB.
+        """
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "broadcast_watermarks" in tables:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS broadcast_watermarks (
+                    agent_name TEXT PRIMARY KEY,
+                    last_message_id INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            if {"messages", "broadcast_reads"} <= tables:
+                agents = conn.execute("SELECT DISTINCT agent_name FROM broadcast_reads").fetchall()
+                for (agent_name,) in agents:
+                    cls._advance_watermark(conn, agent_name)
+
+    @staticmethod
+    def _advance_watermark(conn: sqlite3.Connection, agent_name: str) -> int:
+        """Move the agent's watermark up to just below its oldest unread broadcast."""
+        row = conn.execute(
+            "SELECT last_message_id FROM broadcast_watermarks WHERE agent_name = ?", (agent_name,),
+        ).fetchone()
+        watermark = int(row[0]) if row else 0
+
+        # Walks the (to_agent, id) index from the watermark; only
+        # out-of-order reads sit between it and the first unread broadcast.
+        row = conn.execute(
+            """
+            SELECT m.id FROM messages m
+            WHERE m.to_agent = 'all' AND m.id > ? AND NOT EXISTS (
+                SELECT 1 FROM broadcast_reads br
+                WHERE br.agent_name = ? AND br.message_id = m.id
+            )
+            ORDER BY m.id ASC
+            LIMIT 1
+            """,
+            (watermark, agent_name),
+        ).fetchone()
+        if row is not None:
+            new_watermark = int(row[0]) - 1
+        else:
+            row = conn.execute("SELECT MAX(id) FROM messages WHERE to_agent = 'all'").fetchone()
+            new_watermark = int(row[0]) if row and row[0] is not None else watermark
+
+        if new_watermark > watermark:
+            conn.execute(
+                """
+                INSERT INTO broadcast_watermarks (agent_name, last_message_id) VALUES (?, ?)
+                ON CONFLICT(agent_name) DO UPDATE SET last_message_id = excluded.last_message_id
+                """,
+                (agent_name, new_watermark),
+            )
+            watermark = new_watermark
+        return watermark
 
     def start(self) -> None:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.hub is not None:
+            self._hub_event = self.hub.subscribe(self.agent_name)
+            return
         if self._observer is not None:
             return
 
-        observer = Observer()
-        handler = _DbFileEventHandler(self.db_path, self._change_signal)
-        observer.schedule(handler, str(self.db_path.parent), recursive=False)
-        observer.start()
-        self._observer = observer
+        try:
+            observer = Observer()
+            handler = _DbFileEventHandler(self.db_path, self._change_signal)
+            observer.schedule(handler, str(self.db_path.parent), recursive=False)
+            observer.start()
+            self._observer = observer
+            self._inotify = True
+        except Exception:
+            self._observer = None  # no inotify — fall back to data_version polling
+            self._inotify = False
 
     def stop(self) -> None:
-        if self._observer is None:
-            return
-        self._observer.stop()
-        self._observer.join(timeout=5.0)
-        self._observer = None
+        if self._hub_event is not None and self.hub is not None:
+            self.hub.unsubscribe(self.agent_name)
+            self._hub_event = None
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5.0)
+            self._observer = None
+        self.close()
 
     def wait_for_update(self, timeout: float = 60.0) -> bool:
-        changed = self._change_signal.wait(timeout=timeout)
-        if changed:
-            time.sleep(self.debounce_seconds)
+        """Block until another connection commits to the DB, or `timeout`.
+
+        File events only wake the check; `PRAGMA data_version` confirms a
+        commit we have not seen. Without inotify the check just polls.
+        Returns after an adaptive debounce: none when the DB has been quiet,
+        doubling up to `debounce_seconds` while commits keep arriving.
+        Under a `WatchHub`, waits for the hub to report unread mail instead.
+        """
+        if self._hub_event is not None:
+            if self._hub_event.wait(timeout=timeout):
+                self._hub_event.clear()
+                self._apply_debounce()
+                return True
+            self._debounce = 0.0
+            return False
+
+        deadline = time.monotonic() + timeout
+        interval = INOTIFY_SAFETY_INTERVAL_SEC if self._inotify else POLLING_INTERVAL_SEC
+        woken = False
+        while True:
             self._change_signal.clear()
-        return changed
+            if self._db_changed():
+                self._apply_debounce()
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._debounce = 0.0
+                return False
+            wait = WAKE_RECHECK_SEC if woken else interval
+            woken = self._change_signal.wait(timeout=min(wait, remaining))
+
+    def _db_changed(self) -> bool:
+        try:
+            with self._conn_lock:
+                version = self._connect().execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            return False
+        return self._seen_version is None or version != self._seen_version
+
+    def _apply_debounce(self) -> None:
+        now = time.monotonic()
+        if now - self._last_wake < STORM_WINDOW_SEC:
+            self._debounce = min(self.debounce_seconds, max(DEBOUNCE_STEP_SEC, self._debounce * 2))
+        else:
+            self._debounce = 0.0
+        if self._debounce > 0:
+            time.sleep(self._debounce)
+        self._last_wake = time.monotonic()
 
     def register_agent(self, role: Optional[str] = None, description: Optional[str] = None, status: str = "online") -> None:
         now = utc_now_iso()
-        with self._connect() as conn:
+        with self._transaction() as conn:
             conn.execute(
                 """
                 INSERT INTO agents (name, registered_at, last_seen, last_inbox_check, role, description, status)
@@ -108,84 +435,118 @@ class CommsWatcher:
 
     def set_agent_status(self, status: str) -> None:
         now = utc_now_iso()
-        with self._connect() as conn:
+        with self._transaction() as conn:
             conn.execute(
                 "UPDATE agents SET status = ?, last_seen = ? WHERE name = ?",
                 (status, now, self.agent_name),
             )
 
     def unread_count(self) -> int:
-        with self._connect() as conn:
-            direct = conn.execute(
-                "SELECT COUNT(*) AS c FROM messages WHERE to_agent = ? AND read_flag = 0",
-                (self.agent_name,),
-            ).fetchone()["c"]
-            broadcast = conn.execute(
+        with self._transaction() as conn:
+            row = conn.execute(
                 """
-                SELECT COUNT(*) AS c
-                FROM messages m
-                LEFT JOIN broadcast_reads br
-                    ON br.agent_name = ? AND br.message_id = m.id
-                WHERE m.to_agent = 'all' AND br.message_id IS NULL
+                SELECT
+                    (SELECT COUNT(*) FROM messages WHERE to_agent = ? AND read_flag = 0)
+                  + (SELECT COUNT(*) FROM messages m
+                     WHERE m.to_agent = 'all'
+                       AND m.id > COALESCE(
+                           (SELECT last_message_id FROM broadcast_watermarks WHERE agent_name = ?), 0)
+                       AND NOT EXISTS (
+                           SELECT 1 FROM broadcast_reads br
+                           WHERE br.agent_name = ? AND br.message_id = m.id
+                       )) AS c
                 """,
-                (self.agent_name,),
-            ).fetchone()["c"]
-        return int(direct) + int(broadcast)
+                (self.agent_name, self.agent_name, self.agent_name),
+            ).fetchone()
+        return int(row["c"])
 
     def pop_next_message(self) -> Optional[CommsMessage]:
+        messages = self.pop_messages(1)
+        return messages[0] if messages else None
+
+    def pop_messages(self, limit: int, max_chars: Optional[int] = None) -> List[CommsMessage]:
+        """Consume up to `limit` unread messages, oldest first, in one transaction.
+
+        Stops before a message that would push the total content past
+        `max_chars`; the first message is always taken.
+        """
         now = utc_now_iso()
-        with self._connect() as conn:
-            row = conn.execute(
+        limit = max(1, limit)
+        with self._transaction(mark_seen=True) as conn:
+            # Each branch is an ordered index range scan cut at `limit`, so
+            # the outer sort only ever sees 2 * limit rows.
+            rows = conn.execute(
                 """
-                SELECT id, from_agent, to_agent, content, timestamp, is_broadcast, is_cc, cc_original_to
-                FROM (
+                SELECT * FROM (
                     SELECT id, from_agent, to_agent, content, timestamp,
                            0 AS is_broadcast, is_cc, cc_original_to
                     FROM messages
                     WHERE to_agent = ? AND read_flag = 0
-
-                    UNION ALL
-
+                    ORDER BY id ASC
+                    LIMIT ?
+                )
+                UNION ALL
+                SELECT * FROM (
                     SELECT m.id, m.from_agent, m.to_agent, m.content, m.timestamp,
                            1 AS is_broadcast, m.is_cc, m.cc_original_to
                     FROM messages m
-                    LEFT JOIN broadcast_reads br
-                        ON br.agent_name = ? AND br.message_id = m.id
-                    WHERE m.to_agent = 'all' AND br.message_id IS NULL
+                    WHERE m.to_agent = 'all'
+                      AND m.id > COALESCE(
+                          (SELECT last_message_id FROM broadcast_watermarks WHERE agent_name = ?), 0)
+                      AND NOT EXISTS (
+                          SELECT 1 FROM broadcast_reads br
+                          WHERE br.agent_name = ? AND br.message_id = m.id
+                      )
+                    ORDER BY m.id ASC
+                    LIMIT ?
                 )
                 ORDER BY id ASC
-                LIMIT 1
+                LIMIT ?
                 """,
-                (self.agent_name, self.agent_name),
-            ).fetchone()
-
-            if row is None:
-                conn.execute(
-                    "UPDATE agents SET last_seen = ?, last_inbox_check = ? WHERE name = ?",
-                    (now, now, self.agent_name),
-                )
-                return None
-
-            message = CommsMessage(
-                id=int(row["id"]),
-                from_agent=str(row["from_agent"]),
-                to_agent=str(row["to_agent"]),
-                content=str(row["content"]),
-                timestamp=str(row["timestamp"]),
-                is_broadcast=bool(row["is_broadcast"]),
-                is_cc=bool(row["is_cc"]),
-                cc_original_to=row["cc_original_to"],
-            )
-
-            if message.is_broadcast:
-                conn.execute(
-                    "INSERT OR IGNORE INTO broadcast_reads (agent_name, message_id) VALUES (?, ?)",
-                    (self.agent_name, message.id),
-                )
-            else:
-                conn.execute(
+                (self.agent_name, limit, self.agent_name, self.agent_name, limit, limit),
+            ).fetchall()
+
+            messages: List[CommsMessage] = []
+            total_chars = 0
+            for row in rows:
+                content = str(row["content"])
+                if messages and max_chars is not None and total_chars + len(content) > max_chars:
+                    break
+                total_chars += len(content)
+                messages.append(CommsMessage(
+                    id=int(row["id"]),
+                    from_agent=str(row["from_agent"]),
+                    to_agent=str(row["to_agent"]),
+                    content=content,
+                    timestamp=str(row["timestamp"]),
+                    is_broadcast=bool(row["is_broadcast"]),
+                    is_cc=bool(row["is_cc"]),
+                    cc_original_to=row["cc_original_to"],
+                ))
+
+            broadcast_ids = [(self.agent_name, m.id) for m in messages if m.is_broadcast]
+            direct_ids = [(m.id,) for m in messages if not m.is_broadcast]
+            if broadcast_ids:
+                # Rows only mark out-of-order reads; the ones this pop adds
+                # at or below the new watermark are redundant and dropped.
+                # Rows that were already there are left alone.
+                added = [
+                    key for key in broadcast_ids
+                    if conn.execute(
+                        "INSERT OR IGNORE INTO broadcast_reads (agent_name, message_id) VALUES (?, ?)", key,
+                    ).rowcount
+                ]
+                watermark = self._advance_watermark(conn, self.agent_name)
+                in_order = [key for key in added if key[1] <= watermark]
+                if in_order:
+                    conn.executemany(
+                        "DELETE FROM broadcast_reads WHERE agent_name = ? AND message_id = ?",
+                        in_order,
+                    )
+            if direct_ids:
+                conn.executemany(
                     "UPDATE messages SET read_flag = 1 WHERE id = ?",
-                    (message.id,),
+                    direct_ids,
                 )
 
             conn.execute(
@@ -193,11 +554,11 @@ class CommsWatcher:
                 (now, now, self.agent_name),
             )
 
-            return message
+            return messages
 
     def send_message(self, from_agent: str, to_agent: str, content: str, cc: Optional[str] = None) -> int:
         now = utc_now_iso()
-        with self._connect() as conn:
+        with self._transaction() as conn:
             cur = conn.execute(
                 """
                 INSERT INTO messages (from_agent, to_agent, content, timestamp, read_flag, is_cc, cc_original_to)
@@ -220,7 +581,7 @@ class CommsWatcher:
             return message_id
 
     def find_lead_agent(self) -> Optional[str]:
-        with self._connect() as conn:
+        with self._transaction() as conn:
             row = conn.execute(
                 "SELECT name FROM agents WHERE role = 'lead' ORDER BY last_seen DESC LIMIT 1"
             ).fetchone()
@@ -0,0 +1,58 @@
+"""Boot calibration is taken from fresh runs only and rejects outliers."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from minion_swarm.calibration import CalibrationKey, CalibrationRejected, CalibrationStore
+from minion_swarm.config import load_config
+from minion_swarm.daemon import AgentDaemon, AgentRunResult
+
+KEY = CalibrationKey("codex", None, None, "codex 1.0")
+
+
+def test_store_rejects_inflated_samples(tmp_path: Path) -> None:
+    store = CalibrationStore(tmp_path)
+    store.record(KEY, 20_000, 200_000, 15_000)
+    with pytest.raises(CalibrationRejected):
+        store.record(KEY, 90_000, 200_000, 15_000)  # over 2x the stored overhead
+    with pytest.raises(CalibrationRejected):
+        store.record(CalibrationKey("codex", "m", None, "codex 1.0"), 120_000, 200_000, 15_000)
+    store.record(KEY, 12_000, 200_000, 15_000)  # lower samples are fine
+    stored = store.get(KEY)
+    assert stored is not None and stored.overhead_tokens == 12_000 and stored.samples == 2
+
+
+def _daemon(tmp_path: Path) -> AgentDaemon:
+    cfg = tmp_path / "minion-swarm.yaml"
+    cfg.write_text(
+        f"project_dir: {tmp_path}\n"
+        f"comms_db: {tmp_path / 'messages.db'}\n"
+        f"docs_dir: {tmp_path / 'docs'}\n"
+        "agents:\n  w1: {role: coder, provider: codex}\n"
+    )
+    daemon = AgentDaemon(load_config(cfg), "w1")
+    daemon._calibration_key = KEY
+    daemon._stream_log.close()
+    return daemon
+
+
+def test_resumed_boot_is_not_recorded(tmp_path: Path) -> None:
+    daemon = _daemon(tmp_path)
+    daemon.resume_ready = True
+    runs: List[List[str]] = []
+
+    async def fake_run(cmd: List[str], stdin_prompt: object = None) -> AgentRunResult:
+        runs.append(cmd)
+        return AgentRunResult(0, False, False, "codex", input_tokens=150_000)
+
+    daemon._run_command = fake_run  # type: ignore[method-assign]
+    daemon._update_hp = lambda *args, **kwargs: None  # type: ignore[method-assign]
+    asyncio.run(daemon._eager_boot())
+    daemon._store.close()
+
+    assert "resume" in runs[0]
+    assert CalibrationStore(daemon.config.state_dir).get(KEY) is None
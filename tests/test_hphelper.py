@@ -0,0 +1,66 @@
+"""The HP helper answers every request line with the CLI's exit code."""
+from __future__ import annotations
+
+import asyncio
+import io
+import sys
+
+import pytest
+
+from minion_swarm import hphelper
+
+
+def _fake_cli() -> None:
+    print("chatter that must not reach the reply channel")
+    if "--fail" in sys.argv:
+        sys.exit(3)
+
+
+def test_replies_with_exit_codes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(hphelper, "_load_cli", lambda: _fake_cli)
+    out = io.StringIO()
+    hphelper.main(io.StringIO('["update-hp", "--agent", "w1"]\n["update-hp", "--fail"]\nnot json\n'), out)
+    assert out.getvalue().splitlines() == ["ready", "0", "3", "2"]
+
+
+def test_reports_missing_entry_point(monkeypatch: pytest.MonkeyPatch) -> None:
+    def missing() -> None:
+        raise LookupError("no 'minion' console script")
+
+    monkeypatch.setattr(hphelper, "_load_cli", missing)
+    out = io.StringIO()
+    assert hphelper.main(io.StringIO(""), out) == 1
+    assert out.getvalue().startswith("unavailable ")
+
+
+class _StubHelper:
+    def __init__(self) -> None:
+        self.calls: list = []
+        self.closed = False
+
+    async def call(self, args: list) -> int:
+        self.calls.append(args[2])
+        return 0
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+def test_writers_share_one_helper(tmp_path) -> None:
+    from minion_swarm.hpwriter import HpUpdate, HpWriter
+
+    async def scenario() -> _StubHelper:
+        helper = _StubHelper()
+        writers = [
+            HpWriter(name, tmp_path / "minion.db", tmp_path, lambda _msg: None, helper=helper)  # type: ignore[arg-type]
+            for name in ("w1", "w2")
+        ]
+        for writer in writers:
+            writer.submit(HpUpdate(10, 1, 1000))
+        for writer in writers:
+            await writer.close()
+        return helper
+
+    helper = asyncio.run(scenario())
+    assert sorted(helper.calls) == ["w1", "w2"]
+    assert not helper.closed  # the owner (supervisor) closes it
@@ -0,0 +1,79 @@
+"""InboxPoller sees stand-down and consumes mail without `minion poll`."""
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+from pathlib import Path
+
+from minion_swarm.poller import InboxPoller
+
+SCHEMA = """
+CREATE TABLE messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    from_agent TEXT NOT NULL,
+    to_agent TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL DEFAULT '',
+    read_flag INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE broadcast_reads (agent_name TEXT NOT NULL, message_id INTEGER NOT NULL, PRIMARY KEY (agent_name, message_id));
+CREATE TABLE agents (name TEXT PRIMARY KEY, last_seen TEXT, last_inbox_check TEXT);
+CREATE TABLE tasks (id INTEGER PRIMARY KEY, title TEXT);
+CREATE TABLE flags (key TEXT PRIMARY KEY, value TEXT);
+INSERT INTO agents (name) VALUES ('w1');
+"""
+
+
+def _db(tmp_path: Path) -> Path:
+    db = tmp_path / "minion.db"
+    with sqlite3.connect(db) as conn:
+        conn.executescript(SCHEMA)
+    return db
+
+
+def _wake_after(db: Path, sql: str) -> str:
+    async def scenario() -> str:
+        poller = InboxPoller("w1", db, heartbeat_sec=30.0)
+        stop = asyncio.Event()
+        try:
+            assert poller._check() is None  # baseline
+            waiting = asyncio.ensure_future(poller.wait_for_work(stop))
+            await asyncio.sleep(0.1)
+            with sqlite3.connect(db) as other:
+                other.executescript(sql)
+            return await asyncio.wait_for(waiting, timeout=15.0)
+        finally:
+            poller.stop()
+
+    return asyncio.run(scenario())
+
+
+def test_stand_down_wakes_without_pending_rows(tmp_path: Path) -> None:
+    db = _db(tmp_path)
+    assert _wake_after(db, "INSERT INTO flags VALUES ('stand_down', '1')") == "stand_down"
+
+
+def test_task_change_falls_back_to_minion_poll(tmp_path: Path) -> None:
+    db = _db(tmp_path)
+    assert _wake_after(db, "INSERT INTO tasks (title) VALUES ('t')") == "poll"
+
+
+def test_mail_is_consumed_in_process(tmp_path: Path) -> None:
+    db = _db(tmp_path)
+    sql = """
+    INSERT INTO messages (from_agent, to_agent, content) VALUES ('lead', 'all', 'b1');
+    INSERT INTO messages (from_agent, to_agent, content) VALUES ('lead', 'w1', 'd1');
+    """
+    assert _wake_after(db, sql) == "inbox"
+
+    poller = InboxPoller("w1", db)
+    try:
+        assert poller._check() is not None
+        assert [(m["from_agent"], m["content"]) for m in poller.consume()] == [("lead", "b1"), ("lead", "d1")]
+        assert poller.consume() == []
+    finally:
+        poller.stop()
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT read_flag FROM messages WHERE to_agent = 'w1'").fetchone() == (1,)
+        assert conn.execute("SELECT * FROM broadcast_reads").fetchall() == [("w1", 1)]
+        assert conn.execute("SELECT last_inbox_check FROM agents").fetchone()[0]
@@ -0,0 +1,35 @@
+"""A group we may not signal is reported failed without aborting the others."""
+from __future__ import annotations
+
+import os
+import subprocess
+
+import pytest
+
+from minion_swarm import procctl
+
+
+def test_stop_continues_past_permission_error(monkeypatch: pytest.MonkeyPatch) -> None:
+    foreign = subprocess.Popen(["sleep", "30"], start_new_session=True)
+    ours = subprocess.Popen(["sleep", "30"], start_new_session=True)
+    real_killpg, real_kill = os.killpg, os.kill
+
+    def deny(real):
+        def signal_unless_foreign(pid: int, signum: int) -> None:
+            if pid == foreign.pid:
+                raise PermissionError(1, "Operation not permitted")
+            real(pid, signum)
+        return signal_unless_foreign
+
+    monkeypatch.setattr(procctl.os, "killpg", deny(real_killpg))
+    monkeypatch.setattr(procctl.os, "kill", deny(real_kill))
+    try:
+        results = procctl.stop_process_groups([foreign.pid, ours.pid], grace_sec=2.0, kill_sec=1.0)
+    finally:
+        monkeypatch.undo()
+        foreign.kill()
+        foreign.wait()
+        ours.wait()
+
+    assert results[foreign.pid].outcome == "failed"
+    assert results[ours.pid].outcome == "stopped"
@@ -0,0 +1,51 @@
+"""Oversized provider lines must summarize, never raise, on any decoded payload."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from minion_swarm.providers import get_provider
+from minion_swarm.providers.base import BaseProvider
+from minion_swarm.stream import parse_stream_line
+
+AGENT_CFG = SimpleNamespace(model=None, allowed_tools=None, permission_mode=None, system="")
+
+ODD_ERRORS = [
+    {"type": "error", "error": None, "message": "overloaded " + "x" * 600},
+    {"type": "error", "error": "boom", "message": "x" * 600},
+    {"type": "error", "error": [], "code": 529, "detail": "x" * 600},
+    {"type": "result", "error": {"code": 500, "message": None}, "detail": "x" * 600},
+]
+
+
+@pytest.mark.parametrize("payload", ODD_ERRORS)
+def test_extract_error_summary_with_decoded_payload(payload: dict) -> None:
+    line = json.dumps(payload)
+    summary = BaseProvider._extract_error_summary(line, data=payload)
+    assert summary
+
+
+@pytest.mark.parametrize("provider", ["claude", "codex", "gemini", "opencode", "fake"])
+@pytest.mark.parametrize("payload", ODD_ERRORS)
+def test_filter_event_survives_non_dict_error(provider: str, payload: dict, tmp_path: Path) -> None:
+    filt = get_provider(provider, "agent", AGENT_CFG, use_poll=False)
+    event = parse_stream_line(json.dumps(payload) + "\n")
+    replacement = filt.filter_event(event, tmp_path / "agent.error.log")
+    assert replacement is None or replacement.startswith("[agent] ")
+
+
+@pytest.mark.parametrize("provider", ["codex", "gemini"])
+def test_filter_event_does_not_redecode_plain_text(provider: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    filt = get_provider(provider, "agent", AGENT_CFG, use_poll=False)
+    event = parse_stream_line("Error: 503 upstream " + "x" * 600 + "\n")
+    assert not event.is_json
+
+    def fail(*_args, **_kwargs):
+        raise AssertionError("line decoded twice")
+
+    monkeypatch.setattr(json, "loads", fail)
+    replacement = filt.filter_event(event, tmp_path / "agent.error.log")
+    assert replacement is not None and "503" in replacement
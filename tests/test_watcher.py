@@ -0,0 +1,72 @@
+"""CommsWatcher must not swallow a foreign commit behind its own writes."""
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+
+from minion_swarm.watcher import CommsWatcher
+
+SCHEMA = """
+CREATE TABLE messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    from_agent TEXT NOT NULL,
+    to_agent TEXT NOT NULL,
+    content TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    read_flag INTEGER NOT NULL DEFAULT 0,
+    is_cc INTEGER NOT NULL DEFAULT 0,
+    cc_original_to TEXT
+);
+CREATE TABLE broadcast_reads (agent_name TEXT NOT NULL, message_id INTEGER NOT NULL, PRIMARY KEY (agent_name, message_id));
+CREATE TABLE agents (
+    name TEXT PRIMARY KEY, registered_at TEXT, last_seen TEXT, last_inbox_check TEXT,
+    role TEXT, description TEXT, status TEXT
+);
+"""
+
+
+def test_foreign_commit_before_own_write_still_wakes(tmp_path: Path) -> None:
+    db = tmp_path / "messages.db"
+    with sqlite3.connect(db) as conn:
+        conn.executescript(SCHEMA)
+    watcher = CommsWatcher("w1", db)
+    try:
+        watcher.register_agent()
+        assert watcher.pop_messages(10) == []  # inbox read: baseline taken here
+
+        with sqlite3.connect(db) as other:
+            other.execute(
+                "INSERT INTO messages (from_agent, to_agent, content, timestamp) VALUES ('lead', 'w1', 'hi', ?)",
+                (datetime.now(timezone.utc).isoformat(),),
+            )
+        watcher.set_agent_status("idle")  # our write after the foreign commit
+
+        assert watcher.wait_for_update(timeout=0.5)
+        assert [m.content for m in watcher.pop_messages(10)] == ["hi"]
+        assert not watcher.wait_for_update(timeout=0.2)
+    finally:
+        watcher.close()
+
+
+def test_watermarks_keep_rows_other_readers_rely_on(tmp_path: Path) -> None:
+    db = tmp_path / "messages.db"
+    now = datetime.now(timezone.utc).isoformat()
+    with sqlite3.connect(db) as conn:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO messages (from_agent, to_agent, content, timestamp) VALUES ('lead', 'all', ?, ?)",
+            [("b1", now), ("b2", now), ("b3", now)],
+        )
+        # a poll-mode agent read b1 and b2 through `minion poll`
+        conn.executemany("INSERT INTO broadcast_reads VALUES ('p1', ?)", [(1,), (2,)])
+    watcher = CommsWatcher("w1", db)
+    try:
+        watcher.register_agent()
+        assert [m.content for m in watcher.pop_messages(10)] == ["b1", "b2", "b3"]
+    finally:
+        watcher.close()
+
+    with sqlite3.connect(db) as conn:
+        assert conn.execute("SELECT * FROM broadcast_reads ORDER BY message_id").fetchall() == [("p1", 1), ("p1", 2)]
+        assert conn.execute("SELECT * FROM broadcast_watermarks ORDER BY agent_name").fetchall() == [("p1", 2), ("w1", 3)]